@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""
+Abstract: Compare the vectorized alpha diversity metrics used by diversity.py with
+          the original approach of densifying each sample and calling a metric
+          function on it (scikit-bio's if it is installed, otherwise equivalent
+          NumPy functions).
+"""
+from __future__ import print_function, division
+import sys
+import time
+import argparse
+from phylotoast import alpha_diversity as ad
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError as ie:
+    sys.exit("Please install missing module: {}.".format(ie))
+
+METRICS = ["shannon", "simpson", "chao1", "observed_otus", "goods_coverage"]
+
+
+def _nonzero(counts):
+    return counts[counts.nonzero()].astype(float)
+
+
+def shannon(counts):
+    freqs = _nonzero(counts) / counts.sum()
+    return -(freqs * np.log2(freqs)).sum()
+
+
+def simpson(counts):
+    freqs = counts / counts.sum()
+    return 1 - (freqs * freqs).sum()
+
+
+def observed_otus(counts):
+    return (counts > 0).sum()
+
+
+def chao1(counts):
+    f1, f2 = (counts == 1).sum(), (counts == 2).sum()
+    return observed_otus(counts) + f1 * (f1 - 1) / (2 * (f2 + 1))
+
+
+def goods_coverage(counts):
+    return 1 - (counts == 1).sum() / counts.sum()
+
+
+def per_sample_metrics():
+    try:
+        from skbio.diversity import alpha
+    except ImportError:
+        return globals()
+    return vars(alpha)
+
+
+def synthetic_counts(n_otus, n_samples, density, seed=0):
+    """
+    Build a random sparse sample x OTU count matrix, with many singletons and
+    doubletons.
+    """
+    counts = sparse.random(n_samples, n_otus, density=density, format="csr",
+                           random_state=seed)
+    counts.data = np.ceil(counts.data ** 4 * 50)
+    return counts
+
+
+def legacy(counts, metric):
+    """
+    The original approach: one dense count vector and one metric call per sample.
+    """
+    return [metric(counts[i].toarray().ravel().astype(int))
+            for i in range(counts.shape[0])]
+
+
+def handle_program_options():
+    parser = argparse.ArgumentParser(description="Benchmark the alpha diversity "
+                                     "metrics on a synthetic OTU table.")
+    parser.add_argument("--otus", type=int, default=20000,
+                        help="Number of OTUs in the synthetic table.")
+    parser.add_argument("--samples", type=int, default=5000,
+                        help="Number of samples in the synthetic table.")
+    parser.add_argument("--density", type=float, default=0.01,
+                        help="Fraction of nonzero OTU x sample cells.")
+    parser.add_argument("--processes", type=int, default=4,
+                        help="Worker processes for the per-sample pool run.")
+    return parser.parse_args()
+
+
+def main():
+    args = handle_program_options()
+    counts = synthetic_counts(args.otus, args.samples, args.density)
+    functions = per_sample_metrics()
+    print("Table: {} samples x {} OTUs, {} nonzero".format(args.samples, args.otus,
+                                                          counts.nnz))
+    print("{:<16}{:>16}{:>16}{:>10}".format("metric", "vectorized (s)",
+                                            "per-sample (s)", "pool (s)"))
+    for metric in METRICS:
+        start = time.time()
+        fast = ad.alpha_diversity(counts, metric)
+        t_fast = time.time() - start
+
+        start = time.time()
+        slow = legacy(counts, functions[metric])
+        t_slow = time.time() - start
+
+        start = time.time()
+        ad.alpha_diversity(counts, functions[metric], args.processes)
+        t_pool = time.time() - start
+
+        assert np.allclose(fast, slow), metric
+        print("{:<16}{:>16.3f}{:>16.2f}{:>10.2f}".format(metric, t_fast, t_slow,
+                                                        t_pool))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
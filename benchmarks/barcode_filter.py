@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+"""
+Abstract: Compare barcode_filter.py's hash-indexed, paired FASTA/QUAL streaming
+          filter with the original approach: a list of barcodes checked for every
+          sequence, and the whole QUAL file loaded into a dict whose IDs are then
+          checked against a list of the kept sequence IDs.
+"""
+from __future__ import print_function, division
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..",
+                                "bin"))
+import barcode_filter as bf
+from phylotoast import util
+
+
+def write_synthetic_data(fasta_fp, qual_fp, n_records, barcodes, seed=0):
+    """
+    Write random reads, each starting with one of the barcodes (or a random
+    8-mer), and matching quality scores.
+    """
+    rand = random.Random(seed)
+    bases = "".join(rand.choice("ACGT") for _ in range(2000))
+    with open(fasta_fp, "w") as fastaF, open(qual_fp, "w") as qualF:
+        for i in range(n_records):
+            if rand.random() < 0.8:
+                bc = rand.choice(barcodes)
+            else:
+                bc = "".join(rand.choice("ACGT") for _ in range(8))
+            start = rand.randrange(1500)
+            seq = bc + bases[start:start + 250]
+            fastaF.write(">read{0} orig_bc={1}\n{2}\n".format(i, bc, seq))
+            qualF.write(">read{0} orig_bc={1}\n{2}\n".format(
+                i, bc, " ".join("30" for _ in seq)))
+
+
+def legacy_filter(fasta_fp, qual_fp, barcodes):
+    seqs = [rec for rec in util.iterFASTA(fasta_fp) if rec.data[:8] in barcodes]
+    seqids = [rec.id for rec in seqs]
+    quals = {seqID: lines for seqID, lines in bf.iter_records(open(qual_fp))}
+    return seqs, [quals[recID] for recID in quals if recID in seqids]
+
+
+def streaming_filter(fasta_fp, qual_fp, barcodes, out_prefix):
+    index = bf.BarcodeIndex(barcodes)
+    with open(fasta_fp) as fastaF, open(qual_fp) as qualF, \
+            open(out_prefix + ".fasta", "w") as outF, \
+            open(out_prefix + ".qual", "w") as out_qualF:
+        return bf.filter_sequences(fastaF, index, outF, qualF, out_qualF)
+
+
+def handle_program_options():
+    parser = argparse.ArgumentParser(description="Benchmark barcode_filter.py on "
+                                     "synthetic FASTA and QUAL files.")
+    parser.add_argument("-n", "--num_records", type=int, default=20000,
+                        help="Number of reads. The legacy approach is quadratic in "
+                             "the number of reads, so keep this modest.")
+    parser.add_argument("-b", "--num_barcodes", type=int, default=384,
+                        help="Number of barcodes in the mapping file.")
+    return parser.parse_args()
+
+
+def main():
+    args = handle_program_options()
+    rand = random.Random(1)
+    barcodes = list({"".join(rand.choice("ACGT") for _ in range(8))
+                     for _ in range(args.num_barcodes)})
+    tmp_dir = tempfile.mkdtemp()
+    fasta_fp = os.path.join(tmp_dir, "in.fna")
+    qual_fp = os.path.join(tmp_dir, "in.qual")
+    out_prefix = os.path.join(tmp_dir, "out")
+    try:
+        write_synthetic_data(fasta_fp, qual_fp, args.num_records, barcodes)
+        print("{} reads, {} barcodes".format(args.num_records, len(barcodes)))
+
+        start = time.time()
+        seqs, quals = legacy_filter(fasta_fp, qual_fp, barcodes)
+        print("legacy:    {:.2f} s, {} kept".format(time.time() - start, len(seqs)))
+
+        start = time.time()
+        count, kept, _ = streaming_filter(fasta_fp, qual_fp, barcodes, out_prefix)
+        print("streaming: {:.2f} s, {} kept".format(time.time() - start, kept))
+    finally:
+        for fn in os.listdir(tmp_dir):
+            os.remove(os.path.join(tmp_dir, fn))
+        os.rmdir(tmp_dir)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""
+Abstract: Compare the peak memory use and run time of condense.condense_otus
+          (whole condensed table in memory) and stream_condense_otus (bounded
+          per-OTU buffers spilled to disk) on a synthetic seqs_otus file.
+          Use --num_seqs 100000000 to reproduce a 100M-sequence run.
+"""
+from __future__ import print_function, division
+import os
+import sys
+import time
+import random
+import resource
+import argparse
+import tempfile
+import multiprocessing as mp
+from phylotoast import condense as cd
+
+
+def write_synthetic_inputs(otus_fp, matrix_fp, num_seqs, num_otus, num_unique,
+                           seed=0):
+    """
+    Write a seqs_otus file with num_seqs sequence IDs spread over num_otus OTUs and
+    a non-unique OTU matrix that folds them into num_unique OTUs.
+    """
+    rand = random.Random(seed)
+    per_otu = num_seqs // num_otus
+    with open(otus_fp, "w") as outF:
+        seq = 0
+        for otu in range(num_otus):
+            n = per_otu if otu < num_otus - 1 else num_seqs - seq
+            outF.write("{}\t{}\n".format(otu, "\t".join(
+                "S{}_{}".format(rand.randint(1, 96), i)
+                for i in range(seq, seq + n))))
+            seq += n
+
+    members = [[] for _ in range(num_unique)]
+    for otu in range(num_unique, num_otus):
+        members[rand.randrange(num_unique)].append(str(otu))
+    with open(matrix_fp, "w") as outF:
+        for uOTU, nuOTUs in enumerate(members):
+            outF.write("{}\t{}\n".format(uOTU, "\t".join(nuOTUs)))
+
+
+def run_mode(mode, otus_fp, matrix_fp, max_memory, out_q):
+    """
+    Condense the synthetic data in a fresh process and report the elapsed time and
+    the growth in peak resident memory.
+    """
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.time()
+    with open(otus_fp) as otuF, open(matrix_fp) as nuF, \
+            open(os.devnull, "w") as outF:
+        if mode == "condense_otus":
+            cd.write_condensed_otus(cd.condense_otus(otuF, nuF), outF)
+        else:
+            cd.stream_condense_otus(otuF, cd.parse_nonunique_matrix(nuF), outF,
+                                    max_memory)
+    elapsed = time.time() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    out_q.put((elapsed, (peak_rss - base_rss) / 1024))
+
+
+def handle_program_options():
+    parser = argparse.ArgumentParser(description="Benchmark the peak memory of "
+                                     "pick_otus_condense.py on synthetic data.")
+    parser.add_argument("-n", "--num_seqs", type=int, default=5000000,
+                        help="Number of sequence IDs in the seqs_otus file.")
+    parser.add_argument("--otus", type=int, default=20000,
+                        help="Number of OTUs in the seqs_otus file.")
+    parser.add_argument("--unique", type=int, default=2000,
+                        help="Number of unique OTUs after condensing.")
+    parser.add_argument("-m", "--max_memory", type=float, default=64,
+                        help="Buffer size (MB) for stream_condense_otus.")
+    return parser.parse_args()
+
+
+def main():
+    args = handle_program_options()
+    tmp_dir = tempfile.mkdtemp()
+    otus_fp = os.path.join(tmp_dir, "seqs_otus.txt")
+    matrix_fp = os.path.join(tmp_dir, "nonunique_otu_matrix.txt")
+    try:
+        write_synthetic_inputs(otus_fp, matrix_fp, args.num_seqs, args.otus,
+                               args.unique)
+        size_mb = os.path.getsize(otus_fp) / 1024 ** 2
+        print("{} sequences in {} OTUs, {:.1f} MB on disk".format(
+              args.num_seqs, args.otus, size_mb))
+        print("{:<22}{:>10}{:>16}".format("mode", "time (s)", "peak RSS (MB)"))
+        for mode in ["condense_otus", "stream_condense_otus"]:
+            out_q = mp.Queue()
+            proc = mp.Process(target=run_mode, args=(mode, otus_fp, matrix_fp,
+                                                     args.max_memory, out_q))
+            proc.start()
+            elapsed, rss = out_q.get()
+            proc.join()
+            print("{:<22}{:>10.2f}{:>16.1f}".format(mode, elapsed, rss))
+    finally:
+        for fp in (otus_fp, matrix_fp):
+            if os.path.exists(fp):
+                os.remove(fp)
+        os.rmdir(tmp_dir)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
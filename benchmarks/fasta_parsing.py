@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+"""
+Abstract: Compare the peak memory use and throughput of the FASTA parsers in
+          phylotoast.util: storeFASTA (whole file in memory), parseFASTA (list of all
+          records) and iterFASTA (one record at a time).
+"""
+from __future__ import print_function, division
+import os
+import sys
+import time
+import gzip
+import random
+import resource
+import argparse
+import tempfile
+import multiprocessing as mp
+from phylotoast import util
+
+parsers = {"storeFASTA": util.storeFASTA,
+           "parseFASTA": util.parseFASTA,
+           "iterFASTA": util.iterFASTA}
+
+
+def write_synthetic_fasta(fp, n_records, seq_len, seed=0):
+    """
+    Write n_records random sequences of seq_len bases, wrapped at 80 columns.
+    """
+    rand = random.Random(seed)
+    opener = gzip.open if fp.endswith(".gz") else open
+    with opener(fp, "wb") as outF:
+        for i in range(n_records):
+            seq = "".join(rand.choice("ACGT") for _ in range(seq_len))
+            outF.write(">S{0}_{1} read{1} orig_bc=ACGT\n".format(i % 100, i))
+            for j in range(0, seq_len, 80):
+                outF.write(seq[j:j+80] + "\n")
+
+
+def run_parser(name, fp, out_q):
+    """
+    Consume every record with the named parser in a fresh process and report the
+    elapsed time and the growth in peak resident memory.
+    """
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.time()
+    n_bases = 0
+    for rec in parsers[name](fp):
+        n_bases += len(rec.data)
+    elapsed = time.time() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    out_q.put((elapsed, n_bases, (peak_rss - base_rss) / 1024))
+
+
+def handle_program_options():
+    parser = argparse.ArgumentParser(description="Benchmark the FASTA parsers in "
+                                     "phylotoast.util on a synthetic sequence file.")
+    parser.add_argument("-n", "--num_records", type=int, default=200000,
+                        help="Number of sequences in the synthetic FASTA file.")
+    parser.add_argument("-l", "--seq_len", type=int, default=400,
+                        help="Length of each synthetic sequence.")
+    parser.add_argument("--gzip", action="store_true",
+                        help="Gzip the synthetic file. storeFASTA and parseFASTA "
+                             "are still given the path, which file_handle() opens "
+                             "with gzip.")
+    return parser.parse_args()
+
+
+def main():
+    args = handle_program_options()
+    fd, fp = tempfile.mkstemp(suffix=".fna.gz" if args.gzip else ".fna")
+    os.close(fd)
+    try:
+        write_synthetic_fasta(fp, args.num_records, args.seq_len)
+        size_mb = os.path.getsize(fp) / 1024 ** 2
+        print("{} records, {:.1f} MB on disk".format(args.num_records, size_mb))
+        print("{:<12}{:>10}{:>14}{:>16}".format("parser", "time (s)", "Mbases/s",
+                                               "peak RSS (MB)"))
+        for name in ["storeFASTA", "parseFASTA", "iterFASTA"]:
+            out_q = mp.Queue()
+            proc = mp.Process(target=run_parser, args=(name, fp, out_q))
+            proc.start()
+            elapsed, n_bases, rss = out_q.get()
+            proc.join()
+            print("{:<12}{:>10.2f}{:>14.2f}{:>16.1f}".format(
+                  name, elapsed, n_bases / 1e6 / elapsed, rss))
+    finally:
+        os.remove(fp)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
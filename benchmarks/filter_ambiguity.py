@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+"""
+Abstract: Measure the throughput and peak memory of filter_ambiguity.py's streaming
+          block filter, serially and over a worker pool, against the original
+          record-based implementation (Biopython SeqRecords collected into a list
+          before writing; only run if Biopython is installed).
+"""
+from __future__ import print_function, division
+import os
+import sys
+import time
+import random
+import resource
+import argparse
+import tempfile
+import multiprocessing as mp
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..",
+                                "bin"))
+import filter_ambiguity as fa
+
+
+def write_synthetic_fasta(fp, n_records, seq_len, seed=0):
+    """
+    Write n_records random sequences of seq_len bases, wrapped at 80 columns. A
+    fifth of the sequences contain enough Ns to be filtered out.
+    """
+    rand = random.Random(seed)
+    bases = "".join(rand.choice("ACGT") for _ in range(seq_len * 4))
+    with open(fp, "wb") as outF:
+        for i in range(n_records):
+            start = rand.randrange(seq_len * 3)
+            seq = bases[start:start + seq_len]
+            if i % 5 == 0:
+                seq = seq[:seq_len // 2] + "N" * (seq_len // 10) + seq[seq_len // 2:]
+            outF.write(">S{0}_{1} read{1} orig_bc=ACGT\n".format(i % 100, i))
+            for j in range(0, len(seq), 80):
+                outF.write(seq[j:j+80] + "\n")
+
+
+def legacy_filter(in_fp, out_fp, percent):
+    from Bio import SeqIO
+    with open(in_fp, "rU") as inF:
+        seqs = [record for record in SeqIO.parse(inF, "fasta")
+                if record.seq.count("N")/float(len(record)) < percent]
+    SeqIO.write(seqs, out_fp, "fasta")
+
+
+def run(name, in_fp, out_fp, processes, out_q):
+    """
+    Filter the file in a fresh process and report the elapsed time and the growth
+    in peak resident memory.
+    """
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.time()
+    if name == "legacy":
+        legacy_filter(in_fp, out_fp, 0.05)
+    else:
+        with open(in_fp, "rb") as inF, open(out_fp, "w", 1048576) as outF:
+            fa.filter_file(inF, outF, 0.05, 6, processes)
+    elapsed = time.time() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    out_q.put((elapsed, (peak_rss - base_rss) / 1024))
+
+
+def handle_program_options():
+    parser = argparse.ArgumentParser(description="Benchmark filter_ambiguity.py on "
+                                     "a synthetic sequence file.")
+    parser.add_argument("-n", "--num_records", type=int, default=1000000,
+                        help="Number of sequences in the synthetic FASTA file.")
+    parser.add_argument("-l", "--seq_len", type=int, default=250,
+                        help="Length of each synthetic sequence.")
+    parser.add_argument("--processes", type=int, default=4,
+                        help="Worker processes for the pooled run.")
+    return parser.parse_args()
+
+
+def main():
+    args = handle_program_options()
+    tmp_dir = tempfile.mkdtemp()
+    in_fp = os.path.join(tmp_dir, "in.fna")
+    out_fp = os.path.join(tmp_dir, "out.fna")
+    try:
+        write_synthetic_fasta(in_fp, args.num_records, args.seq_len)
+        size_mb = os.path.getsize(in_fp) / 1024 ** 2
+        print("{} records, {:.1f} MB on disk".format(args.num_records, size_mb))
+        print("{:<20}{:>10}{:>10}{:>16}".format("implementation", "time (s)", "MB/s",
+                                                "peak RSS (MB)"))
+        runs = [("streaming", 1),
+                ("streaming x{}".format(args.processes), args.processes)]
+        try:
+            import Bio  # noqa
+            runs.insert(0, ("legacy", 1))
+        except ImportError:
+            print("(Biopython is not installed; skipping the legacy implementation)")
+        for name, processes in runs:
+            out_q = mp.Queue()
+            proc = mp.Process(target=run, args=(name, in_fp, out_fp, processes,
+                                                out_q))
+            proc.start()
+            elapsed, rss = out_q.get()
+            proc.join()
+            print("{:<20}{:>10.2f}{:>10.1f}{:>16.1f}".format(name, elapsed,
+                                                            size_mb / elapsed, rss))
+    finally:
+        for fp in (in_fp, out_fp):
+            if os.path.exists(fp):
+                os.remove(fp)
+        os.rmdir(tmp_dir)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+"""
+Abstract: Compare the sparse-matrix implementation of biom_calc.raw_abundance against
+          the original per-cell lookup implementation on a synthetic OTU table.
+"""
+from __future__ import print_function
+import sys
+import time
+import argparse
+from collections import defaultdict
+from phylotoast import biom_calc as bc
+try:
+    import numpy as np
+    from scipy import sparse
+    import biom
+except ImportError as ie:
+    sys.exit("Please install missing module: {}.".format(ie))
+
+
+def synthetic_table(n_otus, n_samples, density, seed=0):
+    """
+    Build a random sparse OTU table with integer counts.
+    """
+    data = sparse.random(n_otus, n_samples, density=density, format="csc",
+                         random_state=seed)
+    data.data = np.ceil(data.data * 100)
+    otuIDs = ["OTU_{}".format(i) for i in range(n_otus)]
+    sampleIDs = ["S{}".format(i) for i in range(n_samples)]
+    return biom.Table(data, otuIDs, sampleIDs)
+
+
+def legacy_raw_abundance(biomf, sampleIDs=None, sample_abd=True):
+    """
+    The original implementation: one get_value_by_ids() call per OTU x sample cell
+    and a linear scan of the sample IDs for validation.
+    """
+    results = defaultdict(int)
+    if sampleIDs is None:
+        sampleIDs = biomf.ids()
+    else:
+        for sid in sampleIDs:
+            assert sid in biomf.ids()
+    otuIDs = biomf.ids(axis="observation")
+
+    for sampleID in sampleIDs:
+        for otuID in otuIDs:
+            abd = biomf.get_value_by_ids(otuID, sampleID)
+            if sample_abd:
+                results[sampleID] += abd
+            else:
+                results[otuID] += abd
+    return results
+
+
+def timed(fn, *args, **kwargs):
+    start = time.time()
+    result = fn(*args, **kwargs)
+    return result, time.time() - start
+
+
+def handle_program_options():
+    parser = argparse.ArgumentParser(description="Benchmark biom_calc.raw_abundance "
+                                     "on a synthetic OTU table.")
+    parser.add_argument("--otus", type=int, default=100000,
+                        help="Number of OTUs (rows) in the synthetic table.")
+    parser.add_argument("--samples", type=int, default=200,
+                        help="Number of samples (columns) in the synthetic table.")
+    parser.add_argument("--density", type=float, default=0.05,
+                        help="Fraction of nonzero OTU x sample cells.")
+    parser.add_argument("--group_size", type=int, default=1,
+                        help="Number of samples in the group passed as sampleIDs, "
+                             "mirroring a single iTol.py category. The legacy "
+                             "implementation is only timed on this group.")
+    return parser.parse_args()
+
+
+def main():
+    args = handle_program_options()
+    biomf = synthetic_table(args.otus, args.samples, args.density)
+    group = list(biomf.ids()[:args.group_size])
+    print("Table: {} OTUs x {} samples, {} nonzero".format(args.otus, args.samples,
+                                                          biomf.nnz))
+
+    new, new_t = timed(bc.raw_abundance, biomf, group, sample_abd=False)
+    old, old_t = timed(legacy_raw_abundance, biomf, group, sample_abd=False)
+    assert all(np.isclose(new[oid], old[oid]) for oid in old)
+    print("Per-OTU totals, {} samples".format(len(group)))
+    print("  legacy: {:.3f}s".format(old_t))
+    print("  sparse: {:.3f}s ({:.0f}x)".format(new_t, old_t / max(new_t, 1e-9)))
+
+    _, all_t = timed(bc.raw_abundance, biomf)
+    print("Per-sample totals, all {} samples".format(args.samples))
+    print("  sparse: {:.3f}s".format(all_t))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
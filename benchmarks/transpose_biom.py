@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+"""
+Abstract: Measure the run time and peak memory of transpose_biom.py's sparse engine
+          on a synthetic 5,000-sample table, for JSON and HDF5 input and output.
+          With --legacy, the original JSON-document implementation is timed too
+          (it is quadratic in the number of samples per category, so use a smaller
+          table for that comparison).
+"""
+from __future__ import print_function, division
+import os
+import sys
+import copy
+import json
+import time
+import random
+import shutil
+import resource
+import argparse
+import tempfile
+import multiprocessing as mp
+from collections import OrderedDict, defaultdict
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..",
+                                "bin"))
+import transpose_biom as tb
+from phylotoast.biom_io import BIOMFile
+try:
+    import numpy as np
+    from scipy import sparse
+    import h5py
+    import biom
+except ImportError as ie:
+    sys.exit("Please install missing module: {}.".format(ie))
+
+
+def synthetic_table(n_otus, n_samples, density, seed=0):
+    """
+    Build a random sparse OTU table with integer counts and taxonomy metadata.
+    """
+    data = sparse.random(n_otus, n_samples, density=density, format="csc",
+                         random_state=seed)
+    data.data = np.ceil(data.data * 100)
+    otuIDs = ["OTU_{}".format(i) for i in range(n_otus)]
+    sampleIDs = ["S{}".format(i) for i in range(n_samples)]
+    md = [{"taxonomy": ["k__Bacteria", "p__P{}".format(i % 20), "c__", "o__", "f__",
+                        "g__G{}".format(i % 500), "s__"]} for i in range(n_otus)]
+    return biom.Table(data, otuIDs, sampleIDs, observation_metadata=md)
+
+
+def legacy_transpose(biom_fp, mapping, category_id, out_fp):
+    """
+    The original implementation, working on the parsed BIOM 1.0 JSON document.
+    """
+    with open(biom_fp) as bF:
+        doc = json.load(bF)
+    values = {mapping[sid][category_id] for sid in mapping}
+    biom_copies = {value: copy.deepcopy(doc) for value in values}
+    split_samples = defaultdict(list)
+    for i, col in enumerate(doc["columns"]):
+        split_samples[mapping[col["id"]][category_id]].append((i, col))
+    for cat_val in biom_copies:
+        biom_copies[cat_val]["data"] = []
+        biom_copies[cat_val]["rows"], biom_copies[cat_val]["columns"] = \
+            [item[1] for item in split_samples[cat_val]], biom_copies[cat_val]["rows"]
+        sample_ids = [item[0] for item in split_samples[cat_val]]
+        for i in range(len(doc["data"])):
+            if doc["data"][i][1] in sample_ids:
+                row, col, amt = doc["data"][i]
+                biom_copies[cat_val]["data"].append([sample_ids.index(col), row, amt])
+        biom_copies[cat_val]["shape"] = [len(biom_copies[cat_val]["rows"]),
+                                         len(biom_copies[cat_val]["columns"])]
+        with open("{}_{}.biom".format(out_fp, cat_val), "w") as outF:
+            outF.write(json.dumps(biom_copies[cat_val]))
+
+
+def sparse_transpose(biom_fp, mapping, category_id, out_fp, output_format):
+    write = tb.write_hdf5 if output_format == "hdf5" else tb.write_json
+    with BIOMFile(biom_fp) as bf:
+        attrs = bf.attrs()
+        observations = bf.entries("observation")
+        for cat_val, samples, mtx in tb.transpose_split(bf, mapping, category_id):
+            write("{}_{}.biom".format(out_fp, cat_val), attrs, samples, observations,
+                  mtx)
+
+
+def run(name, args, out_q):
+    """
+    Run one implementation in a fresh process and report the elapsed time and the
+    growth in peak resident memory.
+    """
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.time()
+    if name == "legacy":
+        legacy_transpose(*args)
+    else:
+        sparse_transpose(*args)
+    elapsed = time.time() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    out_q.put((elapsed, (peak_rss - base_rss) / 1024))
+
+
+def handle_program_options():
+    parser = argparse.ArgumentParser(description="Benchmark transpose_biom.py on a "
+                                     "synthetic OTU table.")
+    parser.add_argument("--otus", type=int, default=20000,
+                        help="Number of OTUs in the synthetic table.")
+    parser.add_argument("--samples", type=int, default=5000,
+                        help="Number of samples in the synthetic table.")
+    parser.add_argument("--density", type=float, default=0.01,
+                        help="Fraction of nonzero OTU x sample cells.")
+    parser.add_argument("--categories", type=int, default=4,
+                        help="Number of values in the mapping category.")
+    parser.add_argument("--legacy", action="store_true",
+                        help="Also time the original JSON implementation.")
+    return parser.parse_args()
+
+
+def main():
+    args = handle_program_options()
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        table = synthetic_table(args.otus, args.samples, args.density)
+        json_fp = os.path.join(tmp_dir, "table.json.biom")
+        hdf5_fp = os.path.join(tmp_dir, "table.hdf5.biom")
+        with open(json_fp, "w") as outF:
+            outF.write(table.to_json("benchmark"))
+        with h5py.File(hdf5_fp, "w") as h5:
+            table.to_hdf5(h5, "benchmark")
+
+        rand = random.Random(0)
+        mapping = OrderedDict((sid, [sid, "C{}".format(rand.randrange(args.categories))])
+                              for sid in table.ids())
+        print("Table: {} OTUs x {} samples, {} nonzero; JSON {:.1f} MB, HDF5 {:.1f} MB"
+              .format(args.otus, args.samples, table.nnz,
+                      os.path.getsize(json_fp) / 1024 ** 2,
+                      os.path.getsize(hdf5_fp) / 1024 ** 2))
+        print("{:<22}{:>10}{:>16}".format("engine", "time (s)", "peak RSS (MB)"))
+        runs = [("sparse json->json", (json_fp, mapping, 1,
+                                       os.path.join(tmp_dir, "jj"), "json")),
+                ("sparse hdf5->hdf5", (hdf5_fp, mapping, 1,
+                                       os.path.join(tmp_dir, "hh"), "hdf5")),
+                ("sparse hdf5->json", (hdf5_fp, mapping, 1,
+                                       os.path.join(tmp_dir, "hj"), "json"))]
+        if args.legacy:
+            runs.append(("legacy", (json_fp, mapping, 1, os.path.join(tmp_dir, "lg"))))
+        for label, run_args in runs:
+            out_q = mp.Queue()
+            proc = mp.Process(target=run, args=(label.split()[0], run_args, out_q))
+            proc.start()
+            elapsed, rss = out_q.get()
+            proc.join()
+            print("{:<22}{:>10.2f}{:>16.1f}".format(label, elapsed, rss))
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -238,8 +238,8 @@ def main():
             sys.exit(err_msg.format(ioe))
         # Get normalized relative abundances
         rel_abd = bc.relative_abundance(biomf)
-        rel_abd = bc.arcsine_sqrt_transform(rel_abd)
-        df_rel_abd = pd.DataFrame(rel_abd).T
+        rel_abd = bc.arcsine_sqrt_transform(rel_abd, inplace=True)
+        df_rel_abd = rel_abd.to_dataframe()
         df_rel_abd.insert(0, "Condition", [imap[sid][category_idx]
                                            for sid in df_rel_abd.index])
         if args.annotate_points:
@@ -138,8 +138,8 @@ def main():
 
     # Get normalized relative abundances
     rel_abd = bc.relative_abundance(biomf)
-    rel_abd = bc.arcsine_sqrt_transform(rel_abd)
-    abd_val = {abd for sid, v1 in rel_abd.items() for otuid, abd in v1.items() if abd > 0}
+    rel_abd = bc.arcsine_sqrt_transform(rel_abd, inplace=True)
+    abd_val = rel_abd.matrix.data[rel_abd.matrix.data > 0]
     bubble_range = np.linspace(min(abd_val), max(abd_val), num=5) * args.scale_by
     # Get abundance to the nearest 50
     bubble_range = [int(50 * round(float(abd)/50)) for abd in bubble_range[1:]]
@@ -158,7 +158,7 @@ def main():
         # Run LDA
         X_lda, y_lda, exp_var = run_LDA(uf_data)
     else:
-        df_rel_abd = pd.DataFrame(rel_abd).T
+        df_rel_abd = rel_abd.to_dataframe()
         df_rel_abd.insert(0, "Condition", [imap[sid][category_idx]
                                            for sid in df_rel_abd.index])
         sampleids = df_rel_abd.index
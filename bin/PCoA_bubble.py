@@ -159,7 +159,7 @@ def main():
     category_ids = util.gather_categories(imap, header, [args.group_by])
     color_map = util.color_mapping(imap, header, args.group_by, args.colors)
     rel_abd = bc.relative_abundance(biomtbl)
-    rel_abd = bc.arcsine_sqrt_transform(rel_abd)
+    rel_abd = bc.arcsine_sqrt_transform(rel_abd, inplace=True)
 
     # plot samples based on relative abundance of some OTU ID
     for otuid in otus:
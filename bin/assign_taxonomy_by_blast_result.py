@@ -12,13 +12,9 @@ methods (BLAST, RDP, RTAX)
 Author: Shareef Dabdoub
 '''
 import sys
-try:
-    from Bio import SeqIO
-except ImportError as ie:
-    sys.exit('Import Error. Please install missing module: {}'.format(ie))
 import argparse
-from Bio import SeqIO
 from phylotoast import util
+from phylotoast.fasta_index import FASTAIndex
 
 
 def handle_program_options():
@@ -54,7 +50,9 @@ def main():
 
     # input the ID to Taxonomy table and the rep set
     taxids = util.parse_taxonomy_table(args.id_to_taxonomy_fp)
-    rep_set = SeqIO.to_dict(SeqIO.parse(args.rep_set_fp, 'fasta'))
+    # only the sequence IDs are needed, so read them from the FASTA index
+    with FASTAIndex(args.rep_set_fp) as rep_set_idx:
+        rep_set = rep_set_idx.keys()
 
     # write out the assigned taxonomy file
     with open(args.assigned_taxonomy_fp, 'w') as outF:
@@ -9,43 +9,138 @@ in an input mapping file and write to a new file.
 '''
 import argparse
 import sys
-try:
-    from Bio import SeqIO
-except ImportError as ie:
-    sys.exit('Import Error. Please install missing module: {}'.format(ie))
-from Bio import SeqIO
-from Bio.Alphabet import generic_dna
 from phylotoast import util
 
-
-def gather_sequences(fastaFN, mapFN):
-    barcodes = [entry[1] for entry in util.parse_map_file(mapFN)[1].values()]
-    seqs = []
-    bcodelen = len(barcodes[0])
-    count = 0
-
-    for record in SeqIO.parse(fastaFN, "fasta", generic_dna):
+BASES = 'ACGTN'
+
+
+class BarcodeIndex(object):
+    """
+    A hash index of the barcodes, and optionally of every sequence one mismatch
+    (Hamming distance 1) away from a barcode. Sequences within one mismatch of
+    more than one barcode are left out of the index, since they cannot be
+    assigned unambiguously. Exact barcodes always take precedence over
+    mismatched ones, whatever their length.
+
+    :type barcodes: list
+    :param barcodes: The barcode sequences, which may differ in length.
+    :type allow_mismatch: bool
+    :param allow_mismatch: Also index the barcode neighbors with one mismatch.
+    """
+    def __init__(self, barcodes, allow_mismatch=False):
+        self.exact = set(bc.upper() for bc in barcodes if bc)
+        self.lengths = sorted(set(len(bc) for bc in self.exact), reverse=True)
+        self.neighbors = {}
+        if allow_mismatch:
+            ambiguous = set()
+            for bc in self.exact:
+                for i, base in enumerate(bc):
+                    for sub in BASES.replace(base, ''):
+                        neighbor = bc[:i] + sub + bc[i + 1:]
+                        if self.neighbors.get(neighbor, bc) != bc:
+                            ambiguous.add(neighbor)
+                        self.neighbors[neighbor] = bc
+            for neighbor in ambiguous | self.exact:
+                self.neighbors.pop(neighbor, None)
+
+    def __len__(self):
+        return len(self.exact) + len(self.neighbors)
+
+    def match(self, seq):
+        """
+        :type seq: str
+        :param seq: A sequence, starting with its barcode.
+
+        :rtype: str
+        :return: The barcode the sequence starts with, or None. Exact barcodes are
+                 tried first, then (if the index was built with allow_mismatch)
+                 barcodes with one mismatch; longer barcodes are tried first.
+        """
+        prefixes = [seq[:length].upper() for length in self.lengths]
+        for prefix in prefixes:
+            if prefix in self.exact:
+                return prefix
+        for prefix in prefixes:
+            bc = self.neighbors.get(prefix)
+            if bc is not None:
+                return bc
+        return None
+
+
+def iter_records(inF):
+    """
+    Read FASTA or QUAL records one at a time, keeping their lines as they are so
+    that they can be written back unchanged.
+
+    :type inF: file
+    :param inF: The open FASTA or QUAL file.
+
+    :rtype: generator
+    :return: The (record ID, list of lines including the header) of each record.
+    """
+    seqID = None
+    lines = []
+    for line in inF:
+        if line.startswith('>'):
+            if seqID is not None:
+                yield seqID, lines
+            seqID = line[1:].split(None, 1)[0] if line[1:].strip() else ''
+            lines = [line]
+        elif seqID is not None:
+            lines.append(line)
+    if seqID is not None:
+        yield seqID, lines
+
+
+def filter_sequences(fastaF, index, outF, qualF=None, out_qualF=None):
+    """
+    Walk the FASTA file, and the QUAL file in step with it, writing each record
+    whose sequence starts with an indexed barcode as soon as it is read. Neither
+    file is held in memory. The QUAL records must be in the same order as the
+    FASTA records, as written by the sequencer or QIIME.
+
+    :type fastaF: file
+    :param fastaF: The open input FASTA file.
+    :type index: BarcodeIndex
+    :param index: The barcodes to keep.
+    :type outF: file
+    :param outF: The open output FASTA file.
+    :type qualF: file
+    :param qualF: The open input QUAL file, if quality data is filtered too.
+    :type out_qualF: file
+    :param out_qualF: The open output QUAL file.
+
+    :rtype: tuple
+    :return: The number of sequences read, the number kept, and the number of
+             those kept with a mismatched barcode.
+    """
+    quals = iter_records(qualF) if qualF is not None else None
+    count = kept = corrected = 0
+    for seqID, lines in iter_records(fastaF):
         count += 1
-        if str(record.seq)[:bcodelen] in barcodes:
-            seqs.append(record)
-
-    return seqs, count
-
-
-def gather_quality_data(qualityFN, seqs):
-    quals = []
-    seqids = [seq.id for seq in seqs]
-    count = 0
-
-    inQualRecs = SeqIO.to_dict(SeqIO.parse(qualityFN, "qual"))
-    for recID in inQualRecs:
-        count += 1
-        if not count % 1000:
-            print count
-        if recID in seqids:
-            quals.append(inQualRecs[recID])
-
-    return quals
+        if quals is not None:
+            qualID, qual_lines = next(quals, (None, None))
+            if qualID != seqID:
+                raise ValueError('The FASTA and QUAL files are not in the same '
+                                 'order: found QUAL record {} for sequence {}.'
+                                 .format(qualID, seqID))
+        # only the start of the sequence is needed, which may span lines
+        seq = ''
+        for line in lines[1:]:
+            seq += line.strip()
+            if len(seq) >= index.lengths[0]:
+                break
+        bc = index.match(seq)
+        if bc is None:
+            continue
+        kept += 1
+        if seq[:len(bc)].upper() != bc:
+            corrected += 1
+        outF.writelines(lines)
+        if quals is not None:
+            out_qualF.writelines(qual_lines)
+
+    return count, kept, corrected
 
 
 def handle_program_options():
@@ -60,9 +155,14 @@ def handle_program_options():
     parser.add_argument('-q', '--quality_fn',
                         help="The quality data file. If you plan to use quality\
                               data with split_libraries.py, you have to filter \
-                              the quality data as well.")
+                              the quality data as well. Its records must be in \
+                              the same order as the sequence data file.")
     parser.add_argument('-o', '--output_prefix', default='filtered',
                         help="The prefix for the output filtered data")
+    parser.add_argument('-e', '--allow_mismatch', action='store_true',
+                        help="Also keep sequences whose barcode has one \
+                              mismatch (Hamming distance 1) to exactly one of \
+                              the mapping file barcodes.")
     parser.add_argument('-v', '--verbose', action='store_true')
 
     return parser.parse_args()
@@ -99,16 +199,32 @@ def main():
                 .format(ioe)
             )
 
-    seqs, count = gather_sequences(args.input_fasta_fn, args.mapping_fn)
-    SeqIO.write(seqs, args.output_prefix+'.fasta', 'fasta')
+    barcodes = [entry[1] for entry in util.parse_map_file(args.mapping_fn)[1].values()]
+    index = BarcodeIndex(barcodes, args.allow_mismatch)
+    if not index.lengths:
+        sys.exit('\nNo barcodes found in the mapping file.\n')
 
+    qualF = out_qualF = None
+    fastaF = util.file_handle(args.input_fasta_fn)
+    outF = open(args.output_prefix+'.fasta', 'w', 1048576)
     if args.quality_fn:
-        quals = gather_quality_data(args.quality_fn, seqs)
-        SeqIO.write(quals, args.output_prefix+'.qual', 'qual')
+        qualF = util.file_handle(args.quality_fn)
+        out_qualF = open(args.output_prefix+'.qual', 'w', 1048576)
+    try:
+        count, kept, corrected = filter_sequences(fastaF, index, outF, qualF,
+                                                  out_qualF)
+    except ValueError as ve:
+        sys.exit('\nError: {}\n'.format(ve))
+    finally:
+        for fh in (fastaF, outF, qualF, out_qualF):
+            if fh is not None:
+                fh.close()
 
     if args.verbose:
         print '%i sequences in input file.' % count
-        print '%i sequences filtered to output file.' % len(seqs)
+        print '%i sequences filtered to output file.' % kept
+        if args.allow_mismatch:
+            print '%i of them with a one-mismatch barcode.' % corrected
 
 
 if __name__ == '__main__':
@@ -8,8 +8,10 @@ Author: Shareef M Dabdoub
 '''
 import argparse
 import sys
-import json
 from collections import defaultdict
+from phylotoast import taxonomy as tx
+from phylotoast.biom_io import BIOMFile
+from phylotoast.rollup import TaxonomyRollup
 
 
 def levelData(counts, seqCount, level='g'):
@@ -24,24 +26,41 @@ def lookup(s, d):
     return s+': None'
 
 
-def summarize_taxa(biom):
+def rank_label(taxa, level):
     """
-    Given an abundance table, group the counts by every
-    taxonomic level.
+    Label an OTU at a level with the rank name alone, e.g. g__Streptococcus. The
+    last rank of a taxonomy is named as a species with the rank before it, e.g.
+    s__Streptococcus_mutans. Levels beyond the last rank are not counted.
     """
-    tamtcounts = defaultdict(int)
-    tot_seqs = 0.0
+    if level >= len(taxa):
+        return None
+    t = taxa[level]
+    if level == len(taxa) - 1 and len(t) > 3:
+        t = 's__'+taxa[level-1].split('_')[-1]+'_'+t.split('_')[-1]
+    return t
 
-    for row, col, amt in biom['data']:
-        tot_seqs += amt
-        rtax = biom['rows'][row]['metadata']['taxonomy']
-        for i, t in enumerate(rtax):
-            t = t.strip()
-            if i == len(rtax)-1 and len(t) > 3 and len(rtax[-1]) > 3:
-                t = 's__'+rtax[i-1].strip().split('_')[-1]+'_'+t.split('_')[-1]
-            tamtcounts[t] += amt
 
-    lvlData = {lvl: levelData(tamtcounts, tot_seqs, lvl) for lvl in ['k', 'p', 'c', 'o', 'f', 'g', 's']}
+def summarize_taxa(taxonomies, otu_totals):
+    """
+    Given the OTU taxonomies and total counts of an abundance table, group the
+    counts by every taxonomic level.
+
+    :type taxonomies: list
+    :param taxonomies: The taxonomy of each OTU, in table order.
+    :type otu_totals: numpy.ndarray
+    :param otu_totals: The total count of each OTU across all samples.
+    """
+    rollup = TaxonomyRollup(taxonomies, label=rank_label, pad=False)
+    tot_seqs = float(otu_totals.sum())
+
+    # counts are grouped by rank name, wherever the name occurs in a taxonomy
+    tamtcounts = defaultdict(float)
+    for lvl in tx.RANKS:
+        labels, totals = rollup.aggregate(otu_totals, lvl)
+        for label, total in zip(labels, totals):
+            tamtcounts[label] += total
+
+    lvlData = {lvl: levelData(tamtcounts, tot_seqs, lvl) for lvl in tx.RANKS}
 
     return tot_seqs, lvlData
 
@@ -95,8 +114,8 @@ def handle_program_options():
     parser = argparse.ArgumentParser(description="Print a taxonomic summary of \
                                      a given BIOM abundance table.")
     parser.add_argument('-i', '--otu_table', required=True,
-                        help="The biom-format file with OTU-Sample abundance \
-                              data.")
+                        help="The biom-format file (JSON or HDF5) with \
+                              OTU-Sample abundance data.")
     parser.add_argument('--oral_taxa', action='store_true',
                         help="If specified, print an additional summary of taxa \
                               important to the oral microbiome (color complexes).")
@@ -116,15 +135,15 @@ def main():
             .format(ioe)
         )
 
-    with open(args.otu_table, 'rU') as bF:
-        biom = json.load(bF)
-        tot_seqs, lvlData = summarize_taxa(biom)
+    # only the taxonomy metadata and count data are read from HDF5 files
+    with BIOMFile(args.otu_table) as bF:
+        tot_seqs, lvlData = summarize_taxa(bF.metadata('taxonomy'), bF.totals())
 
-        # print summaries
-        general_taxon_summary(lvlData, tot_seqs)
+    # print summaries
+    general_taxon_summary(lvlData, tot_seqs)
 
-        if args.oral_taxa:
-            oral_taxon_summary(lvlData)
+    if args.oral_taxa:
+        oral_taxon_summary(lvlData)
 
 
 if __name__ == '__main__':
@@ -3,10 +3,55 @@
 Created on Feb 25, 2013
 
 Author: Shareef Dabdoub
+
+Run the three steps of the OTU condensing pipeline (otu_condense.py,
+filter_rep_set.py and pick_otus_condense.py) in a single process, passing the
+pruned taxonomy and non-unique OTU matrix between the steps in memory.
 '''
 import argparse
 import sys
-import subprocess
+import os.path as osp
+from phylotoast import util
+from phylotoast import condense as cd
+
+
+def condense_pipeline(taxF, rep_set_fn, otuF, level='s', intermediates_dir=None):
+    """
+    Chain the condensing steps. The pruned taxonomy from step 1 selects the rep set
+    records (step 2) and its non-unique OTU matrix condenses the pick OTUs results
+    (step 3) without being written to and re-read from disk.
+
+    :@type taxF: file
+    :@param taxF: The taxonomy file output by the assign_taxonomy script
+    :@type rep_set_fn: str
+    :@param rep_set_fn: Path to the set of representative sequences
+    :@type otuF: file
+    :@param otuF: The output file from QIIME's pick_otus.py
+    :@type level: str
+    :@param level: The phylogenetic level at which to condense OTUs
+    :@type intermediates_dir: str
+    :@param intermediates_dir: If given, also write the step 1 outputs
+                               (condensed_assigned_taxonomy.txt and
+                               nonunique_otu_matrix.txt) to this directory
+
+    :@rtype: generator
+    :@return: Yields the result of each step in turn: the (unique, non-unique)
+              taxonomy dicts, a generator of condensed rep set records and the
+              condensed OTU table. Each step runs only when its result is requested.
+    """
+    uniqueTax, nonuniqueTax = cd.prune_taxonomy(taxF, level)
+    if intermediates_dir is not None:
+        with open(osp.join(intermediates_dir,
+                           'condensed_assigned_taxonomy.txt'), 'w') as outF:
+            cd.write_condensed_taxonomy(uniqueTax, outF)
+        with open(osp.join(intermediates_dir, 'nonunique_otu_matrix.txt'),
+                  'w') as outF:
+            cd.write_nonunique_matrix(nonuniqueTax, outF)
+    yield uniqueTax, nonuniqueTax
+
+    yield cd.iter_rep_set(rep_set_fn, uniqueTax)
+
+    yield cd.condense_otu_map(otuF, nonuniqueTax)
 
 
 def handle_program_options():
@@ -27,6 +72,15 @@ def handle_program_options():
                         help="Set the phylogenetic level at which to define \
                               OTUs for condensing and downstream processing.\
                               Defaults to species level.")
+    parser.add_argument('-o', '--output_dir', default='.',
+                        help="The directory the condensed rep set \
+                              (condensed_rep_set.fna) and pick otus results \
+                              (condensed_seqs_otus.txt) are written to. \
+                              Defaults to the current directory.")
+    parser.add_argument('-k', '--keep_intermediates', action='store_true',
+                        help="Also write the intermediate files \
+                              condensed_assigned_taxonomy.txt and \
+                              nonunique_otu_matrix.txt to the output directory.")
     parser.add_argument('-v', '--verbose', action='store_true')
 
     return parser.parse_args()
@@ -44,39 +98,38 @@ def main():
             .format(ioe)
         )
 
-    output = []
-
-    if args.verbose:
-        print "Condensing OTUs:\n"
-
-        print "Step 1: Condensing assigned taxonomy file...\n"
-    output.append(subprocess.check_output(['otu_condense.py',
-                                           '-i', args.assigned_taxonomy_fn,
-                                           '-l', args.phylogenetic_level,
-                                           '-v']))
-    if args.verbose:
-        print "output:\n"
-        print output[0]
-
-        print "Step 2: Condensing representative set...\n"
-    output.append(subprocess.check_output(['filter_rep_set.py',
-                                           '-r', args.rep_set_fn,
-                                           '-u',
-                                           'condensed_assigned_taxonomy.txt',
-                                           '-v']))
-    if args.verbose:
-        print "output:\n"
-        print output[1]
-
-        print "Step 3: Condensing pick otus output file...\n"
-    output.append(subprocess.check_output(['pick_otus_condense.py',
-                                           '-s', args.seqs_otus_fn,
-                                           '-n', 'nonunique_otu_matrix.txt',
-                                           '-v']))
-
-    if args.verbose:
-        print "output:\n"
-        print output[2]
+    util.ensure_dir(args.output_dir)
+    intermediates_dir = args.output_dir if args.keep_intermediates else None
+
+    with open(args.assigned_taxonomy_fn, 'rU') as taxF, \
+            open(args.seqs_otus_fn, 'rU') as otuF:
+        steps = condense_pipeline(taxF, args.rep_set_fn, otuF,
+                                  args.phylogenetic_level, intermediates_dir)
+
+        if args.verbose:
+            print "Condensing OTUs:\n"
+            print "Step 1: Condensing assigned taxonomy file...\n"
+        uniqueTax, nonuniqueTax = steps.next()
+        if args.verbose:
+            nuID_count = sum(len(nuIDs) for nuIDs in nonuniqueTax.itervalues())
+            print '%i total original OTUs' % (len(uniqueTax) + nuID_count)
+            print '%i unique OTUs discovered' % len(uniqueTax)
+            print '%i non-unique OTU records eliminated\n' % nuID_count
+
+            print "Step 2: Condensing representative set...\n"
+        rep_set_out = osp.join(args.output_dir, 'condensed_rep_set.fna')
+        with open(rep_set_out, 'w') as outF:
+            count = cd.write_rep_set(steps.next(), outF)
+        if args.verbose:
+            print '%i sequences associated with unique OTUs' % count
+            print 'Output written to: %s\n' % rep_set_out
+
+            print "Step 3: Condensing pick otus output file...\n"
+        seqs_otus_out = osp.join(args.output_dir, 'condensed_seqs_otus.txt')
+        with open(seqs_otus_out, 'w') as outF:
+            cd.write_condensed_otus(steps.next(), outF)
+        if args.verbose:
+            print 'Output written to {}'.format(seqs_otus_out)
 
 
 if __name__ == '__main__':
@@ -7,21 +7,16 @@ import csv
 import argparse
 import os.path as osp
 from itertools import izip_longest
-from collections import defaultdict
-from phylotoast import graph_util as gu, util as putil
+from collections import defaultdict, OrderedDict
+from phylotoast import alpha_diversity as ad, diversity_stats as ds, graph_util as gu
+from phylotoast import rarefaction as rf, util as putil
+from phylotoast.biom_io import BIOMFile
+from phylotoast.result_cache import DEFAULT_CACHE_DIR, ResultCache, table_digest
 importerrors = []
-try:
-    import biom
-except ImportError as ie:
-    importerrors.append(ie)
 try:
     import scipy.stats as stats
 except ImportError as ie:
     importerrors.append(ie)
-try:
-    from skbio.diversity import alpha
-except ImportError as ie:
-    importerrors.append(ie)
 try:
     from matplotlib import pyplot as plt, gridspec
 except ImportError as ie:
@@ -32,44 +27,99 @@ if len(importerrors) != 0:
     sys.exit()
 
 
-def gather_samples(biomT):
-    return {sid: biomT.data(sid).astype(int) for sid in biomT.ids()}
+def calc_diversity(method, parsed_mapf, counts, sample_ids, cats, cats_index,
+                   processes=1, cache=None, digest=None):
+    """
+    Calculate an alpha diversity metric for all samples at once and group the
+    results by mapping category value.
+
+    :type method: str or function
+    :param method: A metric name from alpha_diversity.available_metrics(), or a
+                   function of the count vector of one sample.
+    :type counts: scipy.sparse.csr_matrix, list or function
+    :param counts: Sample x OTU counts in the order of sample_ids, or a list of such
+                   matrices (e.g. rarefied tables), over which each sample's
+                   diversity is averaged. May also be a function returning either,
+                   which is only called if the values are not cached.
+    :type processes: int
+    :param processes: Worker processes for metrics that are not vectorized.
+    :type cache: phylotoast.result_cache.ResultCache
+    :param cache: If given, the per-sample values of a named metric are read from
+                  or stored to this cache, under the table digest.
+    :type digest: str
+    :param digest: The result_cache.table_digest() of sample_ids and counts.
+
+    :rtype: tuple
+    :return: {category value: {sample ID: diversity}} and the sample IDs.
+             Category values without any samples are left out.
+    """
+    values = None
+    use_cache = cache is not None and isinstance(method, basestring)
+    if use_cache:
+        values = cache.get(digest, method)
+    if values is None:
+        if callable(counts):
+            counts = counts()
+        tables = counts if isinstance(counts, list) else [counts]
+        values = sum(ad.alpha_diversity(table, method, processes)
+                     for table in tables) / len(tables)
+        if use_cache:
+            cache.put(digest, method, values)
+    div_calc = {cat: {} for cat in cats}
+    for sid, value in zip(sample_ids, values):
+        if sid in parsed_mapf:
+            div_calc[parsed_mapf[sid][cats_index]][sid] = value
 
+    return {cat: d for cat, d in div_calc.iteritems() if d}, sample_ids
 
-def calc_diversity(method, parsed_mapf, biom, cats, cats_index):
-    counts = {cat: [] for cat in cats}
-    sample_ids = []
 
-    for sid, sample_counts in gather_samples(biom).items():
-        sample_ids.append(sid)
-        if sid in parsed_mapf:
-            counts[parsed_mapf[sid][cats_index]].append((sid, sample_counts))
+def rarefied_counts(counts, sample_ids, depth, iterations, processes=1, seed=None):
+    """
+    Defer rarefaction until the rarefied tables are needed, so that cached results
+    do not pay for it.
 
-    div_calc = {cat: {count[0]: method(count[1]) for count in counts}
-                for cat, counts in counts.items()}
+    :rtype: function
+    :return: A function that rarefies the table on its first call and returns the
+             list of rarefied count matrices on every call.
+    """
+    tables = []
 
-    return div_calc, sample_ids
+    def rarefy():
+        if not tables:
+            tables.extend(table.counts for table in rf.rarefy(
+                counts, sample_ids, [depth], iterations, processes, seed))
+        return tables
+    return rarefy
 
 
-def print_MannWhitneyU(div_calc):
-    """
-    Compute the Mann-Whitney U test for unequal group sample sizes.
+def print_MannWhitneyU(diversities, processes=1, correction="fdr_bh", out_fp=None,
+                       permutations=0, seed=None):
     """
-    try:
-        x = div_calc.values()[0].values()
-        y = div_calc.values()[1].values()
-    except:
-        return "Error setting up input arrays for Mann-Whitney U Test. Skipping "\
-               "significance testing."
-    T, p = stats.mannwhitneyu(x, y)
-    print "\nMann-Whitney U test statistic:", T
-    print "Two-tailed p-value: {}".format(2 * p)
+    Compute the two-sided Mann-Whitney U test for every pair of groups and every
+    diversity metric, and print the results as a single table. If permutations is
+    nonzero, the p-values are estimated by permuting the group labels.
 
-
-def print_KruskalWallisH(div_calc):
+    :type diversities: OrderedDict
+    :param diversities: {metric label: calc_diversity results}
+    """
+    results = ds.pairwise_mannwhitney(
+        OrderedDict((label, {grp: d.values() for grp, d in div_calc.iteritems()})
+                    for label, div_calc in diversities.iteritems()),
+        processes, correction, permutations, seed)
+    method = "{} permutations".format(permutations) if permutations else "normal approx."
+    print "\nPairwise Mann-Whitney U tests ({}, {} correction):".format(method,
+                                                                       correction)
+    ds.write_results(results, sys.stdout)
+    if out_fp is not None:
+        with open(out_fp, "w") as outF:
+            ds.write_results(results, outF)
+
+
+def print_KruskalWallisH(div_calc, permutations=0, seed=None):
     """
     Compute the Kruskal-Wallis H-test for independent samples. A typical rule is that
-    each group must have at least 5 measurements.
+    each group must have at least 5 measurements, unless the p-value is estimated by
+    permuting the group labels (permutations > 0).
     """
     calc = defaultdict(list)
     try:
@@ -79,9 +129,20 @@ def print_KruskalWallisH(div_calc):
     except:
         return "Error setting up input arrays for Kruskal-Wallis H-Test. Skipping "\
                "significance testing."
-    h, p = stats.kruskal(*calc.values())
-    print "\nKruskal-Wallis H-test statistic for {} groups: {}".format(str(len(div_calc)), h)
-    print "p-value: {}".format(p)
+    calc = {k: v for k, v in calc.iteritems() if v}
+    if len(calc) < 2:
+        print "\nKruskal-Wallis H-test requires at least two non-empty groups. "\
+              "Skipping significance testing."
+        return
+    if permutations:
+        h, p = ds.permutation_test(calc.values(), permutations, seed)
+    else:
+        h, p = stats.kruskal(*calc.values())
+    print "\nKruskal-Wallis H-test statistic for {} groups: {}".format(str(len(calc)), h)
+    if permutations:
+        print "Permutation p-value ({} permutations): {}".format(permutations, p)
+    else:
+        print "p-value: {}".format(p)
 
 
 def plot_group_diversity(diversities, grp_colors, title, diversity_type, out_dir, plot_ext):
@@ -139,6 +200,27 @@ def handle_program_options():
                              The full list of metrics is available at:\
                              http://scikit-bio.org/docs/latest/generated/skbio.diversity.alpha.html.\
                              Beta diversity metrics will be supported in the future.")
+    parser.add_argument("-p", "--processes", type=int, default=1,
+                        help="The number of processes used to calculate metrics that\
+                              are not vectorized, one sample at a time. Default: 1.")
+    parser.add_argument("--rarefaction_depth", type=int,
+                        help="Rarefy the table to this many counts per sample before\
+                              calculating diversity. Samples with fewer counts are\
+                              left out, and each metric is averaged over the\
+                              rarefied tables (see --iterations).")
+    parser.add_argument("--iterations", type=int, default=10,
+                        help="The number of rarefied tables. Default: 10.")
+    parser.add_argument("--cache_dir", default=DEFAULT_CACHE_DIR,
+                        help="Directory where calculated diversity values are cached,\
+                              keyed on the content of the BIOM table and the metric,\
+                              so that re-running with different plotting options\
+                              skips the calculations. Default: %(default)s")
+    parser.add_argument("--cache_size", type=int, default=256,
+                        help="Maximum size of the cache in MB. The least recently\
+                              used results are removed beyond it. Default: 256.")
+    parser.add_argument("--no_cache", action="store_true",
+                        help="Always calculate the diversity metrics, without\
+                              reading or writing the cache.")
     parser.add_argument("--x_label", default=[None], nargs="+",
                         help="The name of the diversity metric to be displayed on the\
                         plot as the X-axis label. If multiple metrics are specified,\
@@ -161,6 +243,21 @@ def handle_program_options():
                         "diversity metrics.")
     parser.add_argument("--suppress_stats", action="store_true", help="Do not display "
                         "significance testing results which are shown by default.")
+    parser.add_argument("--correction", default="fdr_bh", choices=ds.CORRECTIONS,
+                        help="Multiple testing correction applied to the p-values of\
+                              all pairwise Mann-Whitney U tests. Default: fdr_bh\
+                              (Benjamini-Hochberg).")
+    parser.add_argument("--permutations", type=int, default=0,
+                        help="Estimate the significance testing p-values from this\
+                              many random permutations of the group labels, instead\
+                              of the normal/chi-squared approximations. Recommended\
+                              for small groups, e.g. 9999. Default: 0 (off).")
+    parser.add_argument("--seed", type=int,
+                        help="Seed for the random permutations and rarefaction,\
+                              to make the results reproducible.")
+    parser.add_argument("--stats_output",
+                        help="Path of a tab-separated file to write the pairwise\
+                              significance testing results to.")
     parser.add_argument("--show_available_metrics", action="store_true",
                         help="Supply this parameter to see which alpha diversity metrics "
                              " are available for usage. No calculations will be performed"
@@ -171,11 +268,7 @@ def handle_program_options():
 def main():
     args = handle_program_options()
 
-    metrics = [m for m in alpha.__all__ if "_ci" not in m]
-    try:
-        metrics.remove("faith_pd")
-    except ValueError:
-        pass
+    metrics = ad.available_metrics()
     if args.show_available_metrics:
         print "\nAvailable alpha diversity metrics:"
         return "\n".join(metrics)
@@ -193,13 +286,42 @@ def main():
             err_msg = "\nError while processing the mapping file: {}\n"
             sys.exit(err_msg.format(ioe))
 
-    # parse BIOM table
+    # read the sample x OTU counts from the BIOM table
     try:
-        biom_tbl = biom.load_table(args.biom_fp)
+        with BIOMFile(args.biom_fp) as bf:
+            sample_ids = bf.ids("sample")
+            counts = bf.matrix("sample")
     except Exception as ioe:
         err_msg = "\nError loading BIOM table file: {}\n"
         sys.exit(err_msg.format(ioe))
 
+    # unseeded rarefaction gives different tables on each run, so is not cached
+    cache = digest = None
+    if not args.no_cache and (not args.rarefaction_depth or args.seed is not None):
+        try:
+            cache = ResultCache(args.cache_dir, args.cache_size * 1024 ** 2)
+        except OSError as oe:
+            sys.exit("\nError creating the cache directory: {}\n".format(oe))
+        digest = table_digest(sample_ids, counts)
+        if args.rarefaction_depth:
+            digest += "_rarefied_{}x{}_seed{}".format(args.rarefaction_depth,
+                                                      args.iterations, args.seed)
+
+    if args.rarefaction_depth:
+        if args.rarefaction_depth < 0:
+            sys.exit("The rarefaction depth must not be negative.")
+        if args.iterations < 1:
+            sys.exit("The number of rarefaction iterations must be at least 1.")
+        # the rarefied samples follow from the totals; the tables are only drawn if
+        # a metric is not cached
+        totals = counts.sum(axis=1).A.ravel()
+        counts = rarefied_counts(counts, sample_ids, args.rarefaction_depth,
+                                 args.iterations, args.processes, args.seed)
+        sample_ids = [sid for sid, total in zip(sample_ids, totals)
+                      if total >= args.rarefaction_depth]
+        if not sample_ids:
+            sys.exit("No samples have at least {} counts.".format(args.rarefaction_depth))
+
     # group samples by category
     if args.category not in header:
         sys.exit("Category '{}' not found".format(args.category))
@@ -211,33 +333,35 @@ def main():
     colors = putil.color_mapping(sample_map, header, args.category, args.color_by)
 
     # Perform diversity calculations and density plotting
+    diversities = OrderedDict()
     for method, x_label in izip_longest(args.diversity, args.x_label):
         if x_label is None:
             x_label = method.title()
-        if method not in alpha.__all__:
+        if method not in metrics:
             sys.exit("ERROR: Diversity metric not found: {}.".format(method))
-        elif method in alpha.__all__ and method not in metrics:
-            sys.exit("Currently, PhyloToAST does not support {} metric.".format(method))
-        metric = eval("alpha."+method)
-        div_calc, sample_ids = calc_diversity(metric, sample_map, biom_tbl,
-                                              cat_vals, cat_idx)
+        div_calc, sample_ids = calc_diversity(method, sample_map, counts, sample_ids,
+                                              cat_vals, cat_idx, args.processes,
+                                              cache, digest)
 
         if args.save_calculations:
             write_diversity_metrics(div_calc, sample_ids, args.save_calculations)
 
         plot_group_diversity(div_calc, colors, plot_title, x_label, args.output_dir,
                              args.image_type)
-
-        # calculate and print significance testing results
-        if not args.suppress_stats:
-            print "Diversity significance testing: {}".format(x_label)
-            if len(cat_vals) == 2:
-                print_MannWhitneyU(div_calc)
-            elif len(cat_vals) > 2:
-                print_KruskalWallisH(div_calc)
-            print
-        else:
-            continue
+        diversities[x_label] = div_calc
+
+    # calculate and print significance testing results
+    if not args.suppress_stats:
+        # categories without samples are left out of the tests
+        num_groups = len(div_calc) if diversities else 0
+        if num_groups > 2:
+            for x_label, div_calc in diversities.iteritems():
+                print "Diversity significance testing: {}".format(x_label)
+                print_KruskalWallisH(div_calc, args.permutations, args.seed)
+                print
+        if num_groups >= 2:
+            print_MannWhitneyU(diversities, args.processes, args.correction,
+                               args.stats_output, args.permutations, args.seed)
 
 
 if __name__ == "__main__":
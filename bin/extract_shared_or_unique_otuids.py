@@ -7,8 +7,12 @@ import sys
 import argparse
 import os.path as osp
 from itertools import combinations
-from collections import defaultdict
 from phylotoast import otu_calc as oc, util
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError as ie:
+    sys.exit("Please install missing module: {}.".format(ie))
 try:
     import biom
 except ImportError as ie:
@@ -19,77 +23,122 @@ except ImportError as ie:
     sys.exit("Please install missing module: {}.".format(ie))
 
 
-def sample_group(sid, groups):
+def group_membership(biomf, groups):
     """
-    Iterate through all categories in an OrderedDict and return category name if SampleID
-    present in that category.
+    Determine the OTUIDs present in each category with a single sparse product of the
+    OTU x Sample presence matrix and a Sample x Category indicator matrix.
 
-    :type sid: str
-    :param sid: SampleID from dataset.
+    :type biomf: biom.table.Table
+    :param biomf: BIOM table object from the biom-format library.
 
     :type groups: OrderedDict
     :param groups: Returned dict from phylotoast.util.gather_categories() function.
 
-    :return type: str
-    :return: Category name used to classify `sid`.
+    :return type: numpy.ndarray
+    :return: Boolean OTU x Category matrix. Rows follow biomf.ids("observation") and
+             columns follow the iteration order of groups.
+    """
+    presence = oc.otu_presence(biomf).astype(float)
+    columns = {sid: i for i, sid in enumerate(biomf.ids())}
+    rows, cols = [], []
+    for g, name in enumerate(groups):
+        for sid in groups[name].sids:
+            if sid in columns:
+                rows.append(columns[sid])
+                cols.append(g)
+    indicator = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)),
+                                  shape=(len(columns), len(groups)))
+    return (presence * indicator).toarray() > 0
+
+
+def membership_signatures(membership, otuids):
     """
-    for name in groups:
-        if sid in groups[name].sids:
-            return name
+    Group OTUs by their pattern of category membership, so that every OTU sharing the
+    same pattern is handled at once.
 
+    :type membership: numpy.ndarray
+    :param membership: Boolean OTU x Category matrix from group_membership().
 
-def combine_sets(*sets):
-    """
-    Combine multiple sets to create a single larger set.
+    :type otuids: numpy.ndarray
+    :param otuids: OTUIDs in the same order as the rows of membership.
+
+    :return type: tuple
+    :return: Boolean Pattern x Category matrix of the distinct membership patterns,
+             and a list holding the array of OTUIDs with each pattern.
     """
-    combined = set()
-    for s in sets:
-        combined.update(s)
-    return combined
+    packed = np.ascontiguousarray(np.packbits(membership, axis=1))
+    keys = packed.view(np.dtype((np.void, packed.shape[1]))).ravel()
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    order = np.argsort(inverse, kind="mergesort")
+    splits = np.cumsum(np.bincount(inverse, minlength=len(first)))[:-1]
+    return membership[first], np.split(otuids[order], splits)
 
 
-def unique_otuids(groups):
+def unique_otuids(membership, otuids, names):
     """
-    Get unique OTUIDs of each category.
+    Get unique OTUIDs of each category, i.e. the OTUs found in exactly one category.
+
+    :type membership: numpy.ndarray
+    :param membership: Boolean OTU x Category matrix from group_membership().
 
-    :type groups: Dict
-    :param groups: {Category name: OTUIDs in category}
+    :type otuids: numpy.ndarray
+    :param otuids: OTUIDs in the same order as the rows of membership.
+
+    :type names: list
+    :param names: Category names in the same order as the columns of membership.
 
     :return type: dict
     :return: Dict keyed on category name and unique OTUIDs as values.
     """
-    uniques = {key: set() for key in groups}
-    for i, group in enumerate(groups):
-        to_combine = groups.values()[:i]+groups.values()[i+1:]
-        combined = combine_sets(*to_combine)
-        uniques[group] = groups[group].difference(combined)
-    return uniques
+    single = membership.sum(axis=1) == 1
+    return {name: set(otuids[single & membership[:, g]])
+            for g, name in enumerate(names)}
 
 
-def shared_otuids(groups):
+def shared_otuids(membership, otuids, names, max_size=None, exact=False):
     """
     Get shared OTUIDs between all unique combinations of groups.
 
-    :type groups: Dict
-    :param groups: {Category name: OTUIDs in category}
+    :type membership: numpy.ndarray
+    :param membership: Boolean OTU x Category matrix from group_membership().
+
+    :type otuids: numpy.ndarray
+    :param otuids: OTUIDs in the same order as the rows of membership.
+
+    :type names: list
+    :param names: Category names in the same order as the columns of membership.
+
+    :type max_size: int
+    :param max_size: Largest number of groups in a combination. By default, all
+                     combination sizes are computed.
+
+    :type exact: bool
+    :param exact: If True, report for each combination only the OTUs found in exactly
+                  those groups and no others. Only the combinations that share at least
+                  one OTU are reported.
 
     :return type: dict
     :return: Dict keyed on group combination and their shared OTUIDs as values.
     """
-    for g in sorted(groups):
-        print("Number of OTUs in {0}: {1}".format(g, len(groups[g].results["otuids"])))
-    number_of_categories = len(groups)
-    shared = defaultdict()
-    for i in range(2, number_of_categories+1):
-        for j in combinations(sorted(groups), i):
-            combo_name = " & ".join(list(j))
-            for grp in j:
-                # initialize combo values
-                shared[combo_name] = groups[j[0]].results["otuids"].copy()
-                """iterate through all groups and keep updating combo OTUIDs with set
-                intersection_update"""
-                for grp in j[1:]:
-                    shared[combo_name].intersection_update(groups[grp].results["otuids"])
+    if max_size is None:
+        max_size = len(names)
+    ordered = sorted(range(len(names)), key=lambda g: names[g])
+    patterns, pattern_otus = membership_signatures(membership, otuids)
+    shared = {}
+
+    if exact:
+        sizes = patterns.sum(axis=1)
+        for p in np.flatnonzero((sizes >= 2) & (sizes <= max_size)):
+            combo_name = " & ".join(names[g] for g in ordered if patterns[p, g])
+            shared[combo_name] = set(pattern_otus[p])
+        return shared
+
+    for i in range(2, max_size+1):
+        for combo in combinations(ordered, i):
+            combo_name = " & ".join(names[g] for g in combo)
+            shared[combo_name] = set()
+            for p in np.flatnonzero(patterns[:, list(combo)].all(axis=1)):
+                shared[combo_name].update(pattern_otus[p])
     return shared
 
 
@@ -135,6 +184,13 @@ def handle_program_options():
     parser.add_argument("-r", "--reverse",
                         help="Get shared OTUIDs among all unique combinations of groups "
                              "and write out the results to path provided to this option.")
+    parser.add_argument("-n", "--max_combination_size", type=int, default=None,
+                        help="Largest number of groups to combine when calculating "
+                             "shared OTUIDs. By default, all combinations are computed.")
+    parser.add_argument("--exact", action="store_true",
+                        help="For shared OTUIDs, report only the OTUs found in exactly "
+                             "the combined groups and no others, and only for the "
+                             "combinations that share at least one OTU.")
     return parser.parse_args()
 
 
@@ -148,9 +204,6 @@ def main():
         sys.exit("The data in the path does not appear to be a BIOM format table. "
                  "Error: {}.".format(te))
 
-    # Determine OTUIDs present in each sample
-    sample_otus = oc.assign_otu_membership(biomf)
-
     try:
         # Parse mapping file
         header, imap = util.parse_map_file(args.mapping_file)
@@ -160,25 +213,22 @@ def main():
     # Get relevant category information
     group_data = util.gather_categories(imap, header, [args.category_column])
 
-    # Initialize results dict in group_data with {"otuids": set()} for each category
-    for group in group_data:
-        group_data[group].results["otuids"] = set()
-
-    # Collect all OTUIDs present in each category
-    for sid in sample_otus:
-        group = sample_group(sid, group_data)
-        group_data[group].results["otuids"].update(sample_otus[sid])
+    # Determine OTUIDs present in each category
+    names = list(group_data)
+    otuids = biomf.ids("observation")
+    membership = group_membership(biomf, group_data)
+    for g in sorted(range(len(names)), key=lambda g: names[g]):
+        print("Number of OTUs in {0}: {1}".format(names[g], membership[:, g].sum()))
 
     if args.reverse:
         # Get shared OTUIDs
-        shared = shared_otuids(group_data)
+        shared = shared_otuids(membership, otuids, names, args.max_combination_size,
+                               args.exact)
         # Write out shared OTUIDs results
         shared_df = pd.DataFrame.from_dict(shared, orient="index").T
         shared_df.to_csv(args.reverse, sep="\t", index=False)
-    # Create input for unique_otus
-    group_otuids = {group: group_data[group].results["otuids"] for group in group_data}
     # Write out unique OTUIDs to file
-    write_uniques(args.output_dir, args.prefix, unique_otuids(group_otuids))
+    write_uniques(args.output_dir, args.prefix, unique_otuids(membership, otuids, names))
 
 if __name__ == "__main__":
     sys.exit(main())
@@ -4,41 +4,133 @@ Created on Dec 6, 2012
 Author: Shareef M. Dabdoub
 '''
 import sys
-try:
-    from Bio import SeqIO
-except ImportError as ie:
-    sys.exit('Import Error. Please install missing module: {}'.format(ie))
 import argparse
-from Bio import SeqIO
-from Bio.Seq import Seq
+import multiprocessing as mp
+from collections import deque
+from phylotoast import util
 
 
-def filter_ambiguity(records, percent=0.5):  # , repeats=6)
+def iter_blocks(inF, block_size=4194304):
+    """
+    Read a FASTA file in blocks of whole records, without parsing it.
+
+    :type inF: file
+    :param inF: The open FASTA file.
+    :type block_size: int
+    :param block_size: The approximate number of bytes in each block. Blocks are
+                       extended to the end of the last record they contain.
+
+    :rtype: generator
+    :return: Strings of one or more complete FASTA records.
+    """
+    leftover = ''
+    while True:
+        data = inF.read(block_size)
+        if not data:
+            break
+        buf = leftover + data
+        # split after the last complete record in the buffer
+        end = buf.rfind('\n>')
+        if end < 0:
+            leftover = buf
+            continue
+        leftover = buf[end + 1:]
+        yield buf[:end + 1]
+    if leftover:
+        yield leftover
+
+
+def filter_ambiguity(block, percent=0.5, repeats=0):
     """
     Filters out sequences with too much ambiguity as defined by the method
     parameters.
 
-    :type records: list
-    :param records: A list of sequences
-    :type repeats: int
-    :param repeats: Defines the number of repeated N that trigger truncating a
-                    sequence.
+    :type block: str
+    :param block: One or more complete FASTA records, as read by iter_blocks()
     :type percent: float
     :param percent: Defines the overall percentage of N in a sequence that
                      will cause the sequence to be filtered out.
+    :type repeats: int
+    :param repeats: Defines the number of repeated N that trigger truncating a
+                    sequence. 0 disables truncation.
+
+    :rtype: tuple
+    :return: The kept records as FASTA text (one sequence line per record), the
+             number of records read and the number of records kept.
     """
-    seqs = []
-    # Ns = ''.join(['N' for _ in range(repeats)])
+    out = []
     count = 0
-    for record in records:
-        if record.seq.count('N')/float(len(record)) < percent:
-#            pos = record.seq.find(Ns)
-#            if pos >= 0:
-#                record.seq = Seq(str(record.seq)[:pos])
-            seqs.append(record)
+    Ns = 'N' * repeats
+    if block.startswith('>'):
+        block = block[1:]
+    for record in block.split('\n>'):
+        header, _, seq = record.partition('\n')
+        if not header and not seq:
+            continue
         count += 1
+        seq = seq.translate(None, ' \t\r\n')
+        if seq and seq.count('N')/float(len(seq)) < percent:
+            if repeats:
+                pos = seq.find(Ns)
+                if pos >= 0:
+                    seq = seq[:pos]
+            out.append('>{}\n{}\n'.format(header.rstrip(), seq))
 
-    return seqs, count
+    return ''.join(out), count, len(out)
+
+
+def _filter_task(args):
+    return filter_ambiguity(*args)
+
+
+def filter_file(inF, outF, percent=0.5, repeats=0, processes=1,
+                block_size=4194304):
+    """
+    Stream a FASTA file through filter_ambiguity(), writing the kept records as
+    soon as each block is filtered. With more than one process, blocks are
+    filtered in a worker pool; at most two blocks per process are in flight, so
+    memory use does not depend on the file size.
+
+    :type inF: file
+    :param inF: The open input FASTA file.
+    :type outF: file
+    :param outF: The open output file.
+
+    :rtype: tuple
+    :return: The number of records read and kept.
+    """
+    count = kept = 0
+    blocks = iter_blocks(inF, block_size)
+    if processes <= 1:
+        results = (filter_ambiguity(block, percent, repeats) for block in blocks)
+        for out, n, k in results:
+            outF.write(out)
+            count += n
+            kept += k
+        return count, kept
+
+    pool = mp.Pool(processes)
+    try:
+        pending = deque()
+        for block in blocks:
+            pending.append(pool.apply_async(_filter_task,
+                                            ((block, percent, repeats),)))
+            while len(pending) >= 2 * processes or \
+                    (pending and pending[0].ready()):
+                out, n, k = pending.popleft().get()
+                outF.write(out)
+                count += n
+                kept += k
+        while pending:
+            out, n, k = pending.popleft().get()
+            outF.write(out)
+            count += n
+            kept += k
+    finally:
+        pool.close()
+        pool.join()
+
+    return count, kept
 
 
 def handle_program_options():
@@ -55,21 +147,24 @@ def handle_program_options():
                                                   based on ambiguous base (N) \
                                                   content.")
     parser.add_argument('--version', action='version',
-                        version='Sequence Ambiguity Filter v0.1')
-    parser.add_argument('fasta_input', help="QIIME-formatted mapping file \
-                                             linking Sample IDs with barcodes \
-                                             and primers.")
+                        version='Sequence Ambiguity Filter v0.2')
+    parser.add_argument('fasta_input', help="The FASTA-formatted sequence file \
+                                             to filter (may be gzip/bz2 \
+                                             compressed).")
     parser.add_argument('-o', '--output', default='output.fna',
                         help='The name of the file to output the set of \
                               filtered sequences. Default: \'output.fna\'.')
-#    parser.add_argument('-r', '--repeats', type=int, default=6,
-#                        help='Truncates a sequence when a string of ambiguous \
-#                              bases (N) of REPEATS or longer is found. \
-#                              Default: REPEATS=6.')
+    parser.add_argument('-r', '--repeats', type=int, default=0,
+                        help='Truncates a sequence when a string of ambiguous \
+                              bases (N) of REPEATS or longer is found, e.g. 6. \
+                              Default: REPEATS=0 (no truncation).')
     parser.add_argument('-p', '--percent', type=int, default=5,
                         help='Removes any sequence containing the specified \
                               percentage (or greater) of ambiguous bases (N).\
                               Default: PERCENT=5')
+    parser.add_argument('--processes', type=int, default=1,
+                        help='The number of processes used to filter blocks of \
+                              the input file. Default: 1.')
     parser.add_argument('-v', '--verbose', action='store_true')
 
     return parser.parse_args()
@@ -79,20 +174,17 @@ def main():
     args = handle_program_options()
 
     try:
-        with open(args.fasta_input):
-            pass
+        inF = util.file_handle(args.fasta_input, 'rb')
     except IOError as ioe:
-        sys.exit('\nError with QIIME formatted mapping file:{}\n'.format(ioe))
-
-    with open(args.fasta_input, 'rU') as inF:
-        in_records = SeqIO.parse(inF, 'fasta')
-        records, count = filter_ambiguity(in_records, args.percent/100.0)  # , args.repeats)
+        sys.exit('\nError with input FASTA file:{}\n'.format(ioe))
 
-    SeqIO.write(records, args.output, "fasta")
+    with inF, open(args.output, 'w', 1048576) as outF:
+        count, kept = filter_file(inF, outF, args.percent/100.0, args.repeats,
+                                  args.processes)
 
     if args.verbose:
         print '%i sequences found.' % count
-        print '%i sequences kept.' % len(records)
+        print '%i sequences kept.' % kept
         print
         print 'Output written to: %s' % args.output
 
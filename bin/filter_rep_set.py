@@ -9,42 +9,7 @@ Step 2 of the condensing process.
 '''
 import argparse
 import sys
-try:
-    from Bio import SeqIO
-except ImportError as ie:
-    sys.exit('Import Error. Please install missing module: {}'.format(ie))
-from Bio import SeqIO
-
-
-def parse_unique_otus(inF):
-    """
-    Create a list of the OTU IDs from the input file.
-
-    :@type inF: file
-    :@param inF: The unique OTU file
-
-    :@rtype: list
-    :@return: The sequence IDs associated with unique OTUs
-    """
-    return {line.split('\t')[0] for line in inF}
-
-
-def filter_rep_set(inF, otuSet):
-    """
-    Parse the rep set file and remove all sequences not associated with unique
-    OTUs.
-
-    :@type inF: file
-    :@param inF: The representative sequence set
-
-    :@rtype: list
-    :@return: The set of sequences associated with unique OTUs
-    """
-    seqs = []
-    for record in SeqIO.parse(inF, "fasta"):
-        if record.id in otuSet:
-            seqs.append(record)
-    return seqs
+from phylotoast import condense as cd
 
 
 def handle_program_options():
@@ -79,15 +44,14 @@ def main():
         )
 
     with open(args.unique_otus_fn, 'rU') as uoF:
-        otuSet = parse_unique_otus(uoF)
-
-    with open(args.rep_set_fn, 'rU') as rsF:
-        records = filter_rep_set(rsF, otuSet)
+        otuSet = cd.parse_unique_otus(uoF)
 
-    SeqIO.write(records, args.output_filtered_rep_set_fn, "fasta")
+    with open(args.output_filtered_rep_set_fn, 'w') as outF:
+        count = cd.write_rep_set(cd.iter_rep_set(args.rep_set_fn, otuSet),
+                                 outF)
 
     if args.verbose:
-        print '%i sequences associated with unique OTUs' % len(records)
+        print '%i sequences associated with unique OTUs' % count
         print
         print 'Output written to: %s' % args.output_filtered_rep_set_fn
 
@@ -6,6 +6,7 @@ Author: Shareef M Dabdoub
 """
 import sys
 import re
+import math
 import argparse
 from phylotoast import biom_calc as bc, otu_calc as oc, util
 try:
@@ -145,12 +146,16 @@ def main():
         categories = args.map_categories.split(",")
 
     # set transform if --stabilize_variance is specfied
-    tform = bc.arcsine_sqrt_transform if args.stabilize_variance else None
+    tform = (lambda p: math.asin(math.sqrt(p))) if args.stabilize_variance else None
 
     groups = util.gather_categories(imap, map_header, categories)
-    for group in groups.values():
+    if args.analysis_metric in ["MRA", "NMRA"]:
+        # calculate all groups in a single pass over the table
+        group_mra = bc.group_MRA(biomf, groups, transform=tform)
+        otuIDs = biomf.ids(axis="observation")
+    for i, group in enumerate(groups.values()):
         if args.analysis_metric in ["MRA", "NMRA"]:
-            results = bc.MRA(biomf, group.sids, transform=tform)
+            results = dict(zip(otuIDs, group_mra[:, i]))
         elif args.analysis_metric == "raw":
             results = bc.transform_raw_abundance(biomf, sampleIDs=group.sids,
                                                  sample_abd=False)
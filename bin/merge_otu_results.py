@@ -11,18 +11,10 @@ result.
 '''
 import sys
 import os
+import time
 import argparse
-from collections import defaultdict
-
-
-def merge_results(results_FNs):
-    otus = defaultdict(list)
-    for fn in results_FNs:
-        with open(fn, 'rU') as resultF:
-            for line in resultF.readlines():
-                line = line.split()
-                otus[line[0]].extend(line[1:])
-    return otus
+import resource
+from phylotoast import otu_io
 
 
 def handle_program_options():
@@ -36,6 +28,16 @@ def handle_program_options():
     parser.add_argument('-o', '--output_fn', default='seqs_otus.txt',
                         help='The name of the file the merged results will be \
                               written to.')
+    parser.add_argument('-m', '--max_memory', type=float,
+                        help="Merge with bounded memory: hold about this many MB \
+                              of sequence IDs in memory, spilling sorted runs to \
+                              temporary files that are then merged, at most 64 \
+                              at a time. The output is sorted by OTU ID. By \
+                              default, all results are merged in memory.")
+    parser.add_argument('--tmp_dir', default=None,
+                        help="Directory for temporary files when --max_memory \
+                              is set. By default, the system temporary directory \
+                              is used.")
     parser.add_argument('-v', '--verbose', action='store_true')
 
     return parser.parse_args()
@@ -48,17 +50,30 @@ def main():
         if not os.path.exists(file):
             sys.exit('Error! {} could not be found.'.format(file))
 
-    otus = merge_results(args.pick_otus_results)
-
+    start = time.time()
     with open(args.output_fn, 'w') as outF:
-        for otuID in otus:
-            line = '{otu_id}\t{sample_ids}\n'
-            outF.write(line.format(otu_id=otuID,
-                                   sample_ids='\t'.join(otus[otuID])))
+        if args.max_memory is not None:
+            num_otus = otu_io.external_merge_results(args.pick_otus_results, outF,
+                                                     args.max_memory,
+                                                     args.tmp_dir)
+        else:
+            otus = otu_io.merge_results(args.pick_otus_results)
+            for otuID in otus:
+                line = '{otu_id}\t{sample_ids}\n'
+                outF.write(line.format(otu_id=otuID,
+                                       sample_ids='\t'.join(otus[otuID])))
+            num_otus = len(otus)
+    elapsed = time.time() - start
 
     if args.verbose:
+        in_mb = sum(os.path.getsize(fn) for fn in args.pick_otus_results) / 1024.0 ** 2
+        # ru_maxrss is reported in kilobytes on Linux
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
         print '{} files merged'.format(len(args.pick_otus_results))
-        print '{} otus found'.format(len(otus))
+        print '{} otus found'.format(num_otus)
+        print '{:.1f} MB merged in {:.2f}s ({:.1f} MB/s)'.format(
+            in_mb, elapsed, in_mb / max(elapsed, 1e-9))
+        print 'Peak memory: {:.1f} MB'.format(peak_mb)
 
 
 if __name__ == '__main__':
@@ -7,12 +7,17 @@ Created on Jan 10, 2013
 Author: Shareef M Dabdoub
 
 Generate cluster-computing job scripts for submission in order to run multiple
-simultaneous runs of the QIIME parallel BLAST pick OTUs script.
+simultaneous runs of the QIIME parallel BLAST pick OTUs script, or run the whole
+split -> pick OTUs -> merge workflow with a job scheduler (local processes, PBS or
+SLURM).
 """
 
 import argparse
 import sys
 import os.path as osp
+from phylotoast import util
+from phylotoast import otu_io
+from phylotoast import scheduler as sch
 
 PBS_JOB_NAME_SIZE = 15
 
@@ -30,12 +35,13 @@ def handle_program_options():
                               1.fna, ..., n.fna).")
     parser.add_argument('-s', '--similarity', default=0.97, type=float,
                         help="Sequence similarity threshold [default: 0.97]")
-    parser.add_argument('-j', '--job_script_template', required=True,
+    parser.add_argument('-j', '--job_script_template',
                         help="A file template containing placeholders for \
                               variables that this script will fill in \
                               when creating a new job script for each input \
-                              FASTA query file. An example file for PBS \
-                              systems is included with phylotoast.")
+                              FASTA query file. Example files for PBS and \
+                              SLURM systems are included with phylotoast. \
+                              Required unless --scheduler is local.")
     parser.add_argument('-d', '--database', required=True,
                         help="The path to the sequence database file to run \
                               the BLAST against.")
@@ -50,27 +56,126 @@ def handle_program_options():
                               the jobs, so this parameter will be truncated if\
                               necessary to accommodate for the number of input\
                               files.")
+    parser.add_argument('-p', '--threads', type=int, default=1,
+                        help="The number of threads (BLAST jobs) for each \
+                              partition. Default is 1.")
     parser.add_argument('-v', '--verbose', action='store_true',
                         help="This will cause the program to print the full\
                         path for each output file to the command line. This \
                         can be used for informational purposes or to pipe (|)\
                         to the PBS multi-submission script to automate job\
-                        submission as soon as the scripts are created.")
+                        submission as soon as the scripts are created. With \
+                        --scheduler, job progress is reported instead.")
+
+    workflow = parser.add_argument_group("Workflow options", "Run the jobs with a \
+                                         scheduler instead of only writing job \
+                                         scripts, then merge the results.")
+    workflow.add_argument('--scheduler', choices=sorted(sch.schedulers),
+                          help="Run one job per input file with this backend and \
+                                wait for all of them: 'local' runs the jobs as \
+                                processes on this machine, 'pbs' and 'slurm' \
+                                submit the job script template with qsub or \
+                                sbatch and poll the queue.")
+    workflow.add_argument('--split', type=int, metavar='N',
+                          help="Split the (single) input file into N partitions \
+                                with split_sequence_data.py before running.")
+    workflow.add_argument('-w', '--work_dir', default='.',
+                          help="Directory for the partition files, job scripts, \
+                                logs and per-partition results. Default is the \
+                                current directory.")
+    workflow.add_argument('-o', '--output_fn', default='seqs_otus.txt',
+                          help="The merged pick OTUs result file. Default is \
+                                seqs_otus.txt.")
+    workflow.add_argument('--processes', type=int,
+                          help="local: the number of jobs to run at once. By \
+                                default, the number of CPUs divided by \
+                                --threads.")
+    workflow.add_argument('--command', default=sch.PICK_OTUS_CMD,
+                          help="local: the command template run for each \
+                                partition. Default: '%(default)s'")
+    workflow.add_argument('--retries', type=int, default=2,
+                          help="The number of times a failed job is rerun. \
+                                Default is 2.")
+    workflow.add_argument('--poll_interval', type=float, default=60,
+                          help="pbs/slurm: seconds between queue status checks. \
+                                Default is 60.")
+    workflow.add_argument('-m', '--max_memory', type=float,
+                          help="Merge the results with bounded memory (MB); see \
+                                merge_otu_results.py.")
 
     return parser.parse_args()
 
 
+def run_workflow(args, template=None):
+    """
+    Split the input (optionally), run one pick OTUs job per partition with the
+    selected scheduler and merge the per-partition results into a single file.
+    """
+    util.ensure_dir(args.work_dir)
+    if args.split:
+        if len(args.input_fna) != 1:
+            sys.exit('\nError: --split requires a single input file.\n')
+        stats = otu_io.stream_split_data(args.input_fna[0], args.split,
+                                         args.work_dir)
+        partitions = [osp.join(args.work_dir, '%i.fna' % i)
+                      for i in xrange(args.split)]
+        if args.verbose:
+            print 'Split {} sequences into {} partitions'.format(
+                sum(s[0] for s in stats), args.split)
+    else:
+        partitions = args.input_fna
+
+    job_id_len = len(str(len(partitions))) + 1
+    params = dict(job_name=args.job_name[:PBS_JOB_NAME_SIZE - job_id_len],
+                  database_path=osp.abspath(args.database),
+                  similarity=args.similarity, walltime=args.walltime,
+                  threads=args.threads)
+    options = dict(retries=args.retries, verbose=args.verbose)
+    if args.scheduler == 'local':
+        scheduler = sch.LocalScheduler(params, args.command, args.processes,
+                                       **options)
+    else:
+        scheduler = sch.schedulers[args.scheduler](params, template,
+                                                   args.poll_interval, **options)
+
+    jobs = [sch.PartitionJob(fn, args.work_dir) for fn in partitions]
+    failed = scheduler.run(jobs)
+    if failed:
+        sys.exit('\nError: {} partition(s) failed after {} attempts, see:\n{}\n'
+                 .format(len(failed), args.retries + 1,
+                         '\n'.join(job.log_fp for job in failed)))
+
+    results = [job.result_fp for job in jobs]
+    with open(args.output_fn, 'w') as outF:
+        if args.max_memory is not None:
+            num_otus = otu_io.external_merge_results(results, outF,
+                                                     args.max_memory,
+                                                     args.work_dir)
+        else:
+            otus = otu_io.merge_results(results)
+            for otuID in otus:
+                outF.write('{}\t{}\n'.format(otuID, '\t'.join(otus[otuID])))
+            num_otus = len(otus)
+    if args.verbose:
+        print '{} otus from {} partitions written to {}'.format(
+            num_otus, len(jobs), args.output_fn)
+
+
 def main():
     args = handle_program_options()
 
-    try:
-        with open(args.job_script_template):
-            pass
-    except IOError as ioe:
-        sys.exit(
-            '\nError with template file:{}\n'
-            .format(ioe)
-        )
+    template = None
+    if args.scheduler != 'local':
+        if args.job_script_template is None:
+            sys.exit('\nError: a job script template (-j) is required.\n')
+        try:
+            with open(args.job_script_template, 'rU') as tF:
+                template = tF.read()
+        except IOError as ioe:
+            sys.exit(
+                '\nError with template file:{}\n'
+                .format(ioe)
+            )
 
     try:
         with open(args.database):
@@ -81,8 +186,8 @@ def main():
             .format(ioe)
         )
 
-    with open(args.job_script_template, 'rU') as tF:
-        template = tF.read()
+    if args.scheduler is not None:
+        return run_workflow(args, template)
 
     for fname in args.input_fna:
         fnum = osp.splitext(osp.split(fname)[1])[0]
@@ -95,7 +200,8 @@ def main():
                                       database_path=args.database,
                                       database_fname=osp.basename(args.database),
                                       similarity=args.similarity,
-                                      walltime=args.walltime))
+                                      walltime=args.walltime,
+                                      threads=args.threads))
 
         if args.verbose:
             print outFN
@@ -38,23 +38,18 @@ def get_relative_abundance(biomfile):
     :param biomfile: BIOM format file used to obtain relative abundances for each OTU in
                      a SampleID, which are used as node sizes in network plots.
 
-    :type return: Dictionary of dictionaries.
-    :return: Dictionary keyed on SampleID whose value is a dictionarykeyed on OTU Name
+    :type return: phylotoast.biom_calc.RelativeAbundance
+    :return: Dictionary-like object keyed on SampleID whose value is a dictionary keyed on OTU Name
              whose value is the arc sine tranfsormed relative abundance value for that
              SampleID-OTU Name pair.
     """
     biomf = biom.load_table(biomfile)
-    norm_biomf = biomf.norm(inplace=False)
-    rel_abd = {}
-    for sid in norm_biomf.ids():
-        rel_abd[sid] = {}
-        for otuid in norm_biomf.ids("observation"):
-            otuname = oc.otu_name(norm_biomf.metadata(otuid, axis="observation")["taxonomy"])
-            otuname = " ".join(otuname.split("_"))
-            abd = norm_biomf.get_value_by_ids(otuid, sid)
-            rel_abd[sid][otuname] = abd
-    ast_rel_abd = bc.arcsine_sqrt_transform(rel_abd)
-    return ast_rel_abd
+    rel_abd = bc.relative_abundance(biomf)
+    bc.arcsine_sqrt_transform(rel_abd, inplace=True)
+    # Key the OTUs on their names; as before, the last OTU with a given name wins
+    otunames = [" ".join(oc.otu_name(md["taxonomy"]).split("_"))
+                for md in biomf.metadata(axis="observation")]
+    return bc.RelativeAbundance(rel_abd.matrix, otunames, rel_abd.sampleIDs)
 
 
 def handle_program_options():
@@ -9,8 +9,10 @@ Step 1 of the condensing process.
 '''
 import argparse
 import sys
+from phylotoast import taxonomy as tx
+from phylotoast import condense as cd
 
-blank_taxonomy = "k__; p__; c__; o__; f__; g__; s__".split('; ')
+blank_taxonomy = list(tx.BLANK_TAXONOMY)
 
 def pad_taxonomy(tax):
     levels = tax.split('; ')
@@ -21,43 +23,7 @@ def pad_taxonomy(tax):
 
 
 def split_taxonomy(p, level='s'):
-    blank_taxonomy = "k__; p__; c__; o__; f__; g__; s__".split('; ')
-    level = level+'__'
-    result = p.split(level)
-    return result[0]+level+result[1].split(';')[0]
-
-
-def prune_taxonomy(taxF, level):
-    """
-    :type taxF: file
-    :param taxF: The taxonomy output file to parse
-    :type level: string
-    :param level: The level of the phylogenetic assignment at which to cut off
-                   every assigned taxonomic string.
-
-    :rtype: dict
-    :return: A dictionary of taxonomy strings keyed on OTU ID
-    """
-    uniqueTax = {}
-    nuTax = {}  # non-unique taxonomies
-
-    for i, line in enumerate(taxF):
-        try:
-            otuID, tax, floatVal, otuIDr = line.strip().split('\t')
-        except ValueError as ve:
-            print "ERROR: incorrect number of fields found on line {} of the input file. Entry skipped.".format(i)
-            continue
-        tax = split_taxonomy(pad_taxonomy(tax), level)
-        if tax not in uniqueTax:
-            uniqueTax[tax] = otuID, floatVal, otuIDr
-            nuTax[uniqueTax[tax][0]] = []
-        else:
-            nuTax[uniqueTax[tax][0]].append(otuID)
-
-    ut = {otuID: [tax, floatVal, otuIDr] for tax, (otuID, floatVal, otuIDr) in
-          uniqueTax.iteritems()}
-
-    return ut, nuTax
+    return tx.split_phylogeny(p, level)
 
 
 def handle_program_options():
@@ -97,18 +63,13 @@ def main():
         sys.exit('\nError opening input file:{}\n'.format(ioe))
 
     with open(args.input_assigned_taxonomy, 'rU') as taxF:
-        uniqueTaxonomies, nonuniqueTaxonomies = prune_taxonomy(taxF, args.phylogenetic_level)
+        uniqueTaxonomies, nonuniqueTaxonomies = cd.prune_taxonomy(taxF, args.phylogenetic_level)
 
     with open(args.pruned_output_file, 'w') as poF:
-        for otuID, (tax, floatVal, otuIDr) in uniqueTaxonomies.iteritems():
-            poF.write("%s\t%s\t%s\t%s\n" % (otuID, tax, floatVal, otuIDr))
+        cd.write_condensed_taxonomy(uniqueTaxonomies, poF)
 
     with open(args.non_unique_output_file, 'w') as nuoF:
-        nuID_count = 0
-        for key in nonuniqueTaxonomies:
-            nuoF.write('%s\t%s\n' % (key, '\t'.join(nonuniqueTaxonomies[key])))
-            if len(nonuniqueTaxonomies[key]) > 0:
-                nuID_count += len(nonuniqueTaxonomies[key])
+        nuID_count = cd.write_nonunique_matrix(nonuniqueTaxonomies, nuoF)
 
     if args.verbose:
         print '%i total original OTUs' % (len(uniqueTaxonomies) + nuID_count)
@@ -7,48 +7,10 @@ Author Matthew Mason
 
 Step 3 of the condensing process.
 '''
+import time
 import argparse
-from collections import defaultdict
-
-
-def condense_otus(otuF, nuniqueF):
-    """
-    Traverse the input otu-sequence file, collect the non-unique OTU IDs and
-    file the sequences associated with then under the unique OTU ID as defined
-    by the input matrix.
-
-    :@type otuF: file
-    :@param otuF: The output file from QIIME's pick_otus.py
-    :@type nuniqueF: file
-    :@param nuniqueF: The matrix of unique OTU IDs associated to the list of
-                      non-unique OTU IDs they replaced.
-
-    :@rtype: dict
-    :@return: The new condensed table of unique OTU IDs and the sequence IDs
-              associated with them.
-    """
-    uniqueOTUs = set()
-    nuOTUs = {}
-
-    # parse non-unique otu matrix
-    for line in nuniqueF:
-        line = line.split()
-        uOTU = line[0]
-        for nuOTU in line[1:]:
-            nuOTUs[nuOTU] = uOTU
-        uniqueOTUs.add(uOTU)
-
-    otuFilter = defaultdict(list)
-    # parse otu sequence file
-    for line in otuF:
-        line = line.split()
-        otuID, seqIDs = line[0], line[1:]
-        if otuID in uniqueOTUs:
-            otuFilter[otuID].extend(seqIDs)
-        elif otuID in nuOTUs:
-            otuFilter[nuOTUs[otuID]].extend(seqIDs)
-
-    return otuFilter
+import resource
+from phylotoast import condense as cd
 
 
 def handle_program_options():
@@ -70,6 +32,15 @@ def handle_program_options():
                         help="The condensed set of OTU IDs and the matching \
                               sequences. By default outputs to \
                               condensed_seqs_otus.txt")
+    parser.add_argument('-m', '--max_memory', type=float,
+                        help="Condense with bounded memory: buffer about this \
+                              many MB of sequence IDs before spilling them to a \
+                              temporary file. By default, the condensed table \
+                              is built in memory.")
+    parser.add_argument('--tmp_dir', default=None,
+                        help="Directory for the temporary file when \
+                              --max_memory is set. By default, the system \
+                              temporary directory is used.")
     parser.add_argument('-v', '--verbose', action='store_true')
 
     return parser.parse_args()
@@ -78,15 +49,29 @@ def handle_program_options():
 def main():
     args = handle_program_options()
 
-    with open(args.seqs_otus, 'rU') as sotuF, open(args.non_unique_otu_matrix, 'rU') as nuotuF:
-        filteredOTUs = condense_otus(sotuF, nuotuF)
-
-    with open(args.condensed_seqs_otus_file, 'w') as outF:
-        for otuID, seqIDs in filteredOTUs.iteritems():
-            outF.write("{0}\t{1}\n".format(otuID, '\t'.join(seqIDs)))
+    start = time.time()
+    if args.max_memory is not None:
+        with open(args.non_unique_otu_matrix, 'rU') as nuotuF:
+            nonunique = cd.parse_nonunique_matrix(nuotuF)
+        with open(args.seqs_otus, 'rU') as sotuF, \
+                open(args.condensed_seqs_otus_file, 'w') as outF:
+            num_otus = cd.stream_condense_otus(sotuF, nonunique, outF,
+                                               args.max_memory, args.tmp_dir)
+    else:
+        with open(args.seqs_otus, 'rU') as sotuF, open(args.non_unique_otu_matrix, 'rU') as nuotuF:
+            filteredOTUs = cd.condense_otus(sotuF, nuotuF)
+
+        with open(args.condensed_seqs_otus_file, 'w') as outF:
+            cd.write_condensed_otus(filteredOTUs, outF)
+        num_otus = len(filteredOTUs)
+    elapsed = time.time() - start
 
     if args.verbose:
+        # ru_maxrss is reported in kilobytes on Linux
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+        print '{} condensed otus'.format(num_otus)
         print 'Output written to {}'.format(args.condensed_seqs_otus_file)
+        print 'Elapsed: {:.2f}s, peak memory: {:.1f} MB'.format(elapsed, peak_mb)
 
 
 if __name__ == '__main__':
@@ -12,8 +12,33 @@ sequences (default 0.01%)
 '''
 import sys
 import argparse
-from collections import defaultdict
-from phylotoast import util
+from collections import defaultdict, namedtuple
+from phylotoast import taxonomy as tx
+try:
+    import numpy as np
+except ImportError as ie:
+    sys.exit("Please install missing module: {}.".format(ie))
+
+# samples: sorted int32 array of the (interned) sample indexes an OTU occurs in
+# count: number of sequences assigned to the OTU
+# offset: byte offset of the OTU's line in the seqs_otus file
+OTURecord = namedtuple("OTURecord", "samples count offset")
+
+
+def otu_phylogenies(otus, phyl_level):
+    """
+    Truncate the taxonomy of each OTU to the given phylogenetic level. Truncation
+    is cached per distinct taxonomy string (see phylotoast.taxonomy).
+
+    :type otus: dict
+    :param otus: {otuid: [taxonomy, OTURecord]}
+
+    :rtype: dict
+    :return: The truncated taxonomy string keyed on OTU ID
+    """
+    return {otuid: tx.split_phylogeny(otus[otuid][0], phyl_level)
+            for otuid in otus}
+
 
 def filter_by_sample_pct(otus, nsamples, pct, phyl_level):
     """
@@ -22,7 +47,7 @@ def filter_by_sample_pct(otus, nsamples, pct, phyl_level):
     the cutoff.
 
     :type otus: dict
-    :param otus: {otuid: [taxonomy, [sequence IDs]]}
+    :param otus: {otuid: [taxonomy, OTURecord]}
     :type nsamples: int
     :param nsamples: The total number of samples in the data set
     :type pct: float
@@ -40,20 +65,19 @@ def filter_by_sample_pct(otus, nsamples, pct, phyl_level):
     if phyl_level not in ['k', 'p', 'c', 'o', 'f', 'g', 's']:
         phyl_level = 's'
     nsamples = float(nsamples)
-    sample_counts = defaultdict(set)
-    # count the number of sequences per OTU
+    phyls = otu_phylogenies(otus, phyl_level)
+    sample_idx = defaultdict(list)
+    # collect the samples each OTU occurs in
     for otuid in otus:
-        phyl = util.split_phylogeny(otus[otuid][0], phyl_level)
-        samples = {seqid.split('_')[0] for seqid in otus[otuid][1]}
-        sample_counts[phyl].update(samples)
-    sample_counts = {phyl: len(sample_counts[phyl])/nsamples
-                     for phyl in sample_counts}
+        sample_idx[phyls[otuid]].append(otus[otuid][1].samples)
+    sample_counts = {phyl: np.unique(np.concatenate(sample_idx[phyl])).size/nsamples
+                     for phyl in sample_idx}
 
     # separate OTUs
     above = {}
     below = {}
     for otuid in otus:
-        phyl = util.split_phylogeny(otus[otuid][0], phyl_level)
+        phyl = phyls[otuid]
         if sample_counts[phyl] >= pct:
             above[otuid] = otus[otuid]
         else:
@@ -70,7 +94,7 @@ def filter_by_sequence_pct(otus, nseqs, pct, phyl_level):
     and those less than the cutoff.
 
     :type otus: dict
-    :param otus: {otuid: [taxonomy, [sequence IDs]]}
+    :param otus: {otuid: [taxonomy, OTURecord]}
     :type nseqs: int
     :param nseqs: The total number of sequences in the data set
     :type pct: float
@@ -89,17 +113,17 @@ def filter_by_sequence_pct(otus, nseqs, pct, phyl_level):
         phyl_level = 's'
     seq_counts = defaultdict(int)
     nseqs = float(nseqs)
+    phyls = otu_phylogenies(otus, phyl_level)
     # gather counts
     for oid in otus:
-        phyl = util.split_phylogeny(otus[oid][0], phyl_level)
-        seq_counts[phyl] += len(otus[oid][1])
+        seq_counts[phyls[oid]] += otus[oid][1].count
     seq_counts = {phyl: seq_counts[phyl]/nseqs for phyl in seq_counts}
 
     # separate OTUs
     above = {}
     below = {}
     for otuid in otus:
-        phyl = util.split_phylogeny(otus[otuid][0], phyl_level)
+        phyl = phyls[otuid]
         if seq_counts[phyl] >= pct:
             above[otuid] = otus[otuid]
         else:
@@ -110,18 +134,48 @@ def filter_by_sequence_pct(otus, nseqs, pct, phyl_level):
 
 
 def gather_otus_samples(inFN):
+    """
+    Read the pick OTUs results in a single pass, keeping only a compact summary of
+    each OTU: the indexes of the samples it occurs in (sample names are interned
+    once), its sequence count and the location of its line so the sequence IDs can
+    be copied to the output files later.
+
+    :type inFN: str
+    :param inFN: The output from the pick OTUs step, e.g. seqs_otus.txt. Sequence
+                 IDs are expected in the QIIME SampleID_SequenceNumber format.
+
+    :rtype: tuple
+    :return: {otuid: OTURecord}, the number of samples and the number of sequences
+    """
     otus = {}
-    with open(inFN, 'rU') as seqsF:
-        for line in seqsF:
-            line = line.strip().split('\t')
-            otus[line[0]] = line[1:]
-    samples = set()
+    sample_index = {}
     nseqs = 0
-    for seqs in otus.values():
-        samples.update({seq.split('_')[0] for seq in seqs})
-        nseqs += len(seqs)
+    offset = 0
+    with open(inFN, 'rb') as seqsF:
+        for line in seqsF:
+            fields = line.strip().split('\t')
+            idx = [sample_index.setdefault(seq.split('_')[0], len(sample_index))
+                   for seq in fields[1:]]
+            otus[fields[0]] = OTURecord(np.unique(np.array(idx, dtype=np.int32)),
+                                        len(idx), offset)
+            nseqs += len(idx)
+            offset += len(line)
 
-    return otus, len(samples), nseqs
+    return otus, len(sample_index), nseqs
+
+
+def read_seqids(seqsF, record):
+    """
+    :type seqsF: file
+    :param seqsF: The pick OTUs results file, opened in binary mode
+    :type record: OTURecord
+    :param record: The OTU entry from gather_otus_samples()
+
+    :rtype: str
+    :return: The tab-separated sequence IDs of the OTU
+    """
+    seqsF.seek(record.offset)
+    return seqsF.readline().strip().partition('\t')[2]
 
 
 def assign_taxonomy(otus, taxFN):
@@ -192,8 +246,8 @@ def main():
     otu_taxa = assign_taxonomy(seqs_otus.keys(), args.id_to_taxonomy_fn)
 
     otus = {}
-    for otuid, seqids in seqs_otus.iteritems():
-        otus[otuid] = (otu_taxa[otuid], seqids)
+    for otuid, record in seqs_otus.iteritems():
+        otus[otuid] = (otu_taxa[otuid], record)
 
     above, below = filter_by_sample_pct(otus, nsamples,
                                         args.percent_of_samples,
@@ -212,18 +266,20 @@ def main():
     below.update(below2)
     above.update(above2)
 
-    with open(args.output_pruned_otus_fn, 'w') as outF:
-        for otuid, item in above.iteritems():
-            outF.write('{0}\t{1}\n'.format(otuid, '\t'.join(item[1])))
-
-    with open(args.output_removed_otus_fn, 'w') as outF:
-        outF.write('OTU ID\tSample%\tSeq %\tSequence IDs\n')
-        for oid, item in below.iteritems():
-            seqpct = '{seqpct:.4f}' if item[0] != '' else '     '
-            samplepct = '{samplepct:.2G}' if item[1] != '' else '     '
-            line = '{otuid}\t'+seqpct+'\t'+samplepct+'\t{seqs}\n'
-            outF.write(line.format(otuid=oid, seqpct=item[0],
-                                   samplepct=item[1], seqs='\t'.join(item[3])))
+    with open(args.seqs_otus_fn, 'rb') as seqsF:
+        with open(args.output_pruned_otus_fn, 'w') as outF:
+            for otuid, item in above.iteritems():
+                outF.write('{0}\t{1}\n'.format(otuid, read_seqids(seqsF, item[1])))
+
+        with open(args.output_removed_otus_fn, 'w') as outF:
+            outF.write('OTU ID\tSample%\tSeq %\tSequence IDs\n')
+            for oid, item in below.iteritems():
+                seqpct = '{seqpct:.4f}' if item[0] != '' else '     '
+                samplepct = '{samplepct:.2G}' if item[1] != '' else '     '
+                line = '{otuid}\t'+seqpct+'\t'+samplepct+'\t{seqs}\n'
+                outF.write(line.format(otuid=oid, seqpct=item[0],
+                                       samplepct=item[1],
+                                       seqs=read_seqids(seqsF, item[3])))
 
     if args.verbose:
         print 'Input: \t{} total samples'.format(nsamples)
@@ -234,16 +290,14 @@ def main():
 
         phyl_map = {'k': 'kingdoms', 'p': 'phyla', 'c': 'classes', 'o': 'orders',
                     'f': 'families', 'g': 'genera', 's': 'species'}
-        phyls = {util.split_phylogeny(otus[oid][0], args.phylogenetic_level)
-                 for oid in otus}
+        otu_phyls = otu_phylogenies(otus, args.phylogenetic_level)
+        phyls = set(otu_phyls.itervalues())
         print '\nFrom the {} total {}'.format(len(phyls),
                                               phyl_map[args.phylogenetic_level])
-        phyl_above = {util.split_phylogeny(otus[aoid][0], args.phylogenetic_level)
-                      for aoid in above}
-        phyl_below = {util.split_phylogeny(otus[boid][0], args.phylogenetic_level)
-                      for boid in below}
-        above_abundance = sum([len(item[1]) for item in above.values()])
-        below_abundance = sum([len(below[boid][3]) for boid in below])
+        phyl_above = {otu_phyls[aoid] for aoid in above}
+        phyl_below = {otu_phyls[boid] for boid in below}
+        above_abundance = sum([item[1].count for item in above.values()])
+        below_abundance = sum([below[boid][3].count for boid in below])
         report = ('{0} {1} ({2:.4G}%) were {3}, and account for {4:.4G}% of' +
                   ' all sequence data ({5} sequences)')
         print report.format(len(phyl_above), phyl_map[args.phylogenetic_level],
@@ -8,8 +8,8 @@ restricted to the OTUs in the BIOM table.
 @author: Shareef M Dabdoub
 '''
 import argparse
-import json
-from phylotoast import util
+from phylotoast.biom_io import BIOMFile
+from phylotoast.fasta_index import FASTAIndex
 
 
 def handle_program_options():
@@ -19,8 +19,8 @@ def handle_program_options():
                                      create a new repset restricted to the OTUs\
                                      in the BIOM table.")
     parser.add_argument('-i', '--biom_fp', required=True,
-                        help="Path to a biom-format file with OTU-Sample\
-                              abundance data.")
+                        help="Path to a biom-format file (JSON or HDF5) \
+                              with OTU-Sample abundance data.")
     parser.add_argument('-r', '--repset_fp', required=True, 
                         help='Path to a FASTA-format file containing the\
                               representative set of OTUs')
@@ -33,18 +33,15 @@ def handle_program_options():
 def main():
     args = handle_program_options()
 
-    with open(args.biom_fp, 'rU') as bf:
-        biom_otus = {row['id'] for row in  json.load(bf)['rows']}
+    # only the observation IDs are read from HDF5 files
+    with BIOMFile(args.biom_fp) as bf:
+        biom_otus = set(bf.ids('observation'))
 
-    repset = util.parseFASTA(args.repset_fp)
-    seq_ids = set()
-
-    with open(args.repset_out_fp, 'w') as out_f:
+    with FASTAIndex(args.repset_fp) as repset, \
+            open(args.repset_out_fp, 'w') as out_f:
         fasta_str = ">{} {}\n{}\n"
-        for seq in repset:
-            if seq.id not in seq_ids and seq.id in biom_otus:
-                seq_ids.add(seq.id)
-                out_f.write(fasta_str.format(seq.id, seq.descr, seq.data))
+        for seq in repset.fetch(biom_otus):
+            out_f.write(fasta_str.format(seq.id, seq.descr, seq.data))
 
 
 if __name__ == '__main__':
@@ -11,19 +11,17 @@ smaller files such that the data is evenly distributed among them.
 '''
 import sys
 import argparse
-import os
-import os.path as osp
-from itertools import cycle
 from phylotoast import util
+from phylotoast import otu_io
 
 
-def split_data(fastaFN, partitions):
+def split_data(fastaFN, partitions, balance='count'):
     buckets = [[] for _ in xrange(partitions)]
-    ring = cycle(xrange(partitions))
 
     with open(fastaFN, 'rU') as inF:
-        for seq in util.parseFASTA(inF):
-            buckets[ring.next()].append(seq)
+        for i, seq in otu_io.assign_partitions(util.iterFASTA(inF), partitions,
+                                              balance):
+            buckets[i].append(seq)
 
     return buckets
 
@@ -41,6 +39,16 @@ def handle_program_options():
                               split into.")
     parser.add_argument('-o', '--output_dir', default='.',
                         help="The location to write the split data files.")
+    parser.add_argument('-b', '--balance', default='count',
+                        choices=['count', 'bases'],
+                        help="How to distribute the sequences. 'count' (default) \
+                              gives each file the same number of sequences; \
+                              'bases' gives each file roughly the same number \
+                              of bases, so that downstream OTU picking jobs take \
+                              a similar amount of time.")
+    parser.add_argument('--buffer_size', type=int, default=1048576,
+                        help="Write buffer size in bytes for each output file. \
+                              Default is 1 MB.")
     parser.add_argument('-v', '--verbose', action='store_true')
 
     return parser.parse_args()
@@ -55,17 +63,15 @@ def main():
     except IOError as ioe:
         sys.exit('\nError with input sequence data file:{}\n'.format(ioe))
 
-    buckets = split_data(args.input_fasta_fn, args.num_output_files)
     util.ensure_dir(args.output_dir)
 
-    # write out split files
-    for i, bucket in enumerate(buckets):
-        with open(osp.join(args.output_dir, '%i.fna' % i), 'w') as outF:
-            outF.write(''.join(['>{0.id} {0.descr}\n{0.data}\n'.format(r)
-                       for r in bucket]))
+    # write out split files as the input is read
+    stats = otu_io.stream_split_data(args.input_fasta_fn, args.num_output_files,
+                                     args.output_dir, args.balance,
+                                     args.buffer_size)
     if args.verbose:
-        msg = '{0} files generated with ~{1} sequences per file.'
-        print msg.format(len(buckets), len(buckets[0]))
+        msg = '{0} files generated with ~{1} sequences and ~{2} bases per file.'
+        print msg.format(len(stats), stats[0][0], stats[0][1])
 
 
 if __name__ == '__main__':
@@ -21,6 +21,7 @@ except ImportError:
 
 # local imports
 import phylotoast
+from phylotoast import biom_calc as bc
 
 
 def write_biom(biom_tbl, output_fp, fmt="hdf5", gzip=False):
@@ -80,7 +81,7 @@ def arcsin_sqrt(biom_tbl):
     Applies the arcsine square root transform to the
     given BIOM-format table
     """
-    arcsint = lambda data, id_, md: np.arcsin(np.sqrt(data))
+    arcsint = lambda data, id_, md: bc.arcsine_sqrt(data)
 
     tbl_relabd = relative_abd(biom_tbl)
     tbl_asin = tbl_relabd.transform(arcsint, inplace=False)
@@ -6,30 +6,153 @@ Created on Jul 1, 2013
 Author: Shareef Dabdoub
 '''
 import argparse
-import copy
 import json
 import os.path as osp
 import sys
-from collections import defaultdict
+from collections import OrderedDict
 from phylotoast import util
+from phylotoast.biom_io import BIOMFile
+try:
+    import numpy as np
+    from scipy import sparse
+    import h5py
+except ImportError as ie:
+    sys.exit("Please install missing module: {}.".format(ie))
 
 
-def split_by_category(biom_cols, mapping, category_id):
+def split_by_category(sample_ids, mapping, category_id):
     """
-    Split up the column data in a biom table by mapping category value.
+    Split up the samples in a biom table by mapping category value.
+
+    :type sample_ids: list
+    :param sample_ids: The sample IDs in table order
+    :type mapping: dict
+    :param mapping: The parsed mapping file, see util.parse_map_file()
+    :type category_id: int
+    :param category_id: The index of the category column in the mapping file
+
+    :rtype: OrderedDict
+    :return: The table indexes of the samples in each category value
+    """
+    missing = [sid for sid in sample_ids if sid not in mapping]
+    if missing:
+        raise ValueError('Samples not found in the mapping file: {}'
+                         .format(', '.join(missing)))
+    rows = OrderedDict((value, []) for value in
+                       sorted({mapping[sid][category_id] for sid in mapping}))
+    for i, sid in enumerate(sample_ids):
+        rows[mapping[sid][category_id]].append(i)
+    return rows
+
+
+def select_rows(mtx, rows):
     """
-    columns = defaultdict(list)
-    for i, col in enumerate(biom_cols):
-        columns[mapping[col['id']][category_id]].append((i, col))
+    Select rows of a CSR matrix. A contiguous block of rows is returned as a view on
+    the data and indices arrays of mtx; other selections are copied.
 
-    return columns
+    :type mtx: scipy.sparse.csr_matrix
+    :type rows: list
+    :param rows: Sorted row indexes
+
+    :rtype: scipy.sparse.csr_matrix
+    """
+    if not rows:
+        return sparse.csr_matrix((0, mtx.shape[1]), dtype=mtx.dtype)
+    start, stop = rows[0], rows[-1] + 1
+    if stop - start == len(rows):
+        indptr = mtx.indptr[start:stop + 1]
+        first, last = indptr[0], indptr[-1]
+        return sparse.csr_matrix((mtx.data[first:last], mtx.indices[first:last],
+                                  indptr - first),
+                                 shape=(len(rows), mtx.shape[1]), copy=False)
+    return mtx[rows]
+
+
+def transpose_split(bf, mapping, category_id):
+    """
+    Transpose a BIOM table and split it by mapping category value, without
+    densifying the matrix. The sample x observation matrix is read directly from
+    HDF5 files (it is stored there already) and converted once for JSON files.
+
+    :type bf: phylotoast.biom_io.BIOMFile
+    :param bf: The open input BIOM file
+
+    :rtype: generator
+    :return: (category value, sample entries, sample x observation CSR matrix)
+             for each category value
+    """
+    samples = bf.entries('sample')
+    mtx = bf.matrix('sample')
+    rows = split_by_category([s['id'] for s in samples], mapping, category_id)
+    for value, idx in rows.iteritems():
+        yield value, [samples[i] for i in idx], select_rows(mtx, idx)
+
+
+def write_json(out_fp, attrs, rows, columns, mtx):
+    """
+    Write a table as a sparse BIOM 1.0 (JSON) file.
+    """
+    doc = dict(attrs)
+    doc['shape'] = [len(rows), len(columns)]
+    doc['matrix_type'] = 'sparse'
+    doc['rows'] = rows
+    doc['columns'] = columns
+    coo = mtx.tocoo()
+    doc['data'] = [[int(r), int(c), float(v)]
+                   for r, c, v in zip(coo.row, coo.col, coo.data)]
+    with open(out_fp, 'w') as outF:
+        outF.write(json.dumps(doc))
+
+
+def write_hdf5_axis(h5, axis, entries, mtx):
+    """
+    Write the IDs, metadata and CSR matrix for one axis of a BIOM 2.1 file.
+    """
+    grp = h5.create_group(axis)
+    str_dtype = h5py.special_dtype(vlen=unicode)
+    grp.create_dataset('ids', data=np.array([e['id'] for e in entries],
+                                           dtype=object), dtype=str_dtype)
+    md_grp = grp.create_group('metadata')
+    grp.create_group('group-metadata')
+    keys = sorted({key for e in entries for key in (e['metadata'] or {})})
+    for key in keys:
+        values = [(e['metadata'] or {}).get(key) for e in entries]
+        if all(isinstance(v, list) for v in values):
+            width = max(len(v) for v in values)
+            values = [v + [''] * (width - len(v)) for v in values]
+        else:
+            values = [u'' if v is None else unicode(v) for v in values]
+        md_grp.create_dataset(key, data=np.array(values, dtype=object),
+                              dtype=str_dtype)
+    mat = grp.create_group('matrix')
+    mat.create_dataset('data', data=mtx.data)
+    mat.create_dataset('indices', data=mtx.indices)
+    mat.create_dataset('indptr', data=mtx.indptr)
+
+
+def write_hdf5(out_fp, attrs, rows, columns, mtx):
+    """
+    Write a table as a BIOM 2.1 (HDF5) file. mtx is a rows x columns CSR matrix;
+    the column-major copy needed for the sample axis is the only conversion.
+    """
+    with h5py.File(out_fp, 'w') as h5:
+        h5.attrs['id'] = attrs.get('id') or 'No Table ID'
+        h5.attrs['type'] = attrs.get('type') or ''
+        h5.attrs['format-url'] = 'http://biom-format.org'
+        h5.attrs['format-version'] = (2, 1)
+        h5.attrs['generated-by'] = 'phylotoast transpose_biom.py'
+        h5.attrs['creation-date'] = attrs.get('date') or ''
+        h5.attrs['shape'] = (len(rows), len(columns))
+        h5.attrs['nnz'] = mtx.nnz
+        write_hdf5_axis(h5, 'observation', rows, mtx)
+        write_hdf5_axis(h5, 'sample', columns, mtx.T.tocsr())
 
 
 def handle_program_options():
     parser = argparse.ArgumentParser(description="Transpose a BIOM-format file\
                                      so that the matrix is sample by species.")
     parser.add_argument('-i', '--input_biom_fp', required=True,
-                        help="The BIOM-format file.")
+                        help="The BIOM-format file (JSON or HDF5).")
     parser.add_argument('-m', '--mapping', required=True,
                         help="The mapping file specifying group information \
                               for each sample.")
@@ -40,6 +163,9 @@ def handle_program_options():
                               in the category.")
     parser.add_argument('-o', '--output_biom_fp', default='transposed.biom',
                         required=True, help="The BIOM-format file to write.")
+    parser.add_argument('-f', '--output_format', choices=['json', 'hdf5'],
+                        help="The format of the output BIOM files. By default, \
+                              the format of the input file is used.")
 
     parser.add_argument('-v', '--verbose', action='store_true')
 
@@ -63,9 +189,6 @@ def main():
 
     out_fp, ext = osp.splitext(args.output_biom_fp)
 
-    with open(args.input_biom_fp) as bF:
-        biom = json.loads(bF.readline())
-
     header, mapping = util.parse_map_file(args.mapping)
 
     try:
@@ -73,24 +196,19 @@ def main():
     except ValueError:
         sys.exit('Category {} not found in supplied mapping file.'.format(args.map_category))
 
-    values = {mapping[sid][category_id] for sid in mapping}
-    biom_copies = {value: copy.deepcopy(biom) for value in values}
-    split_samples = split_by_category(biom['columns'], mapping, category_id)
-    for cat_val in biom_copies:
-        biom_copies[cat_val]['data'] = []
-        biom_copies[cat_val]['rows'], biom_copies[cat_val]['columns'] = [item[1] for item in split_samples[cat_val]], biom_copies[cat_val]['rows']
-        sample_ids = [item[0] for item in split_samples[cat_val]]
-
-        for i in xrange(len(biom['data'])):
-            if biom['data'][i][1] in sample_ids:
-                row, col, amt = biom['data'][i]
-                biom_copies[cat_val]['data'].append([sample_ids.index(col), row, amt])
-
-        biom_copies[cat_val]['shape'] = [len(biom_copies[cat_val]['rows']),
-                                         len(biom_copies[cat_val]['columns'])]
-
-        with open(out_fp + '_' + cat_val + ext, 'w') as outF:
-            outF.write(json.dumps(biom_copies[cat_val]))
+    with BIOMFile(args.input_biom_fp) as bf:
+        output_format = args.output_format or ('hdf5' if bf.hdf5 else 'json')
+        write = write_hdf5 if output_format == 'hdf5' else write_json
+        attrs = bf.attrs()
+        observations = bf.entries('observation')
+        try:
+            for cat_val, samples, mtx in transpose_split(bf, mapping, category_id):
+                write(out_fp + '_' + cat_val + ext, attrs, samples, observations, mtx)
+                if args.verbose:
+                    print '{}: {} samples x {} OTUs, {} nonzero'.format(
+                        cat_val, mtx.shape[0], mtx.shape[1], mtx.nnz)
+        except ValueError as ve:
+            sys.exit('\nError: {}\n'.format(ve))
 
 
 if __name__ == '__main__':
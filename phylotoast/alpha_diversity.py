@@ -0,0 +1,321 @@
+"""
+:Date: Created on Oct 16, 2026
+:Abstract: This module calculates alpha diversity for all samples of an OTU table at
+           once. The common metrics are computed as row-wise reductions over the
+           nonzero entries of a sparse sample x OTU count matrix, so samples are
+           never densified. Other metrics (e.g. from scikit-bio) are applied to one
+           dense count vector per sample, optionally over a pool of processes.
+"""
+from __future__ import division
+import sys
+import multiprocessing as mp
+from collections import OrderedDict
+try:
+    import numpy as np
+    from scipy import sparse
+    from scipy.special import gammaln
+except ImportError as ie:
+    sys.exit("Please install missing module: {}.".format(ie))
+
+METRICS = OrderedDict()
+
+
+def vectorized(fn):
+    """
+    Register a function of a sample x OTU count matrix as a vectorized metric.
+    """
+    METRICS[fn.__name__] = fn
+    return fn
+
+
+def _row_sum(counts, values):
+    """
+    Sum values, given for each nonzero entry of counts, over the rows of counts.
+    """
+    return np.asarray(sparse.csr_matrix((values, counts.indices, counts.indptr),
+                                        shape=counts.shape).sum(axis=1)).ravel()
+
+
+def _total(counts):
+    return _row_sum(counts, counts.data)
+
+
+def _frequency_count(counts, n):
+    return _row_sum(counts, (counts.data == n).astype(float))
+
+
+@vectorized
+def observed_otus(counts):
+    """
+    :rtype: numpy.ndarray
+    :return: The number of distinct OTUs in each sample.
+    """
+    return np.diff(counts.indptr)
+
+
+@vectorized
+def singles(counts):
+    """
+    :rtype: numpy.ndarray
+    :return: The number of OTUs observed exactly once in each sample.
+    """
+    return _frequency_count(counts, 1)
+
+
+@vectorized
+def doubles(counts):
+    """
+    :rtype: numpy.ndarray
+    :return: The number of OTUs observed exactly twice in each sample.
+    """
+    return _frequency_count(counts, 2)
+
+
+@vectorized
+def shannon(counts, base=2):
+    """
+    :rtype: numpy.ndarray
+    :return: The Shannon entropy of each sample, log(N) - sum(x log x) / N.
+    """
+    n = _total(counts)
+    xlogx = _row_sum(counts, counts.data * np.log(counts.data))
+    return (np.log(n) - xlogx / n) / np.log(base)
+
+
+@vectorized
+def dominance(counts):
+    """
+    :rtype: numpy.ndarray
+    :return: Simpson's dominance, the sum of squared relative frequencies.
+    """
+    n = _total(counts)
+    return _row_sum(counts, counts.data ** 2) / n ** 2
+
+
+@vectorized
+def simpson(counts):
+    """
+    :rtype: numpy.ndarray
+    :return: Simpson's index, 1 - dominance.
+    """
+    return 1 - dominance(counts)
+
+
+@vectorized
+def enspie(counts):
+    """
+    :rtype: numpy.ndarray
+    :return: The effective number of species, 1 / dominance.
+    """
+    return 1 / dominance(counts)
+
+
+@vectorized
+def simpson_e(counts):
+    """
+    :rtype: numpy.ndarray
+    :return: Simpson's evenness, enspie / observed OTUs.
+    """
+    return enspie(counts) / observed_otus(counts)
+
+
+@vectorized
+def chao1(counts):
+    """
+    :rtype: numpy.ndarray
+    :return: The bias-corrected Chao1 richness estimate, S + F1(F1 - 1) / 2(F2 + 1).
+    """
+    f1, f2 = singles(counts), doubles(counts)
+    return observed_otus(counts) + f1 * (f1 - 1) / (2 * (f2 + 1))
+
+
+@vectorized
+def goods_coverage(counts):
+    """
+    :rtype: numpy.ndarray
+    :return: Good's coverage estimate, 1 - F1 / N.
+    """
+    return 1 - singles(counts) / _total(counts)
+
+
+@vectorized
+def robbins(counts):
+    """
+    :rtype: numpy.ndarray
+    :return: Robbins' probability of unobserved outcomes, F1 / (N + 1).
+    """
+    return singles(counts) / (_total(counts) + 1)
+
+
+@vectorized
+def berger_parker_d(counts):
+    """
+    :rtype: numpy.ndarray
+    :return: The Berger-Parker dominance, the fraction of counts in the most abundant
+             OTU.
+    """
+    return counts.max(axis=1).toarray().ravel() / _total(counts)
+
+
+@vectorized
+def brillouin_d(counts):
+    """
+    :rtype: numpy.ndarray
+    :return: Brillouin's index, (ln N! - sum(ln x!)) / N.
+    """
+    n = _total(counts)
+    return (gammaln(n + 1) - _row_sum(counts, gammaln(counts.data + 1))) / n
+
+
+@vectorized
+def margalef(counts):
+    """
+    :rtype: numpy.ndarray
+    :return: Margalef's richness index, (S - 1) / ln N.
+    """
+    return (observed_otus(counts) - 1) / np.log(_total(counts))
+
+
+@vectorized
+def menhinick(counts):
+    """
+    :rtype: numpy.ndarray
+    :return: Menhinick's richness index, S / sqrt(N).
+    """
+    return observed_otus(counts) / np.sqrt(_total(counts))
+
+
+@vectorized
+def mcintosh_d(counts):
+    """
+    :rtype: numpy.ndarray
+    :return: McIntosh's dominance, (N - U) / (N - sqrt(N)) with U = sqrt(sum(x^2)).
+    """
+    n = _total(counts)
+    u = np.sqrt(_row_sum(counts, counts.data ** 2))
+    return (n - u) / (n - np.sqrt(n))
+
+
+@vectorized
+def mcintosh_e(counts):
+    """
+    :rtype: numpy.ndarray
+    :return: McIntosh's evenness, U / sqrt((N - S + 1)^2 + S - 1).
+    """
+    n, s = _total(counts), observed_otus(counts)
+    u = np.sqrt(_row_sum(counts, counts.data ** 2))
+    return u / np.sqrt((n - s + 1) ** 2 + s - 1)
+
+
+@vectorized
+def heip_e(counts):
+    """
+    :rtype: numpy.ndarray
+    :return: Heip's evenness, (e^H - 1) / (S - 1) with H in nats.
+    """
+    return (np.exp(shannon(counts, base=np.e)) - 1) / (observed_otus(counts) - 1)
+
+
+@vectorized
+def pielou_e(counts):
+    """
+    :rtype: numpy.ndarray
+    :return: Pielou's evenness, H / ln S with H in nats.
+    """
+    return shannon(counts, base=np.e) / np.log(observed_otus(counts))
+
+
+def _skbio_alpha():
+    try:
+        from skbio.diversity import alpha
+    except ImportError as ie:
+        sys.exit("Please install missing module: {}.".format(ie))
+    return alpha
+
+
+def available_metrics():
+    """
+    :rtype: list
+    :return: The names of the supported metrics: the vectorized metrics and, if
+             scikit-bio is installed, its alpha diversity metrics (except the
+             confidence intervals and Faith's PD, which needs a tree).
+    """
+    metrics = set(METRICS)
+    try:
+        from skbio.diversity import alpha
+    except ImportError:
+        pass
+    else:
+        metrics.update(m for m in alpha.__all__ if "_ci" not in m and m != "faith_pd")
+    return sorted(metrics)
+
+
+def _apply_metric(args):
+    metric, sample_counts = args
+    return metric(sample_counts.toarray().ravel())
+
+
+def apply_metric(metric, counts, processes=1, chunksize=32):
+    """
+    Apply a per-sample metric to each row of a count matrix.
+
+    :type metric: function
+    :param metric: Called with the dense integer count vector of one sample. It must
+                   be a module-level function if processes > 1, so that it can be
+                   sent to the worker processes.
+
+    :type counts: scipy.sparse.csr_matrix
+    :param counts: Sample x OTU counts.
+
+    :type processes: int
+    :param processes: The number of worker processes.
+
+    :rtype: numpy.ndarray
+    :return: The metric value for each sample.
+    """
+    # rows are sent to the workers sparse and densified there
+    tasks = ((metric, counts[i]) for i in xrange(counts.shape[0]))
+    if processes > 1:
+        pool = mp.Pool(processes)
+        try:
+            values = list(pool.imap(_apply_metric, tasks, chunksize))
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        values = map(_apply_metric, tasks)
+    return np.array(values, dtype=float)
+
+
+def alpha_diversity(counts, metric, processes=1):
+    """
+    Calculate an alpha diversity metric for every sample of an OTU table.
+
+    :type counts: scipy.sparse matrix or numpy.ndarray
+    :param counts: Sample (rows) x OTU (columns) counts, e.g.
+                   phylotoast.biom_io.BIOMFile.matrix("sample"). Counts are
+                   truncated to integers.
+
+    :type metric: str or function
+    :param metric: The name of a metric from available_metrics(), or a function of
+                   the count vector of one sample.
+
+    :type processes: int
+    :param processes: The number of worker processes used for metrics that are not
+                      vectorized.
+
+    :rtype: numpy.ndarray
+    :return: The metric value for each sample (row), nan where it is undefined,
+             e.g. for samples without any counts.
+    """
+    counts = sparse.csr_matrix(counts, dtype=np.int64)
+    counts.eliminate_zeros()
+    if metric in METRICS:
+        counts = counts.astype(float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return METRICS[metric](counts).astype(float)
+    if not callable(metric):
+        if metric not in available_metrics():
+            raise ValueError("Unknown alpha diversity metric: {}".format(metric))
+        metric = getattr(_skbio_alpha(), metric)
+    return apply_metric(metric, counts, processes)
@@ -6,6 +6,142 @@
 """
 import math
 from collections import defaultdict
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+import numpy as np
+from scipy import sparse
+
+
+def normalize_columns(matrix):
+    """
+    Scale each column of a sparse OTU abundance matrix so that it sums to 1. Columns
+    with no observations are left as all zeros instead of dividing by zero.
+
+    :type matrix: scipy.sparse matrix
+    :param matrix: OTU (rows) x Sample (columns) abundance matrix, such as the
+                   matrix_data attribute of a biom.table.Table.
+
+    :rtype: scipy.sparse.csc_matrix
+    :return: A new CSC matrix of float proportions with the same shape as matrix.
+    """
+    matrix = sparse.csc_matrix(matrix, dtype=float, copy=True)
+    totals = np.asarray(matrix.sum(axis=0)).ravel()
+    totals[totals == 0] = 1
+    # CSC stores each column contiguously, so every stored value can be divided by
+    # its column total in a single vectorized operation
+    matrix.data /= np.repeat(totals, np.diff(matrix.indptr))
+    return matrix
+
+
+class SampleAbundance(Mapping):
+    """
+    Read-only dictionary view of a single sample column of a RelativeAbundance
+    object, keyed on OTUID. OTUs not observed in the sample have a value of 0.
+    """
+    def __init__(self, rows, values, otuIDs, otu_index):
+        self._rows = rows
+        self._values = values
+        self._otuIDs = otuIDs
+        self._otu_index = otu_index
+
+    def __getitem__(self, otuID):
+        row = self._otu_index[otuID]
+        pos = np.searchsorted(self._rows, row)
+        if pos < len(self._rows) and self._rows[pos] == row:
+            return self._values[pos]
+        return 0.0
+
+    def __iter__(self):
+        return iter(self._otuIDs)
+
+    def __len__(self):
+        return len(self._otuIDs)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+    def toarray(self):
+        """
+        Return the abundances of every OTU in this sample as a dense 1D array in
+        the same order as the OTUIDs.
+        """
+        col = np.zeros(len(self._otuIDs))
+        col[self._rows] = self._values
+        return col
+
+    def items(self):
+        return list(zip(self._otuIDs, self.toarray()))
+
+    def values(self):
+        return list(self.toarray())
+
+
+class RelativeAbundance(Mapping):
+    """
+    Relative abundances of OTUs in a set of samples stored as a single sparse
+    OTU x Sample matrix plus the OTU and sample ID indices. The object behaves as a
+    read-only dictionary keyed on SampleID, whose values are dictionaries keyed on
+    OTUID, so it can be used anywhere the nested dictionary form is expected.
+    """
+    def __init__(self, matrix, otuIDs, sampleIDs):
+        self.matrix = sparse.csc_matrix(matrix)
+        self.matrix.sort_indices()
+        self.otuIDs = list(otuIDs)
+        self.sampleIDs = list(sampleIDs)
+        self.otu_index = {oid: i for i, oid in enumerate(self.otuIDs)}
+        self.sample_index = {sid: i for i, sid in enumerate(self.sampleIDs)}
+
+    def __getitem__(self, sampleID):
+        col = self.sample_index[sampleID]
+        start, end = self.matrix.indptr[col], self.matrix.indptr[col + 1]
+        return SampleAbundance(self.matrix.indices[start:end],
+                               self.matrix.data[start:end],
+                               self.otuIDs, self.otu_index)
+
+    def __iter__(self):
+        return iter(self.sampleIDs)
+
+    def __len__(self):
+        return len(self.sampleIDs)
+
+    def __repr__(self):
+        return repr({sid: self[sid] for sid in self})
+
+    def to_dataframe(self):
+        """
+        Return the relative abundances as a dense pandas DataFrame with SampleIDs as
+        the index and OTUIDs as the columns.
+        """
+        import pandas as pd
+        return pd.DataFrame(self.matrix.T.toarray(), index=self.sampleIDs,
+                            columns=self.otuIDs)
+
+
+def sample_columns(biomf, sampleIDs, calc="abundances"):
+    """
+    Validate a list of sample IDs against a BIOM table and find their column indices.
+
+    :type biomf: A BIOM file.
+    :param biomf: OTU table format.
+
+    :type sampleIDs: list
+    :param sampleIDs: A list of sample id's from BIOM format OTU table.
+
+    :type calc: str
+    :param calc: Name of the calculation being performed, used in the error message.
+
+    :rtype: list
+    :return: The column index in biomf of each sample ID, in the order given.
+    """
+    index = {sid: i for i, sid in enumerate(biomf.ids())}
+    if set(sampleIDs).difference(index):
+        raise ValueError(
+            "\nError while calculating {}: The sampleIDs provided do not match the "
+            "sampleIDs in biom file. Please double check the sampleIDs provided.\n"
+            .format(calc))
+    return [index[sid] for sid in sampleIDs]
 
 
 def relative_abundance(biomf, sampleIDs=None):
@@ -18,27 +154,19 @@ def relative_abundance(biomf, sampleIDs=None):
     :type sampleIDs: list
     :param sampleIDs: A list of sample id's from BIOM format OTU table.
 
-    :rtype: dict
-    :return: Returns a keyed on SampleIDs, and the values are dictionaries keyed on
-             OTUID's and their values represent the relative abundance of that OTUID in
-             that SampleID.
+    :rtype: RelativeAbundance
+    :return: Returns a dictionary-like object keyed on SampleIDs, and the values are
+             dictionaries keyed on OTUID's and their values represent the relative
+             abundance of that OTUID in that SampleID. The underlying normalized sparse
+             matrix is available via the matrix attribute.
     """
     if sampleIDs is None:
         sampleIDs = biomf.ids()
-    else:
-        try:
-            for sid in sampleIDs:
-                assert sid in biomf.ids()
-        except AssertionError:
-            raise ValueError(
-                "\nError while calculating relative abundances: The sampleIDs provided do"
-                " not match the sampleIDs in biom file. Please double check the sampleIDs"
-                " provided.\n")
-    otuIDs = biomf.ids(axis="observation")
-    norm_biomf = biomf.norm(inplace=False)
+    sampleIDs = list(sampleIDs)
+    cols = sample_columns(biomf, sampleIDs, "relative abundances")
+    norm = normalize_columns(sparse.csc_matrix(biomf.matrix_data)[:, cols])
 
-    return {sample: {otuID: norm_biomf.get_value_by_ids(otuID, sample)
-                     for otuID in otuIDs} for sample in sampleIDs}
+    return RelativeAbundance(norm, biomf.ids(axis="observation"), sampleIDs)
 
 
 def mean_otu_pct_abundance(ra, otuIDs):
@@ -84,12 +212,56 @@ def MRA(biomf, sampleIDs=None, transform=None):
     :return: A dictionary keyed on OTUID's and their mean relative abundance for a given
              number of sampleIDs.
     """
-    ra = relative_abundance(biomf, sampleIDs)
+    if sampleIDs is None:
+        sampleIDs = biomf.ids()
+    mra = group_MRA(biomf, {"all": sampleIDs}, transform)
+    return defaultdict(int, zip(biomf.ids(axis="observation"), mra[:, 0].tolist()))
+
+
+def group_MRA(biomf, groups, transform=None):
+    """
+    Calculate the mean relative abundance percentage of every OTU for several groups
+    of samples at once. The table is normalized a single time and the per-group means
+    are obtained from one product with a Sample x Group indicator matrix.
+
+    :type biomf: A BIOM file.
+    :param biomf: OTU table format.
+
+    :type groups: dict
+    :param groups: Keyed on group name, with values that are either collections of
+                   sample id's or DataCategory objects from util.gather_categories().
+
+    :param transform: Mathematical function which is applied to each relative abundance
+                      value before averaging. By default, the function has been set to
+                      None.
+
+    :rtype: numpy.ndarray
+    :return: A dense OTU x Group array of mean relative abundance percentages. Rows are
+             in the order of biomf.ids(axis="observation") and columns are in the
+             iteration order of groups.
+    """
+    group_sids = [list(getattr(grp, "sids", grp)) for grp in groups.values()]
+    sampleIDs = sorted({sid for sids in group_sids for sid in sids})
+    cols = sample_columns(biomf, sampleIDs, "relative abundances")
+    norm = normalize_columns(sparse.csc_matrix(biomf.matrix_data)[:, cols])
+
+    # Only stored values are transformed; the contribution of every implicit zero
+    # cell is added back as the constant transform(0) after averaging.
+    offset = 0.0
     if transform is not None:
-        ra = {sample: {otuID: transform(abd) for otuID, abd in ra[sample].items()}
-              for sample in ra.keys()}
-    otuIDs = biomf.ids(axis="observation")
-    return mean_otu_pct_abundance(ra, otuIDs)
+        offset = transform(0.0)
+        norm.data = np.vectorize(transform, otypes=[float])(norm.data) - offset
+
+    sample_index = {sid: i for i, sid in enumerate(sampleIDs)}
+    rows = [sample_index[sid] for sids in group_sids for sid in sids]
+    gcols = [g for g, sids in enumerate(group_sids) for _ in sids]
+    indicator = sparse.csr_matrix((np.ones(len(rows)), (rows, gcols)),
+                                  shape=(len(sampleIDs), len(group_sids)))
+    sizes = np.asarray(indicator.sum(axis=0)).ravel()
+    sizes[sizes == 0] = 1
+
+    sums = np.asarray((norm * indicator).todense())
+    return (sums / sizes + offset) * 100
 
 
 def raw_abundance(biomf, sampleIDs=None, sample_abd=True):
@@ -111,27 +283,19 @@ def raw_abundance(biomf, sampleIDs=None, sample_abd=True):
     :return: Returns a dictionary keyed on either OTUID's or SampleIDs and their
              respective abundance as values.
     """
-    results = defaultdict(int)
     if sampleIDs is None:
         sampleIDs = biomf.ids()
+    sampleIDs = list(sampleIDs)
+    cols = sample_columns(biomf, sampleIDs, "raw total abundances")
+    subset = sparse.csc_matrix(biomf.matrix_data)[:, cols]
+
+    if sample_abd:
+        totals = zip(sampleIDs, subset.sum(axis=0).A1.tolist())
     else:
-        try:
-            for sid in sampleIDs:
-                assert sid in biomf.ids()
-        except AssertionError:
-            raise ValueError(
-                "\nError while calculating raw total abundances: The sampleIDs provided "
-                "do not match the sampleIDs in biom file. Please double check the "
-                "sampleIDs provided.\n")
-    otuIDs = biomf.ids(axis="observation")
-
-    for sampleID in sampleIDs:
-        for otuID in otuIDs:
-            abd = biomf.get_value_by_ids(otuID, sampleID)
-            if sample_abd:
-                results[sampleID] += abd
-            else:
-                results[otuID] += abd
+        totals = zip(biomf.ids(axis="observation"), subset.sum(axis=1).A1.tolist())
+    results = defaultdict(int)
+    for ID, abd in totals:
+        results[ID] += abd
     return results
 
 
@@ -155,13 +319,59 @@ def transform_raw_abundance(biomf, fn=math.log10, sampleIDs=None, sample_abd=Tru
     return {sid: fn(abd) for sid, abd in totals.items()}
 
 
-def arcsine_sqrt_transform(rel_abd):
+def arcsine_sqrt(data, inplace=False):
+    """
+    Apply the variance stabilizing arcsine square root transformation to an array of
+    proportions. For scipy sparse matrices only the stored values are transformed,
+    since sin^{-1} \sqrt 0 = 0 leaves the implicit zeros unchanged.
+
+    :type data: numpy.ndarray or scipy.sparse matrix
+    :param data: Proportion data, such as the matrix attribute of the output of
+                 relative_abundance().
+
+    :type inplace: bool
+    :param inplace: If True, data is overwritten instead of copied. Dense input must
+                    then already be a float array.
+
+    :rtype: numpy.ndarray or scipy.sparse matrix
+    :return: The transformed data, of the same type as the input.
+    """
+    if sparse.issparse(data):
+        if not inplace:
+            data = data.copy()
+        values = data.data
+    else:
+        if not inplace:
+            data = np.array(data, dtype=float)
+        values = data
+    np.sqrt(values, out=values)
+    np.arcsin(values, out=values)
+    return data
+
+
+def arcsine_sqrt_transform(rel_abd, inplace=False):
     """
     Takes the proportion data from relative_abundance() and applies the
     variance stabilizing arcsine square root transformation:
 
     X = sin^{-1} \sqrt p
+
+    If rel_abd is a RelativeAbundance object the transform is applied directly to its
+    sparse matrix with arcsine_sqrt(). Setting inplace to True modifies rel_abd rather
+    than returning a transformed copy.
     """
+    if isinstance(rel_abd, RelativeAbundance):
+        if inplace:
+            arcsine_sqrt(rel_abd.matrix, inplace=True)
+            return rel_abd
+        return RelativeAbundance(arcsine_sqrt(rel_abd.matrix), rel_abd.otuIDs,
+                                 rel_abd.sampleIDs)
+
     arcsint = lambda p: math.asin(math.sqrt(p))
+    if inplace:
+        for col_id in rel_abd:
+            for row_id in rel_abd[col_id]:
+                rel_abd[col_id][row_id] = arcsint(rel_abd[col_id][row_id])
+        return rel_abd
     return {col_id: {row_id: arcsint(rel_abd[col_id][row_id])
                      for row_id in rel_abd[col_id]} for col_id in rel_abd}
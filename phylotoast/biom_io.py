@@ -0,0 +1,223 @@
+"""
+:Date: Created on Oct 16, 2026
+:Abstract: This module provides lightweight, read-only access to BIOM files in
+           either the BIOM 1.0 (JSON) or 2.x (HDF5) format. For HDF5 files only the
+           datasets that are requested are read (e.g. just the observation IDs),
+           instead of loading the whole table into Python objects.
+"""
+import sys
+import json
+try:
+    import numpy as np
+    from scipy import sparse
+    import h5py
+except ImportError as ie:
+    sys.exit("Please install missing module: {}.".format(ie))
+
+AXES = ("observation", "sample")
+
+
+def is_hdf5(biom_fp):
+    """
+    :type biom_fp: str
+    :param biom_fp: Path to a BIOM file.
+
+    :rtype: bool
+    :return: True if the file is in the HDF5 (BIOM 2.x) format.
+    """
+    return h5py.is_hdf5(biom_fp)
+
+
+def _decode(value):
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+class BIOMFile(object):
+    """
+    Read parts of a BIOM file on demand. HDF5 files are read one dataset at a time;
+    JSON files are parsed once, when first needed.
+
+    :type biom_fp: str
+    :param biom_fp: Path to a JSON or HDF5 BIOM file.
+    """
+    def __init__(self, biom_fp):
+        self.biom_fp = biom_fp
+        self.hdf5 = is_hdf5(biom_fp)
+        self._h5 = h5py.File(biom_fp, "r") if self.hdf5 else None
+        self._json = None
+
+    @property
+    def json(self):
+        """
+        The parsed BIOM 1.0 JSON document (JSON files only).
+        """
+        if self._json is None:
+            with open(self.biom_fp, "rU") as bF:
+                self._json = json.load(bF)
+        return self._json
+
+    def _json_axis(self, axis):
+        if axis not in AXES:
+            raise ValueError("Unknown axis: {}".format(axis))
+        return self.json["rows" if axis == "observation" else "columns"]
+
+    @property
+    def shape(self):
+        """
+        The (observations, samples) shape of the table.
+        """
+        if self.hdf5:
+            return tuple(int(n) for n in self._h5.attrs["shape"])
+        return tuple(self.json["shape"])
+
+    def ids(self, axis="observation"):
+        """
+        :type axis: str
+        :param axis: "observation" or "sample".
+
+        :rtype: list
+        :return: The IDs along the axis, in table order.
+        """
+        if self.hdf5:
+            return [_decode(i) for i in self._h5[axis + "/ids"][:]]
+        return [entry["id"] for entry in self._json_axis(axis)]
+
+    def metadata(self, key, axis="observation"):
+        """
+        :type key: str
+        :param key: The metadata field, e.g. "taxonomy".
+
+        :type axis: str
+        :param axis: "observation" or "sample".
+
+        :rtype: list
+        :return: The value of the field for each ID along the axis (None where it is
+                 missing). Array-valued fields, such as taxonomy, are lists.
+        """
+        if self.hdf5:
+            path = "{}/metadata/{}".format(axis, key)
+            if path not in self._h5:
+                return [None] * len(self._h5[axis + "/ids"])
+            values = self._h5[path][:]
+            if values.ndim > 1:
+                return [[_decode(v) for v in row] for row in values]
+            return [_decode(v) for v in values]
+        return [(entry.get("metadata") or {}).get(key)
+                for entry in self._json_axis(axis)]
+
+    def entries(self, axis="observation"):
+        """
+        :type axis: str
+        :param axis: "observation" or "sample".
+
+        :rtype: list
+        :return: BIOM 1.0 style {"id": ..., "metadata": {...} or None} entries for
+                 each ID along the axis, with all of the metadata fields.
+        """
+        if not self.hdf5:
+            return self._json_axis(axis)
+        ids = self.ids(axis)
+        metadata = [{} for _ in ids]
+        md_path = axis + "/metadata"
+        for key in self._h5[md_path] if md_path in self._h5 else []:
+            for md, value in zip(metadata, self.metadata(key, axis)):
+                md[key] = value
+        return [{"id": sid, "metadata": md or None} for sid, md in zip(ids, metadata)]
+
+    def attrs(self):
+        """
+        :rtype: dict
+        :return: The table-level BIOM 1.0 fields (id, format, type, ...), without
+                 the rows, columns and data.
+        """
+        if not self.hdf5:
+            return {key: value for key, value in self.json.items()
+                    if key not in ("rows", "columns", "data")}
+        attrs = self._h5.attrs
+        return {"id": _decode(attrs.get("id", "")),
+                "format": "Biological Observation Matrix 1.0.0",
+                "format_url": "http://biom-format.org",
+                "type": _decode(attrs.get("type", "")),
+                "generated_by": _decode(attrs.get("generated-by", "")),
+                "date": _decode(attrs.get("creation-date", "")),
+                "matrix_type": "sparse",
+                "matrix_element_type": "float",
+                "shape": list(self.shape)}
+
+    def matrix(self, axis="observation"):
+        """
+        :type axis: str
+        :param axis: "observation" for an observation x sample matrix, "sample" for
+                     the transposed, sample x observation matrix.
+
+        :rtype: scipy.sparse.csr_matrix
+        :return: The table counts with the rows along the given axis.
+        """
+        if self.hdf5:
+            grp = self._h5[axis + "/matrix"]
+            n_obs, n_samples = self.shape
+            shape = (n_obs, n_samples) if axis == "observation" else (n_samples, n_obs)
+            return sparse.csr_matrix((grp["data"][:], grp["indices"][:],
+                                      grp["indptr"][:]), shape=shape)
+
+        doc = self.json
+        if doc.get("matrix_type") == "dense":
+            mtx = sparse.csr_matrix(np.array(doc["data"], dtype=float).reshape(
+                                    doc["shape"]))
+        else:
+            data = np.array(doc["data"], dtype=float).reshape(-1, 3)
+            mtx = sparse.csr_matrix((data[:, 2], (data[:, 0].astype(int),
+                                                  data[:, 1].astype(int))),
+                                    shape=doc["shape"])
+        return mtx if axis == "observation" else mtx.T.tocsr()
+
+    def totals(self, axis="observation"):
+        """
+        :type axis: str
+        :param axis: "observation" for per-observation totals, "sample" for
+                     per-sample totals.
+
+        :rtype: numpy.ndarray
+        :return: The sum of the counts for each ID along the axis. For HDF5 files,
+                 only the data and indptr datasets are read.
+        """
+        if self.hdf5:
+            grp = self._h5[axis + "/matrix"]
+            cumsum = np.concatenate([[0], np.cumsum(grp["data"][:])])
+            indptr = grp["indptr"][:]
+            return cumsum[indptr[1:]] - cumsum[indptr[:-1]]
+        return np.asarray(self.matrix(axis).sum(axis=1)).ravel()
+
+    def close(self):
+        if self._h5 is not None:
+            self._h5.close()
+        self._json = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_biom_json(biom_fp):
+    """
+    Load a BIOM file in either format as a BIOM 1.0 (JSON) style dict with sparse
+    [row, column, value] data triples.
+
+    :type biom_fp: str
+    :param biom_fp: Path to a JSON or HDF5 BIOM file.
+
+    :rtype: dict
+    :return: The BIOM 1.0 document.
+    """
+    with BIOMFile(biom_fp) as bf:
+        if not bf.hdf5:
+            return bf.json
+        doc = bf.attrs()
+        coo = bf.matrix().tocoo()
+        doc["data"] = [[int(r), int(c), float(v)]
+                       for r, c, v in zip(coo.row, coo.col, coo.data)]
+        doc["rows"] = bf.entries("observation")
+        doc["columns"] = bf.entries("sample")
+        return doc
@@ -0,0 +1,276 @@
+"""
+:Date: Created on Oct 16, 2026
+:Abstract: This module implements the three steps of the OTU condensing process:
+           pruning the assigned taxonomy to one OTU per unique taxonomy string
+           (step 1), selecting the representative sequences of the unique OTUs
+           (step 2) and moving the sequences of non-unique OTUs to the unique OTUs
+           that replaced them (step 3). It is used by otu_condense.py,
+           filter_rep_set.py, pick_otus_condense.py and condense_workflow.py.
+"""
+import sys
+import tempfile
+from collections import defaultdict
+from phylotoast import taxonomy as tx
+from phylotoast.fasta_index import FASTAIndex
+
+
+def prune_taxonomy(taxF, level):
+    """
+    :type taxF: file
+    :param taxF: The taxonomy output file to parse
+    :type level: string
+    :param level: The level of the phylogenetic assignment at which to cut off
+                   every assigned taxonomic string.
+
+    :rtype: dict
+    :return: A dictionary of taxonomy strings keyed on OTU ID
+    """
+    uniqueTax = {}
+    nuTax = {}  # non-unique taxonomies
+
+    for i, line in enumerate(taxF):
+        try:
+            otuID, tax, floatVal, otuIDr = line.strip().split('\t')
+        except ValueError as ve:
+            sys.stderr.write("ERROR: incorrect number of fields found on line {} of the "
+                             "input file. Entry skipped.\n".format(i))
+            continue
+        tax = tx.truncate_taxonomy(tax, level)
+        if tax not in uniqueTax:
+            uniqueTax[tax] = otuID, floatVal, otuIDr
+            nuTax[uniqueTax[tax][0]] = []
+        else:
+            nuTax[uniqueTax[tax][0]].append(otuID)
+
+    ut = {otuID: [tax, floatVal, otuIDr] for tax, (otuID, floatVal, otuIDr) in
+          uniqueTax.iteritems()}
+
+    return ut, nuTax
+
+
+def write_condensed_taxonomy(uniqueTaxonomies, outF):
+    for otuID, (tax, floatVal, otuIDr) in uniqueTaxonomies.iteritems():
+        outF.write("%s\t%s\t%s\t%s\n" % (otuID, tax, floatVal, otuIDr))
+
+
+def write_nonunique_matrix(nonuniqueTaxonomies, outF):
+    """
+    :rtype: int
+    :return: The number of non-unique OTU IDs written
+    """
+    nuID_count = 0
+    for key in nonuniqueTaxonomies:
+        outF.write('%s\t%s\n' % (key, '\t'.join(nonuniqueTaxonomies[key])))
+        nuID_count += len(nonuniqueTaxonomies[key])
+    return nuID_count
+
+
+def parse_unique_otus(inF):
+    """
+    Create a list of the OTU IDs from the input file.
+
+    :@type inF: file
+    :@param inF: The unique OTU file
+
+    :@rtype: list
+    :@return: The sequence IDs associated with unique OTUs
+    """
+    return {line.split('\t')[0] for line in inF}
+
+
+def iter_rep_set(rep_set_fp, otuSet):
+    """
+    Look up the sequences associated with unique OTUs in the rep set file using a
+    FASTA index, so only the selected records are read.
+
+    :@type rep_set_fp: str
+    :@param rep_set_fp: Path to the representative sequence set
+
+    :@type otuSet: iterable
+    :@param otuSet: The unique OTU IDs, e.g. the keys of the pruned taxonomy from
+                    prune_taxonomy()
+
+    :@rtype: generator
+    :@return: The sequences associated with unique OTUs, in rep set file order
+    """
+    with FASTAIndex(rep_set_fp) as rep_set:
+        for record in rep_set.fetch(otuSet):
+            yield record
+
+
+def filter_rep_set(rep_set_fp, otuSet):
+    """
+    Parse the rep set file and remove all sequences not associated with unique
+    OTUs.
+
+    :@type rep_set_fp: str
+    :@param rep_set_fp: Path to the representative sequence set
+
+    :@type otuSet: iterable
+    :@param otuSet: The unique OTU IDs
+
+    :@rtype: list
+    :@return: The set of sequences associated with unique OTUs
+    """
+    return list(iter_rep_set(rep_set_fp, otuSet))
+
+
+def write_rep_set(records, outF):
+    """
+    Write sequence records to a FASTA file as they are produced.
+
+    :@type records: iterable
+    :@param records: The sequences to write, e.g. from iter_rep_set()
+
+    :@type outF: file
+    :@param outF: Open file the sequences are written to
+
+    :@rtype: int
+    :@return: The number of sequences written
+    """
+    count = 0
+    for record in records:
+        header = '>' + record.id
+        if record.descr:
+            header += ' ' + record.descr
+        outF.write('{}\n{}\n'.format(header, record.data))
+        count += 1
+    return count
+
+
+def parse_nonunique_matrix(nuniqueF):
+    """
+    :@type nuniqueF: file
+    :@param nuniqueF: The matrix of unique OTU IDs associated to the list of
+                      non-unique OTU IDs they replaced.
+
+    :@rtype: dict
+    :@return: The non-unique OTU IDs keyed on the unique OTU ID that replaced them,
+              as returned by prune_taxonomy()
+    """
+    nonunique = {}
+    for line in nuniqueF:
+        line = line.split()
+        if line:
+            nonunique[line[0]] = line[1:]
+    return nonunique
+
+
+def condense_otus(otuF, nuniqueF):
+    """
+    Traverse the input otu-sequence file, collect the non-unique OTU IDs and
+    file the sequences associated with then under the unique OTU ID as defined
+    by the input matrix.
+
+    :@type otuF: file
+    :@param otuF: The output file from QIIME's pick_otus.py
+    :@type nuniqueF: file
+    :@param nuniqueF: The matrix of unique OTU IDs associated to the list of
+                      non-unique OTU IDs they replaced.
+
+    :@rtype: dict
+    :@return: The new condensed table of unique OTU IDs and the sequence IDs
+              associated with them.
+    """
+    return condense_otu_map(otuF, parse_nonunique_matrix(nuniqueF))
+
+
+def condense_otu_map(otuF, nonunique):
+    """
+    Same as condense_otus(), with the non-unique OTU matrix already in memory.
+
+    :@type otuF: iterable
+    :@param otuF: Lines of the output file from QIIME's pick_otus.py
+    :@type nonunique: dict
+    :@param nonunique: The non-unique OTU IDs keyed on the unique OTU ID that
+                       replaced them
+
+    :@rtype: dict
+    :@return: The new condensed table of unique OTU IDs and the sequence IDs
+              associated with them.
+    """
+    uniqueOTUs = set(nonunique)
+    nuOTUs = {nuOTU: uOTU for uOTU in nonunique for nuOTU in nonunique[uOTU]}
+
+    otuFilter = defaultdict(list)
+    # parse otu sequence file
+    for line in otuF:
+        line = line.split()
+        otuID, seqIDs = line[0], line[1:]
+        if otuID in uniqueOTUs:
+            otuFilter[otuID].extend(seqIDs)
+        elif otuID in nuOTUs:
+            otuFilter[nuOTUs[otuID]].extend(seqIDs)
+
+    return otuFilter
+
+
+def stream_condense_otus(otuF, nonunique, outF, max_memory=64, tmp_dir=None):
+    """
+    Condense the pick OTUs results with bounded memory. The sequence IDs read for
+    each unique OTU are held in a per-OTU append buffer; once about max_memory MB
+    are buffered, every buffer is appended to a single temporary spill file and
+    the location of each OTU's chunk is recorded. When the input has been read, the
+    entry for each OTU is written from its spilled chunks followed by the rest of
+    its buffer, so the output matches condense_otus().
+
+    :@type otuF: iterable
+    :@param otuF: Lines of the output file from QIIME's pick_otus.py
+    :@type nonunique: dict
+    :@param nonunique: The non-unique OTU IDs keyed on the unique OTU ID that
+                       replaced them
+    :@type outF: file
+    :@param outF: Open file the condensed results are written to
+    :@type max_memory: float
+    :@param max_memory: Approximate amount of sequence ID data (in MB) to buffer
+                        before spilling to disk
+    :@type tmp_dir: str
+    :@param tmp_dir: Directory for the spill file. By default, the system temporary
+                     directory is used.
+
+    :@rtype: int
+    :@return: The number of OTUs written
+    """
+    limit = max_memory * 1024 ** 2
+    target = {}
+    for uOTU in nonunique:
+        target[uOTU] = uOTU
+        for nuOTU in nonunique[uOTU]:
+            target[nuOTU] = uOTU
+
+    buffers = defaultdict(list)
+    spilled = defaultdict(list)  # OTU ID -> [(offset, length), ...]
+    buffered = 0
+    with tempfile.TemporaryFile(dir=tmp_dir) as spillF:
+        for line in otuF:
+            line = line.split(None, 1)
+            if not line or line[0] not in target:
+                continue
+            buf = buffers[target[line[0]]]
+            if len(line) > 1:
+                seqIDs = '\t'.join(line[1].split())
+                buf.append(seqIDs)
+                buffered += len(seqIDs)
+            if buffered >= limit:
+                for otuID, buf in buffers.iteritems():
+                    if buf:
+                        chunk = '\t'.join(buf)
+                        spilled[otuID].append((spillF.tell(), len(chunk)))
+                        spillF.write(chunk)
+                        del buf[:]
+                buffered = 0
+
+        for otuID, buf in buffers.iteritems():
+            parts = []
+            for offset, length in spilled[otuID]:
+                spillF.seek(offset)
+                parts.append(spillF.read(length))
+            parts.extend(buf)
+            outF.write("{0}\t{1}\n".format(otuID, '\t'.join(parts)))
+
+    return len(buffers)
+
+
+def write_condensed_otus(otus, outF):
+    for otuID, seqIDs in otus.iteritems():
+        outF.write("{0}\t{1}\n".format(otuID, '\t'.join(seqIDs)))
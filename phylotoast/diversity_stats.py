@@ -0,0 +1,210 @@
+"""
+:Date: Created on Oct 16, 2026
+:Abstract: This module compares alpha diversity between groups of samples. All
+           pairwise Mann-Whitney U tests, for every pair of groups and every metric,
+           are run as one batch over a pool of processes, corrected for multiple
+           testing together, and returned as a single tidy results table. P-values
+           can also be estimated by permutation: the label permutations are drawn
+           as one index matrix per chunk and the rank statistic is evaluated for
+           all of them with a single matrix product.
+"""
+from __future__ import division
+import sys
+import csv
+import multiprocessing as mp
+from collections import namedtuple
+from itertools import combinations
+try:
+    import numpy as np
+    import scipy.stats as stats
+except ImportError as ie:
+    sys.exit("Please install missing module: {}.".format(ie))
+
+CORRECTIONS = ("fdr_bh", "holm", "bonferroni", "none")
+
+MannWhitneyResult = namedtuple("MannWhitneyResult",
+                               "metric group1 group2 n1 n2 U p p_adj")
+
+
+def p_adjust(pvalues, method="fdr_bh"):
+    """
+    Correct p-values for multiple testing. NaN p-values (tests that could not be
+    run) are kept as NaN and do not count towards the number of tests.
+
+    :type pvalues: list
+    :param pvalues: The uncorrected p-values.
+
+    :type method: str
+    :param method: "fdr_bh" (Benjamini-Hochberg false discovery rate), "holm"
+                   (Holm-Bonferroni), "bonferroni" or "none".
+
+    :rtype: numpy.ndarray
+    :return: The adjusted p-values, in the same order.
+    """
+    if method not in CORRECTIONS:
+        raise ValueError("Unknown multiple testing correction: {}".format(method))
+    pvalues = np.asarray(pvalues, dtype=float)
+    adjusted = pvalues.copy()
+    valid = ~np.isnan(pvalues)
+    p = pvalues[valid]
+    m = len(p)
+    if method == "none" or m == 0:
+        return adjusted
+
+    order = np.argsort(p)
+    ranked = p[order]
+    if method == "bonferroni":
+        ranked = ranked * m
+    elif method == "holm":
+        ranked = np.maximum.accumulate(ranked * (m - np.arange(m)))
+    else:
+        ranked = np.minimum.accumulate((ranked * m / np.arange(1, m + 1))[::-1])[::-1]
+    p[order] = np.minimum(ranked, 1)
+    adjusted[valid] = p
+    return adjusted
+
+
+def _rank_sum_statistic(ranks, indicator, sizes):
+    """
+    The Kruskal-Wallis H statistic, without the tie correction, for each row of
+    ranks (one row per permutation).
+    """
+    n = ranks.shape[-1]
+    sums = ranks.dot(indicator)
+    return 12 / (n * (n + 1)) * (sums ** 2 / sizes).sum(axis=-1) - 3 * (n + 1)
+
+
+def permutation_test(groups, permutations=9999, seed=None, chunk_size=1000):
+    """
+    Test for a difference between groups with a permutation Kruskal-Wallis test.
+    The group labels are permuted over the pooled samples; for two groups this is
+    equivalent to a two-sided Mann-Whitney U test.
+
+    :type groups: list
+    :param groups: The values of each group.
+
+    :type permutations: int
+    :param permutations: The number of label permutations.
+
+    :type seed: int
+    :param seed: Seed for the random number generator, for reproducible p-values.
+
+    :type chunk_size: int
+    :param chunk_size: The number of permutations evaluated at once. Memory use is
+                       proportional to chunk_size x the number of samples. The
+                       result does not depend on it.
+
+    :rtype: tuple
+    :return: The (tie corrected) H statistic and the permutation p-value,
+             (1 + #permutations with H >= observed H) / (1 + permutations). Both
+             are NaN if there are fewer than two non-empty groups or all values
+             are identical.
+    """
+    groups = [np.asarray(g, dtype=float) for g in groups if len(g)]
+    if len(groups) < 2:
+        return np.nan, np.nan
+    ranks = stats.rankdata(np.concatenate(groups))
+    ties = stats.tiecorrect(ranks)
+    if ties == 0:
+        return np.nan, np.nan
+    n = len(ranks)
+    labels = np.repeat(np.arange(len(groups)), [len(g) for g in groups])
+    indicator = np.zeros((n, len(groups)))
+    indicator[np.arange(n), labels] = 1
+    sizes = indicator.sum(axis=0)
+
+    observed = _rank_sum_statistic(ranks, indicator, sizes)
+    # allow for rounding differences between equal statistics
+    threshold = observed - 1e-9 * max(1, abs(observed))
+    rng = np.random.RandomState(seed)
+    hits = 0
+    for start in xrange(0, permutations, chunk_size):
+        size = min(chunk_size, permutations - start)
+        index = rng.rand(size, n).argsort(axis=1)
+        perm_stats = _rank_sum_statistic(ranks[index], indicator, sizes)
+        hits += (perm_stats >= threshold).sum()
+    return observed / ties, (hits + 1) / (permutations + 1)
+
+
+def _mannwhitney(task):
+    metric, group1, group2, x, y, permutations, seed = task
+    U, p = np.nan, np.nan
+    if x and y:
+        try:
+            U, p = stats.mannwhitneyu(x, y, alternative="two-sided")
+        except ValueError:
+            # e.g. all values are identical
+            pass
+    if permutations and not np.isnan(p):
+        p = permutation_test([x, y], permutations, seed)[1]
+    return MannWhitneyResult(metric, group1, group2, len(x), len(y), U, p, np.nan)
+
+
+def pairwise_mannwhitney(diversities, processes=1, correction="fdr_bh",
+                         permutations=0, seed=None):
+    """
+    Compute the two-sided Mann-Whitney U test for every pair of groups and every
+    metric. The p-values of all tests are corrected together.
+
+    :type diversities: dict
+    :param diversities: {metric: {group: diversity values}}, e.g. the calc_diversity
+                        results of diversity.py for each metric. An OrderedDict
+                        keeps the metric order in the results.
+
+    :type processes: int
+    :param processes: The number of worker processes.
+
+    :type correction: str
+    :param correction: One of CORRECTIONS, see p_adjust().
+
+    :type permutations: int
+    :param permutations: If nonzero, the p-values are estimated from this many
+                         label permutations (see permutation_test()) instead of the
+                         normal approximation.
+
+    :type seed: int
+    :param seed: Seed for the permutations. Test i uses seed + i, so results do not
+                 depend on the number of processes.
+
+    :rtype: list
+    :return: One MannWhitneyResult per test, by metric then group pair. Tests that
+             cannot be run, e.g. because a group is empty, have NaN U and p-values
+             and do not count towards the multiple testing correction.
+    """
+    tasks = []
+    for metric, groups in diversities.items():
+        for g1, g2 in combinations(sorted(groups), 2):
+            task_seed = None if seed is None else seed + len(tasks)
+            tasks.append((metric, g1, g2, list(groups[g1]), list(groups[g2]),
+                          permutations, task_seed))
+
+    if processes > 1 and len(tasks) > 1:
+        pool = mp.Pool(processes)
+        try:
+            results = pool.map(_mannwhitney, tasks)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = map(_mannwhitney, tasks)
+
+    p_adj = p_adjust([r.p for r in results], correction)
+    return [r._replace(p_adj=pa) for r, pa in zip(results, p_adj)]
+
+
+def write_results(results, outF):
+    """
+    Write test results as a tab-separated table with a header row.
+
+    :type results: list
+    :param results: namedtuple results, e.g. from pairwise_mannwhitney().
+
+    :type outF: file
+    :param outF: An open file (or sys.stdout).
+    """
+    if not results:
+        return
+    out = csv.writer(outF, delimiter="\t", lineterminator="\n")
+    out.writerow(results[0]._fields)
+    for r in results:
+        out.writerow(r)
@@ -0,0 +1,179 @@
+"""
+:Date: Created on Oct 16, 2026
+:Abstract: This module provides random access to the records of a FASTA file, such as
+           an OTU representative set, through a persistent byte-offset index and a
+           memory map of the file. Selecting a subset of records only reads those
+           records instead of parsing the whole file.
+"""
+import os
+import mmap
+from collections import namedtuple, OrderedDict
+from phylotoast.util import FASTARecord
+
+INDEX_EXT = ".idx"
+INDEX_HEADER = "#phylotoast_fasta_index"
+
+IndexEntry = namedtuple("IndexEntry", "id length header_offset seq_offset end_offset")
+
+
+def build_index(fasta_fp):
+    """
+    Scan a FASTA file once and record the byte offsets of every record. When an ID
+    occurs more than once, only the first record is indexed.
+
+    :type fasta_fp: str
+    :param fasta_fp: Path to an uncompressed FASTA file.
+
+    :rtype: OrderedDict
+    :return: IndexEntry tuples keyed on sequence ID, in file order.
+    """
+    entries = OrderedDict()
+    current = None
+    offset = 0
+    length = 0
+
+    def conclude(end):
+        if current is not None and current[0] not in entries:
+            entries[current[0]] = IndexEntry(current[0], length, current[1], current[2],
+                                             end)
+
+    with open(fasta_fp, "rb") as fastaF:
+        for line in fastaF:
+            if line.startswith(">"):
+                conclude(offset)
+                seqID = line[1:].split(None, 1)[0] if line[1:].strip() else ""
+                current = (seqID, offset, offset + len(line))
+                length = 0
+            elif not line.startswith(";"):
+                length += len(line.strip())
+            offset += len(line)
+    conclude(offset)
+    return entries
+
+
+def write_index(entries, fasta_fp, index_fp):
+    """
+    Write the index to a tab-separated file. The first line records the size and
+    modification time of the FASTA file so that stale indexes can be detected.
+
+    :type entries: OrderedDict
+    :param entries: Output of build_index().
+
+    :type fasta_fp: str
+    :param fasta_fp: Path to the indexed FASTA file.
+
+    :type index_fp: str
+    :param index_fp: Path to the index file to write.
+    """
+    stat = os.stat(fasta_fp)
+    with open(index_fp, "w") as idxF:
+        idxF.write("{}\t{}\t{!r}\n".format(INDEX_HEADER, stat.st_size, stat.st_mtime))
+        for entry in entries.values():
+            idxF.write("\t".join(str(field) for field in entry) + "\n")
+
+
+def read_index(fasta_fp, index_fp):
+    """
+    Load an index written by write_index().
+
+    :rtype: OrderedDict or None
+    :return: IndexEntry tuples keyed on sequence ID, or None if the index file does not
+             exist or no longer matches the FASTA file.
+    """
+    if not os.path.exists(index_fp):
+        return None
+    stat = os.stat(fasta_fp)
+    entries = OrderedDict()
+    with open(index_fp, "rU") as idxF:
+        header = idxF.readline().rstrip("\n").split("\t")
+        if header != [INDEX_HEADER, str(stat.st_size), repr(stat.st_mtime)]:
+            return None
+        for line in idxF:
+            line = line.rstrip("\n").split("\t")
+            entries[line[0]] = IndexEntry(line[0], *[int(field) for field in line[1:]])
+    return entries
+
+
+class FASTAIndex(object):
+    """
+    Dictionary-like, read-only access to the records of a FASTA file keyed on sequence
+    ID. The offset index is stored next to the FASTA file (with the .idx extension by
+    default) the first time the file is opened and reused on later runs as long as the
+    FASTA file has not changed. Records are read on demand from a memory map of the
+    file.
+
+    :type fasta_fp: str
+    :param fasta_fp: Path to an uncompressed FASTA file.
+
+    :type index_fp: str
+    :param index_fp: Path to the index file. By default, fasta_fp + ".idx".
+
+    :type rebuild: bool
+    :param rebuild: If True, rebuild the index even if an up to date one exists.
+    """
+    def __init__(self, fasta_fp, index_fp=None, rebuild=False):
+        if fasta_fp.endswith((".gz", ".bz2")):
+            raise ValueError("Compressed FASTA files cannot be indexed: {}"
+                             .format(fasta_fp))
+        self.fasta_fp = fasta_fp
+        self.index_fp = fasta_fp + INDEX_EXT if index_fp is None else index_fp
+
+        self.entries = None if rebuild else read_index(fasta_fp, self.index_fp)
+        if self.entries is None:
+            self.entries = build_index(fasta_fp)
+            try:
+                write_index(self.entries, fasta_fp, self.index_fp)
+            except IOError:
+                # read-only location; keep the in-memory index for this run
+                pass
+
+        self._fastaF = open(fasta_fp, "rb")
+        self._mm = None
+        if os.path.getsize(fasta_fp) > 0:
+            self._mm = mmap.mmap(self._fastaF.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __getitem__(self, seqID):
+        entry = self.entries[seqID]
+        header = self._mm[entry.header_offset + 1:entry.seq_offset].strip().split(None, 1)
+        data = "".join(line.strip() for line in
+                       self._mm[entry.seq_offset:entry.end_offset].splitlines()
+                       if not line.startswith(";"))
+        return FASTARecord(entry.id, "".join(header[1:]), data)
+
+    def __contains__(self, seqID):
+        return seqID in self.entries
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def keys(self):
+        return self.entries.keys()
+
+    def fetch(self, seqIDs):
+        """
+        Retrieve the records for a collection of sequence IDs. IDs not present in the
+        FASTA file are skipped.
+
+        :type seqIDs: iterable
+        :param seqIDs: The sequence IDs to retrieve.
+
+        :rtype: generator
+        :return: FASTA records in the order they appear in the file.
+        """
+        selected = [self.entries[sid] for sid in set(seqIDs) if sid in self.entries]
+        for entry in sorted(selected, key=lambda e: e.header_offset):
+            yield self[entry.id]
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+        self._fastaF.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
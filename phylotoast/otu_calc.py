@@ -1,14 +1,18 @@
 from __future__ import division
 import ast
 from collections import defaultdict
+import numpy as np
+from scipy import sparse
 from phylotoast import biom_calc as bc
+from phylotoast import taxonomy
 
 
 def otu_name(tax):
     """
     Determine a simple Genus-species identifier for an OTU, if possible.
     If OTU is not identified to the species level, name it as
-    Unclassified (familly/genus/etc...).
+    Unclassified (familly/genus/etc...). Results are cached; see
+    phylotoast.taxonomy.
 
     :type tax: list
     :param tax: QIIME-style taxonomy identifiers, e.g.
@@ -18,20 +22,7 @@ def otu_name(tax):
     :return: Returns genus-species identifier based on identified taxonomical
              level.
     """
-    extract_name = lambda lvl: "_".join(lvl.split("_")[2:])
-    spname = "spp."
-    for lvl in tax[::-1]:
-        if len(lvl) <= 3:
-            continue
-        if lvl.startswith("s"):
-            spname = extract_name(lvl)
-        elif lvl.startswith("g"):
-            return "{}_{}".format(extract_name(lvl), spname)
-        else:
-            if spname != "spp.":
-                return spname
-            else:
-                return "Unclassified_{}".format(extract_name(lvl))
+    return taxonomy.otu_name(tax)
 
 def load_core_file(core_fp):
     """
@@ -47,19 +38,43 @@ def load_core_file(core_fp):
         return {otu_name(ast.literal_eval(line.split("\t")[1]))
                 for line in in_f.readlines()[1:]}
 
-def assign_otu_membership(biomfile):
+def otu_presence(biomfile):
+    """
+    Build a presence/absence matrix from the sparse structure of a BIOM table without
+    modifying the table.
+    :type biomfile: biom.table.Table
+    :param biomfile: BIOM table object from the biom-format library.
+    :rtype: scipy.sparse.csc_matrix
+    :return: Returns a boolean OTU (rows) x Sample (columns) matrix in the same order
+    as the table IDs, True wherever the OTU was observed in the sample.
+    """
+    counts = sparse.csc_matrix(biomfile.matrix_data)
+    presence = sparse.csc_matrix((counts.data != 0, counts.indices, counts.indptr),
+                                 shape=counts.shape)
+    presence.eliminate_zeros()
+    return presence
+
+
+def assign_otu_membership(biomfile, as_array=False):
     """
     Determines the OTUIDs present in each sample.
     :type biomfile: biom.table.Table
     :param biomfile: BIOM table object from the biom-format library.
+    :type as_array: bool
+    :param as_array: If True, each sample is mapped to a boolean array aligned with
+    biomfile.ids("observation") instead of a set of OTUIDs.
     :rtype: dict
     :return: Returns a dictionary keyed on Sample ID with sets containing
     the IDs of OTUIDs found in each sample.
     """
+    presence = otu_presence(biomfile)
+    otuids = biomfile.ids("observation")
     samples = defaultdict(set)
-    _ = biomfile.pa()
-    for sid in biomfile.ids():
-        for otuid in biomfile.ids("observation"):
-            if biomfile.get_value_by_ids(otuid, sid) == 1:
-                samples[sid].add(otuid)
+    for col, sid in enumerate(biomfile.ids()):
+        rows = presence.indices[presence.indptr[col]:presence.indptr[col + 1]]
+        if as_array:
+            samples[sid] = np.zeros(len(otuids), dtype=bool)
+            samples[sid][rows] = True
+        elif len(rows):
+            samples[sid].update(otuids[rows])
     return samples
@@ -0,0 +1,213 @@
+"""
+:Date: Created on Oct 16, 2026
+:Abstract: This module splits a sequence file into partitions for distributed OTU
+           picking and merges the per-partition pick OTUs result files back into a
+           single result, either in memory or with bounded memory through sorted
+           temporary run files. It is used by split_sequence_data.py,
+           merge_otu_results.py and multi_parallel_pick_otus.py.
+"""
+import os
+import heapq
+import shutil
+import tempfile
+import os.path as osp
+from itertools import cycle, groupby
+from operator import itemgetter
+from collections import defaultdict
+from phylotoast import util
+
+
+def assign_partitions(records, partitions, balance='count'):
+    """
+    Assign each record to a partition as it is read.
+
+    :@type records: iterable
+    :@param records: FASTA records, e.g. from util.iterFASTA()
+
+    :@type partitions: int
+    :@param partitions: The number of partitions
+
+    :@type balance: str
+    :@param balance: 'count' deals records out round-robin so that each partition
+                     receives the same number of sequences. 'bases' sends each record
+                     to the partition with the fewest bases so far, so that partitions
+                     hold roughly equal amounts of sequence data.
+
+    :@rtype: generator
+    :@return: (partition index, record) pairs
+    """
+    if balance == 'bases':
+        heap = [(0, i) for i in xrange(partitions)]
+        for rec in records:
+            bases, i = heapq.heappop(heap)
+            yield i, rec
+            heapq.heappush(heap, (bases + len(rec.data), i))
+    else:
+        ring = cycle(xrange(partitions))
+        for rec in records:
+            yield ring.next(), rec
+
+
+def stream_split_data(fastaFN, partitions, output_dir, balance='count',
+                      buffer_size=1048576):
+    """
+    Split the input sequence file without holding it in memory. One buffered writer
+    is kept open per partition and each record is written to its partition file
+    (output_dir/0.fna, 1.fna, ...) as soon as it is parsed.
+
+    :@type fastaFN: str
+    :@param fastaFN: The sequence data file to be split up (may be gzip/bz2)
+
+    :@type buffer_size: int
+    :@param buffer_size: The write buffer size in bytes for each output file
+
+    :@rtype: list
+    :@return: The [sequence count, base count] written to each partition
+    """
+    stats = [[0, 0] for _ in xrange(partitions)]
+    outFs = [open(osp.join(output_dir, '%i.fna' % i), 'w', buffer_size)
+             for i in xrange(partitions)]
+    try:
+        for i, rec in assign_partitions(util.iterFASTA(fastaFN), partitions,
+                                        balance):
+            outFs[i].write('>{0.id} {0.descr}\n{0.data}\n'.format(rec))
+            stats[i][0] += 1
+            stats[i][1] += len(rec.data)
+    finally:
+        for outF in outFs:
+            outF.close()
+
+    return stats
+
+
+def merge_results(results_FNs):
+    otus = defaultdict(list)
+    for fn in results_FNs:
+        with open(fn, 'rU') as resultF:
+            for line in resultF:
+                line = line.split()
+                otus[line[0]].extend(line[1:])
+    return otus
+
+
+def write_run(otus, tmp_dir):
+    """
+    Write buffered OTU entries to a temporary file sorted by OTU ID.
+
+    :@type otus: dict
+    :@param otus: OTU ID keyed lists of tab-separated sequence ID strings
+
+    :@rtype: str
+    :@return: Path to the sorted run file
+    """
+    fd, run_fn = tempfile.mkstemp(suffix='.txt', dir=tmp_dir)
+    with os.fdopen(fd, 'w') as runF:
+        for otuID in sorted(otus):
+            runF.write('{}\t{}\n'.format(otuID, '\t'.join(otus[otuID])))
+    return run_fn
+
+
+def read_run(run_fn):
+    with open(run_fn) as runF:
+        for line in runF:
+            otuID, _, seqIDs = line.rstrip('\n').partition('\t')
+            yield otuID, seqIDs
+
+
+def merge_runs(run_FNs, outF):
+    """
+    Merge sorted run files into one line per OTU, sorted by OTU ID. OTUs without
+    sequence IDs are kept, as in merge_results().
+
+    :@type run_FNs: list
+    :@param run_FNs: Paths to run files sorted by OTU ID
+
+    :@type outF: file
+    :@param outF: Open file the merged entries are written to
+
+    :@rtype: int
+    :@return: The number of OTUs written
+    """
+    num_otus = 0
+    merged = heapq.merge(*[read_run(run_fn) for run_fn in run_FNs])
+    for otuID, entries in groupby(merged, key=itemgetter(0)):
+        outF.write(otuID)
+        empty = True
+        for _, seqIDs in entries:
+            if seqIDs:
+                outF.write('\t' + seqIDs)
+                empty = False
+        outF.write('\t\n' if empty else '\n')
+        num_otus += 1
+    return num_otus
+
+
+def external_merge_results(results_FNs, outF, max_memory=256, tmp_dir=None,
+                           fan_in=64):
+    """
+    Merge pick OTUs result files with bounded memory. Entries are buffered until
+    about max_memory MB of sequence IDs have been read, then spilled to a temporary
+    run file sorted by OTU ID. The runs are combined with k-way merges of at most
+    fan_in files at a time, in as many passes as needed, and written out one OTU at
+    a time, sorted by OTU ID.
+
+    :@type results_FNs: list
+    :@param results_FNs: The pick OTUs result files to merge
+
+    :@type outF: file
+    :@param outF: Open file the merged results are written to
+
+    :@type max_memory: float
+    :@param max_memory: Approximate amount of sequence ID data (in MB) to hold in
+                        memory before spilling a sorted run to disk
+
+    :@type tmp_dir: str
+    :@param tmp_dir: Directory for the temporary run files. By default, the system
+                     temporary directory is used.
+
+    :@type fan_in: int
+    :@param fan_in: The maximum number of run files open at once
+
+    :@rtype: int
+    :@return: The number of OTUs written
+    """
+    limit = max_memory * 1024 ** 2
+    run_dir = tempfile.mkdtemp(prefix='merge_otus_', dir=tmp_dir)
+    try:
+        runs = []
+        otus = defaultdict(list)
+        buffered = 0
+        for fn in results_FNs:
+            with open(fn, 'rU') as resultF:
+                for line in resultF:
+                    line = line.split(None, 1)
+                    if not line:
+                        continue
+                    entries = otus[line[0]]
+                    if len(line) < 2:
+                        continue
+                    seqIDs = '\t'.join(line[1].split())
+                    entries.append(seqIDs)
+                    buffered += len(seqIDs)
+                    if buffered >= limit:
+                        runs.append(write_run(otus, run_dir))
+                        otus = defaultdict(list)
+                        buffered = 0
+        if otus:
+            runs.append(write_run(otus, run_dir))
+        del otus
+
+        # merge in passes until few enough runs remain to be opened at once
+        fan_in = max(2, fan_in)
+        while len(runs) > fan_in:
+            batch, runs = runs[:fan_in], runs[fan_in:]
+            fd, run_fn = tempfile.mkstemp(suffix='.txt', dir=run_dir)
+            with os.fdopen(fd, 'w') as runF:
+                merge_runs(batch, runF)
+            for batch_fn in batch:
+                os.remove(batch_fn)
+            runs.append(run_fn)
+
+        return merge_runs(runs, outF)
+    finally:
+        shutil.rmtree(run_dir)
@@ -0,0 +1,181 @@
+"""
+:Date: Created on Oct 16, 2026
+:Abstract: This module rarefies OTU tables: each sample's counts are subsampled
+           without replacement to one or more depths, for a number of iterations,
+           directly from the nonzero entries of a sparse sample x OTU matrix.
+           Samples are processed in parallel over a pool of processes. The rarefied
+           tables can be passed to the alpha diversity calculations, or summarized
+           as rarefaction curves.
+"""
+from __future__ import division
+import sys
+import multiprocessing as mp
+from collections import namedtuple
+from phylotoast import alpha_diversity as ad
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError as ie:
+    sys.exit("Please install missing module: {}.".format(ie))
+
+RarefiedTable = namedtuple("RarefiedTable", "depth iteration sample_ids counts")
+
+
+def _rng(seed, iteration, sample):
+    if seed is None:
+        return np.random.RandomState()
+    return np.random.RandomState([seed, iteration, sample])
+
+
+def _read_order(total, size, rng):
+    """
+    The first size reads of a random ordering of total reads. For small fractions
+    of the reads, repeated uniform draws are skipped instead of permuting all reads;
+    the distinct reads in order of first draw are an equally random ordering.
+    """
+    if size == 0:
+        return np.empty(0, dtype=np.int64)
+    if 2 * size > total:
+        return rng.permutation(total)[:size]
+    n_draws = int(-total * np.log1p(-size / total) * 1.1) + 16
+    draws = np.empty(0, dtype=np.int64)
+    while True:
+        draws = np.concatenate([draws, rng.randint(0, total, n_draws)])
+        _, first = np.unique(draws, return_index=True)
+        if len(first) >= size:
+            return draws[np.sort(first)[:size]]
+        n_draws = n_draws // 4 + 16
+
+
+def subsample(sample_counts, depths, rng):
+    """
+    Subsample the reads of one sample without replacement, to each of the depths.
+    A single random ordering of the reads is drawn and its first d reads are taken
+    for depth d, so each subsample is a multivariate hypergeometric draw and the
+    subsamples of one iteration are nested.
+
+    :type sample_counts: numpy.ndarray
+    :param sample_counts: The nonzero OTU counts of the sample (integers).
+
+    :type depths: list
+    :param depths: Sorted depths, each at most the sample total.
+
+    :type rng: numpy.random.RandomState
+    :param rng: The random number generator.
+
+    :rtype: numpy.ndarray
+    :return: A depths x OTUs array of subsampled counts.
+    """
+    result = np.zeros((len(depths), len(sample_counts)), dtype=np.int64)
+    if not depths:
+        return result
+    total = int(sample_counts.sum())
+    reads = _read_order(total, depths[-1], rng)
+    # the OTU of each read, with reads numbered consecutively by OTU
+    otus = np.searchsorted(np.cumsum(sample_counts), reads, side="right")
+    for i, depth in enumerate(depths):
+        result[i] = np.bincount(otus[:depth], minlength=len(sample_counts))
+    return result
+
+
+def _subsample_task(task):
+    sample_counts, depths, seed, iteration, sample = task
+    return subsample(sample_counts, depths, _rng(seed, iteration, sample))
+
+
+def rarefy(counts, sample_ids, depths, iterations=10, processes=1, seed=None):
+    """
+    Rarefy a table to each depth, iterations times. Samples with fewer counts than a
+    depth are left out of the tables at that depth.
+
+    :type counts: scipy.sparse matrix
+    :param counts: Sample (rows) x OTU (columns) counts, e.g.
+                   phylotoast.biom_io.BIOMFile.matrix("sample").
+
+    :type sample_ids: list
+    :param sample_ids: The sample IDs in row order.
+
+    :type depths: list
+    :param depths: The rarefaction depths (non-negative; 0 gives empty samples).
+
+    :type iterations: int
+    :param iterations: The number of rarefied tables per depth.
+
+    :type processes: int
+    :param processes: The number of worker processes; samples are distributed
+                      between them.
+
+    :type seed: int
+    :param seed: Seed for reproducible tables. Each sample and iteration has its own
+                 random stream, so the tables do not depend on processes.
+
+    :rtype: generator
+    :return: A RarefiedTable(depth, iteration, sample_ids, counts) for each
+             iteration and depth, with a sample x OTU CSR counts matrix.
+    """
+    depths = sorted(set(int(d) for d in depths))
+    if depths and depths[0] < 0:
+        raise ValueError("Rarefaction depths must not be negative: {}"
+                         .format(depths[0]))
+    counts = sparse.csr_matrix(counts, dtype=np.int64)
+    counts.eliminate_zeros()
+    counts.sort_indices()
+    totals = np.asarray(counts.sum(axis=1)).ravel()
+    sample_ids = np.asarray(sample_ids, dtype=object)
+    rows = [counts.data[counts.indptr[i]:counts.indptr[i + 1]]
+            for i in xrange(counts.shape[0])]
+    otus = [counts.indices[counts.indptr[i]:counts.indptr[i + 1]]
+            for i in xrange(counts.shape[0])]
+    sample_depths = [[d for d in depths if d <= total] for total in totals]
+    empty = np.array([], dtype=np.int64)
+
+    pool = mp.Pool(processes) if processes > 1 else None
+    try:
+        for iteration in xrange(iterations):
+            tasks = ((row, sd, seed, iteration, i)
+                     for i, (row, sd) in enumerate(zip(rows, sample_depths)))
+            if pool is not None:
+                chunksize = max(1, len(rows) // (4 * processes))
+                subsamples = pool.map(_subsample_task, tasks, chunksize)
+            else:
+                subsamples = map(_subsample_task, tasks)
+
+            for di, depth in enumerate(depths):
+                kept = np.flatnonzero(totals >= depth)
+                data = np.concatenate([empty] + [subsamples[i][di] for i in kept])
+                indices = np.concatenate([empty] + [otus[i] for i in kept])
+                indptr = np.concatenate([[0], np.cumsum(np.diff(counts.indptr)[kept])])
+                table = sparse.csr_matrix((data, indices, indptr),
+                                          shape=(len(kept), counts.shape[1]))
+                table.eliminate_zeros()
+                yield RarefiedTable(depth, iteration, list(sample_ids[kept]), table)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+
+def rarefaction_curve(counts, sample_ids, metric, depths, iterations=10, processes=1,
+                      seed=None):
+    """
+    Calculate an alpha diversity metric on rarefied tables at each depth.
+
+    :type metric: str or function
+    :param metric: See phylotoast.alpha_diversity.alpha_diversity().
+
+    Other parameters are as for rarefy().
+
+    :rtype: tuple
+    :return: The sorted depths and two samples x depths arrays: the mean and the
+             standard deviation of the metric over the iterations. Both are NaN
+             where a sample has fewer counts than the depth.
+    """
+    depths = sorted(set(int(d) for d in depths))
+    index = {sid: i for i, sid in enumerate(sample_ids)}
+    values = np.full((iterations, len(sample_ids), len(depths)), np.nan)
+    for table in rarefy(counts, sample_ids, depths, iterations, processes, seed):
+        rows = [index[sid] for sid in table.sample_ids]
+        values[table.iteration, rows, depths.index(table.depth)] = \
+            ad.alpha_diversity(table.counts, metric)
+    with np.errstate(invalid="ignore"):
+        return depths, values.mean(axis=0), values.std(axis=0)
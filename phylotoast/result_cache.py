@@ -0,0 +1,143 @@
+"""
+:Date: Created on Oct 16, 2026
+:Abstract: This module provides a size-bounded, on-disk cache of NumPy arrays, such
+           as per-sample diversity values. Entries are keyed on a content digest of
+           the OTU table they were calculated from plus a name (e.g. the metric), so
+           results are reused across runs only while the table is unchanged. The
+           least recently used entries are removed once the cache exceeds its size.
+"""
+import os
+import os.path as osp
+import sys
+import hashlib
+import tempfile
+try:
+    import numpy as np
+except ImportError as ie:
+    sys.exit("Please install missing module: {}.".format(ie))
+
+DEFAULT_CACHE_DIR = osp.join(osp.expanduser("~"), ".cache", "phylotoast")
+
+
+def table_digest(ids, counts):
+    """
+    Hash the content of an OTU table, independently of the file format it was
+    stored in.
+
+    :type ids: list
+    :param ids: The IDs of the matrix rows, e.g. the sample IDs.
+
+    :type counts: scipy.sparse.csr_matrix
+    :param counts: The table counts.
+
+    :rtype: str
+    :return: A hex SHA-1 digest of the IDs, shape and CSR arrays of the table.
+    """
+    counts = counts.tocsr()
+    counts.sort_indices()
+    sha = hashlib.sha1()
+    sha.update("\t".join(ids).encode("utf-8"))
+    sha.update(str(counts.shape).encode("utf-8"))
+    for array, dtype in ((counts.indptr, np.int64), (counts.indices, np.int64),
+                         (counts.data, np.float64)):
+        sha.update(np.ascontiguousarray(array, dtype=dtype).tobytes())
+    return sha.hexdigest()
+
+
+class ResultCache(object):
+    """
+    Store arrays as .npy files in a directory, keeping the total size of the
+    directory's entries under max_size bytes.
+
+    :type cache_dir: str
+    :param cache_dir: The cache directory, created if necessary.
+
+    :type max_size: int
+    :param max_size: The maximum total size of the cached files, in bytes.
+    """
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_size=256 * 1024 ** 2):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        if not osp.isdir(cache_dir):
+            os.makedirs(cache_dir)
+
+    def path(self, digest, name):
+        return osp.join(self.cache_dir, "{}_{}.npy".format(digest, name))
+
+    def get(self, digest, name):
+        """
+        :rtype: numpy.ndarray
+        :return: The cached array, or None if there is no entry for digest and name.
+        """
+        fp = self.path(digest, name)
+        try:
+            values = np.load(fp)
+        except (IOError, ValueError):
+            return None
+        # mark the entry as recently used
+        os.utime(fp, None)
+        return values
+
+    def put(self, digest, name, values):
+        """
+        Cache an array, then evict the least recently used entries if the cache is
+        over its size limit. The file is written under a temporary name and moved
+        into place, so concurrent readers never see a partial entry.
+        """
+        fd, tmp_fp = tempfile.mkstemp(suffix=".tmp", dir=self.cache_dir)
+        with os.fdopen(fd, "wb") as outF:
+            np.save(outF, values)
+        os.rename(tmp_fp, self.path(digest, name))
+        self.evict()
+
+    def entries(self):
+        """
+        :rtype: list
+        :return: (modification time, size, path) of each cached file, least recently
+                 used first.
+        """
+        entries = []
+        for fn in os.listdir(self.cache_dir):
+            if fn.endswith(".npy"):
+                fp = osp.join(self.cache_dir, fn)
+                try:
+                    st = os.stat(fp)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, fp))
+        return sorted(entries)
+
+    def size(self):
+        """
+        :rtype: int
+        :return: The total size of the cached files, in bytes.
+        """
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cache fits in max_size.
+
+        :rtype: int
+        :return: The number of entries removed.
+        """
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, fp in entries:
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(fp)
+            except OSError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        """
+        Remove every cached entry.
+        """
+        for _, _, fp in self.entries():
+            os.remove(fp)
@@ -0,0 +1,129 @@
+"""
+:Date: Created on Oct 16, 2026
+:Abstract: This module provides a reusable index for rolling an OTU table up to any
+           taxonomic level. Each OTU row is mapped to an integer group ID per rank
+           once; the counts at a level are then a single product of a sparse
+           group x OTU indicator matrix with the OTU table.
+"""
+import numpy as np
+from scipy import sparse
+from phylotoast import taxonomy as tx
+
+
+def lineage_label(taxa, level):
+    """
+    Label an OTU at a level with its taxonomy truncated to that level, e.g.
+    "k__Bacteria; p__Firmicutes" for the phylum level.
+
+    :type taxa: phylotoast.taxonomy.Taxonomy
+    :param taxa: The OTU taxonomy, padded to species level.
+
+    :type level: int
+    :param level: Index of the level in phylotoast.taxonomy.RANKS.
+
+    :rtype: str
+    :return: The group label.
+    """
+    return "; ".join(taxa[:level + 1])
+
+
+class TaxonomyRollup(object):
+    """
+    Map each OTU (row) of a table to a group at every taxonomic level. Distinct
+    taxonomies are labelled once, so building the index costs one pass over the
+    OTU taxonomies regardless of the number of levels used afterwards.
+
+    :type taxonomies: list
+    :param taxonomies: One taxonomy per OTU row, either a QIIME-formatted string or
+                       a list of rank strings. None is treated as unassigned.
+
+    :type label: function
+    :param label: Called as label(taxonomy, level index) to name the group an OTU
+                  belongs to at a level. OTUs labelled None are left out of that
+                  level. Defaults to lineage_label().
+
+    :type pad: bool
+    :param pad: Pad taxonomies with empty ranks down to species level before
+                labelling them. If False, label() receives the taxonomies as parsed
+                and must handle levels beyond their last rank.
+
+    :ivar labels: {level: array of group labels}, indexed by group ID.
+    :ivar group_ids: {level: int array of the group ID of each OTU row, or -1 for
+                     OTUs left out of the level}.
+    """
+    def __init__(self, taxonomies, label=lineage_label, pad=True):
+        blank = tx.Taxonomy(tx.BLANK_TAXONOMY)
+        distinct = {}
+        rows = np.empty(len(taxonomies), dtype=np.int64)
+        for i, tax in enumerate(taxonomies):
+            taxa = blank if tax is None else tx.parse_taxonomy(tax)
+            if pad:
+                taxa = taxa.padded()
+            rows[i] = distinct.setdefault(taxa, len(distinct))
+        distinct = sorted(distinct, key=distinct.get)
+
+        self.n_otus = len(taxonomies)
+        self.labels = {}
+        self.group_ids = {}
+        for li, level in enumerate(tx.RANKS):
+            names = [label(taxa, li) for taxa in distinct]
+            groups = np.unique([name for name in names if name is not None])
+            index = {name: gid for gid, name in enumerate(groups)}
+            self.labels[level] = groups
+            self.group_ids[level] = np.array([index.get(name, -1) for name in names],
+                                             dtype=np.int64)[rows]
+        self._indicators = {}
+
+    @classmethod
+    def from_table(cls, table, label=lineage_label, metadata_key="taxonomy",
+                   pad=True):
+        """
+        Build the index from the observation metadata of a BIOM table. Both JSON and
+        HDF5 BIOM files can be loaded with biom.load_table().
+
+        :type table: biom.table.Table
+        :param table: BIOM table object from the biom-format library.
+
+        :type metadata_key: str
+        :param metadata_key: The observation metadata field holding the taxonomy.
+        """
+        md = table.metadata(axis="observation")
+        if md is None:
+            taxonomies = [None] * table.shape[0]
+        else:
+            taxonomies = [m.get(metadata_key) if m else None for m in md]
+        return cls(taxonomies, label, pad)
+
+    def indicator(self, level):
+        """
+        :type level: str
+        :param level: One of k, p, c, o, f, g, s.
+
+        :rtype: scipy.sparse.csr_matrix
+        :return: The group x OTU indicator matrix for the level.
+        """
+        if level not in self._indicators:
+            gids = self.group_ids[level]
+            otus = np.flatnonzero(gids >= 0)
+            self._indicators[level] = sparse.csr_matrix(
+                (np.ones(len(otus)), (gids[otus], otus)),
+                shape=(len(self.labels[level]), self.n_otus))
+        return self._indicators[level]
+
+    def aggregate(self, data, level):
+        """
+        Sum the rows of an OTU table (or OTU totals vector) by group.
+
+        :type data: scipy.sparse matrix or numpy.ndarray
+        :param data: OTU (rows) x sample (columns) counts in the same row order as
+                     the taxonomies, e.g. biom.Table.matrix_data, or a 1-D array of
+                     per-OTU values.
+
+        :type level: str
+        :param level: One of k, p, c, o, f, g, s.
+
+        :rtype: tuple
+        :return: The group labels and the group x sample sums (sparse if data is
+                 sparse), or a 1-D array of group sums for 1-D input.
+        """
+        return self.labels[level], self.indicator(level).dot(data)
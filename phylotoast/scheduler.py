@@ -0,0 +1,304 @@
+"""
+:Date: Created on Oct 16, 2026
+:Abstract: This module runs one pick OTUs job per partition of a split sequence file
+           (see split_sequence_data.py) and tracks the jobs until every partition has
+           a result file. Jobs can run as local processes or be submitted to a PBS or
+           SLURM queuing system from a job script template. Failed jobs are retried.
+"""
+import os
+import re
+import abc
+import sys
+import time
+import shlex
+import shutil
+import subprocess
+import os.path as osp
+import multiprocessing as mp
+
+PICK_OTUS_CMD = ("parallel_pick_otus_blast.py -i {fasta_fp} -r {database_path} "
+                 "-O {threads} -s {similarity} -o {output_dir}")
+
+
+class PartitionJob(object):
+    """
+    A pick OTUs job for one partition file. The partition file 3.fna in work_dir is
+    processed into the output directory bpo.3, which holds the result file
+    3_otus.txt, matching the layout of the PBS/SLURM job script templates.
+
+    :type fasta_fp: str
+    :param fasta_fp: Path to the partition sequence file.
+
+    :type work_dir: str
+    :param work_dir: Directory the job runs in. By default, the directory holding the
+                     partition file.
+    """
+    def __init__(self, fasta_fp, work_dir=None):
+        self.fasta_fp = osp.abspath(fasta_fp)
+        self.work_dir = osp.dirname(self.fasta_fp) if work_dir is None else work_dir
+        self.num = osp.splitext(osp.basename(fasta_fp))[0]
+        self.output_dir = osp.join(self.work_dir, "bpo.{}".format(self.num))
+        self.result_fp = osp.join(self.output_dir, "{}_otus.txt".format(self.num))
+        self.log_fp = osp.join(self.work_dir, "{}.log".format(self.num))
+        self.attempts = 0
+        self.returncode = None
+
+    @property
+    def done(self):
+        """
+        A job is complete once it exited cleanly (or its exit status is unknown, as
+        for queued jobs) and its result file exists.
+        """
+        return self.returncode in (None, 0) and osp.exists(self.result_fp)
+
+    def reset(self):
+        """
+        Remove partial output left by a previous attempt.
+        """
+        if osp.isdir(self.output_dir):
+            shutil.rmtree(self.output_dir)
+        self.returncode = None
+
+    def __repr__(self):
+        return "PartitionJob({!r})".format(self.fasta_fp)
+
+
+def run_command(args):
+    """
+    Run a single shell-free command, sending its output to a log file. Defined at
+    module level so it can be dispatched to a multiprocessing pool.
+
+    :type args: tuple
+    :param args: The command string, the working directory and the log file path.
+
+    :rtype: int
+    :return: The exit status of the command, or -1 if it could not be started.
+    """
+    cmd, cwd, log_fp = args
+    with open(log_fp, "a") as logF:
+        logF.write("$ {}\n".format(cmd))
+        logF.flush()
+        try:
+            return subprocess.call(shlex.split(cmd), cwd=cwd, stdout=logF,
+                                   stderr=subprocess.STDOUT)
+        except OSError as oe:
+            logF.write("{}\n".format(oe))
+            return -1
+
+
+class Scheduler(object):
+    """
+    Abstract base class for the job backends. Subclasses implement execute(), which
+    starts the given jobs and blocks until all of them have stopped running.
+
+    :type params: dict
+    :param params: Values substituted into the command or job script template, e.g.
+                   database_path, similarity and threads. The per-job fields
+                   job_num, fasta_fp and output_dir are added automatically.
+
+    :type retries: int
+    :param retries: The number of times a failed job is resubmitted.
+
+    :type verbose: bool
+    :param verbose: Print job progress to stderr.
+    """
+    __metaclass__ = abc.ABCMeta
+
+    def __init__(self, params, retries=2, verbose=False):
+        self.params = dict(params)
+        self.params.setdefault("database_fname",
+                               osp.basename(self.params.get("database_path", "")))
+        self.retries = retries
+        self.verbose = verbose
+
+    def job_fields(self, job):
+        fields = dict(self.params)
+        fields.update(job_num=job.num, fasta_fp=job.fasta_fp,
+                      output_dir=job.output_dir)
+        return fields
+
+    def log(self, msg):
+        if self.verbose:
+            sys.stderr.write(msg + "\n")
+
+    @abc.abstractmethod
+    def execute(self, jobs):
+        """
+        Start the jobs and wait until all of them have stopped running, recording
+        the exit status of each job where the backend reports one.
+
+        :type jobs: list
+        :param jobs: PartitionJob objects.
+        """
+
+    def run(self, jobs):
+        """
+        Run all jobs to completion, retrying failed jobs up to the retry limit. Jobs
+        whose result file already exists (e.g. from an earlier, interrupted run) are
+        not run again.
+
+        :type jobs: list
+        :param jobs: PartitionJob objects.
+
+        :rtype: list
+        :return: The jobs that still failed after all retries; empty on success.
+        """
+        pending = [job for job in jobs if not job.done]
+        if len(pending) < len(jobs):
+            self.log("{} of {} partitions already complete"
+                     .format(len(jobs) - len(pending), len(jobs)))
+        for attempt in xrange(self.retries + 1):
+            if not pending:
+                break
+            if attempt:
+                self.log("Retrying {} failed job(s), attempt {} of {}"
+                         .format(len(pending), attempt + 1, self.retries + 1))
+            for job in pending:
+                job.reset()
+                job.attempts += 1
+            self.execute(pending)
+            pending = [job for job in pending if not job.done]
+        return pending
+
+
+class LocalScheduler(Scheduler):
+    """
+    Run jobs as subprocesses on the local machine, at most processes at a time.
+
+    :type command: str
+    :param command: Command template; by default, QIIME's parallel BLAST pick OTUs
+                    script (see PICK_OTUS_CMD).
+
+    :type processes: int
+    :param processes: The number of jobs to run at once. By default, the number of
+                      CPUs divided by the threads per job.
+    """
+    def __init__(self, params, command=PICK_OTUS_CMD, processes=None, **kwargs):
+        super(LocalScheduler, self).__init__(params, **kwargs)
+        self.command = command
+        if processes is None:
+            processes = max(1, mp.cpu_count() // int(self.params.get("threads", 1)))
+        self.processes = processes
+
+    def execute(self, jobs):
+        tasks = [(self.command.format(**self.job_fields(job)), job.work_dir,
+                  job.log_fp) for job in jobs]
+        pool = mp.Pool(min(self.processes, len(jobs)))
+        try:
+            for job, returncode in zip(jobs, pool.map(run_command, tasks, 1)):
+                job.returncode = returncode
+                self.log("Partition {} finished with exit status {}"
+                         .format(job.num, returncode))
+        finally:
+            pool.close()
+            pool.join()
+
+
+class TemplateScheduler(Scheduler):
+    """
+    Submit jobs to a queuing system from a job script template such as the
+    pbs_job_template.pbs and slurm_job_template.sbatch files included with
+    phylotoast. Each job script is written to the job's working directory and
+    submitted from there; the scheduler then polls the queue until every job has
+    left it. The template jobs report no exit status, so completion is judged by the
+    presence of the result file.
+
+    :type template: str
+    :param template: The job script template.
+
+    :type poll_interval: float
+    :param poll_interval: Seconds to wait between queue status checks.
+    """
+    submit_cmd = None
+    status_cmd = None
+    script_ext = None
+    id_field = 0
+    state_field = 1
+    finished_states = ()
+
+    def __init__(self, params, template, poll_interval=60, **kwargs):
+        super(TemplateScheduler, self).__init__(params, **kwargs)
+        self.template = template
+        self.poll_interval = poll_interval
+
+    def write_script(self, job):
+        script_fp = osp.join(job.work_dir, "{}{}".format(job.num, self.script_ext))
+        with open(script_fp, "w") as outF:
+            outF.write(self.template.format(**self.job_fields(job)))
+        return script_fp
+
+    def submit(self, job):
+        script_fp = self.write_script(job)
+        out = subprocess.check_output(self.submit_cmd + [osp.basename(script_fp)],
+                                      cwd=job.work_dir)
+        return self.parse_job_id(out)
+
+    def parse_job_id(self, out):
+        return out.strip()
+
+    def parse_status(self, out):
+        """
+        Map the job numbers listed in the status command output to their state
+        codes, one job per line with the job ID and the state in the columns given
+        by id_field and state_field.
+        """
+        states = {}
+        for line in out.splitlines():
+            fields = line.split()
+            if len(fields) > max(self.id_field, self.state_field):
+                states[fields[self.id_field].split(".")[0]] = fields[self.state_field]
+        return states
+
+    def queued(self, job_id):
+        """
+        Return True while the queuing system lists the job in a state other than
+        one of the finished_states; completed jobs may stay listed for a while.
+        """
+        with open(os.devnull, "w") as devnull:
+            try:
+                out = subprocess.check_output(self.status_cmd + [job_id],
+                                              stderr=devnull)
+            except subprocess.CalledProcessError:
+                return False
+        state = self.parse_status(out).get(job_id.split(".")[0])
+        return state is not None and state not in self.finished_states
+
+    def execute(self, jobs):
+        running = {}
+        for job in jobs:
+            try:
+                running[self.submit(job)] = job
+            except (OSError, subprocess.CalledProcessError) as err:
+                self.log("Partition {} could not be submitted: {}".format(job.num, err))
+        while running:
+            time.sleep(self.poll_interval)
+            for job_id in [jid for jid in running if not self.queued(jid)]:
+                job = running.pop(job_id)
+                self.log("Partition {} (job {}) left the queue".format(job.num, job_id))
+
+
+class PBSScheduler(TemplateScheduler):
+    submit_cmd = ["qsub"]
+    status_cmd = ["qstat"]
+    script_ext = ".pbs"
+    # Job id, Name, User, Time Use, S, Queue
+    state_field = 4
+    # completed, exiting
+    finished_states = ("C", "E")
+
+
+class SLURMScheduler(TemplateScheduler):
+    submit_cmd = ["sbatch"]
+    status_cmd = ["squeue", "-h", "-o", "%i %t", "-j"]
+    script_ext = ".sbatch"
+    # completed, failed, cancelled, timeout, node failure, out of memory
+    finished_states = ("CD", "F", "CA", "TO", "NF", "OOM")
+
+    def parse_job_id(self, out):
+        # "Submitted batch job 123456"
+        return re.findall(r"\d+", out)[-1]
+
+
+schedulers = {"local": LocalScheduler,
+              "pbs": PBSScheduler,
+              "slurm": SLURMScheduler}
@@ -0,0 +1,213 @@
+"""
+:Date: Created on Oct 16, 2026
+:Abstract: This module provides a shared, cached layer for handling QIIME-formatted
+           taxonomy strings (k__Foo; p__Bar; ...). Large tables repeat the same
+           taxonomy strings for many OTUs, so parsing, truncation and naming results
+           are kept in bounded LRU caches. Hit statistics for every cache are
+           available from cache_info().
+"""
+from collections import OrderedDict, namedtuple
+from functools import wraps
+
+RANKS = ("k", "p", "c", "o", "f", "g", "s")
+BLANK_TAXONOMY = tuple(rank + "__" for rank in RANKS)
+
+CacheInfo = namedtuple("CacheInfo", "hits misses maxsize currsize")
+
+_caches = OrderedDict()
+
+
+def lru_cache(maxsize=8192):
+    """
+    Decorator that memoizes a function of hashable arguments, keeping the maxsize
+    most recently used results. The decorated function gains cache_info()
+    and cache_clear() methods, mirroring functools.lru_cache in Python 3.
+
+    :type maxsize: int
+    :param maxsize: The maximum number of cached results.
+    """
+    def decorating(fn):
+        cache = OrderedDict()
+        stats = [0, 0]
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = args + tuple(sorted(kwargs.items())) if kwargs else args
+            try:
+                result = cache.pop(key)
+                stats[0] += 1
+            except KeyError:
+                stats[1] += 1
+                result = fn(*args, **kwargs)
+                if len(cache) >= maxsize:
+                    cache.popitem(last=False)
+            cache[key] = result
+            return result
+
+        def cache_info():
+            return CacheInfo(stats[0], stats[1], maxsize, len(cache))
+
+        def cache_clear():
+            cache.clear()
+            stats[:] = [0, 0]
+
+        wrapper.cache_info = cache_info
+        wrapper.cache_clear = cache_clear
+        if fn.__module__ == __name__:
+            _caches[fn.__name__] = wrapper
+        return wrapper
+    return decorating
+
+
+def cache_info():
+    """
+    :rtype: dict
+    :return: CacheInfo(hits, misses, maxsize, currsize) keyed on the name of each
+             cached function in this module.
+    """
+    return {name: fn.cache_info() for name, fn in _caches.items()}
+
+
+def cache_clear():
+    """
+    Empty every cache in this module and reset the hit statistics.
+    """
+    for fn in _caches.values():
+        fn.cache_clear()
+
+
+class Taxonomy(tuple):
+    """
+    An immutable, parsed taxonomy: a tuple of rank strings such as
+    ("k__Bacteria", "p__Firmicutes", ...). Use parse_taxonomy() to create instances
+    so that parsing is cached.
+    """
+    __slots__ = ()
+
+    def rank(self, level):
+        """
+        :type level: str
+        :param level: One of k, p, c, o, f, g, s.
+
+        :rtype: str
+        :return: The rank string for the level, e.g. "g__Escherichia", or "" if the
+                 taxonomy does not reach that level.
+        """
+        for rank in self:
+            if rank.startswith(level + "__"):
+                return rank
+        return ""
+
+    def padded(self):
+        """
+        :rtype: Taxonomy
+        :return: This taxonomy with empty ranks appended down to species level.
+        """
+        if len(self) < len(BLANK_TAXONOMY):
+            return Taxonomy(self + BLANK_TAXONOMY[len(self):])
+        return self
+
+    def __str__(self):
+        return "; ".join(self)
+
+    def __repr__(self):
+        return "Taxonomy({!r})".format(tuple(self))
+
+
+@lru_cache()
+def _parse(tax):
+    if isinstance(tax, basestring):
+        tax = tax.split(";")
+    return Taxonomy(level.strip() for level in tax)
+
+
+def parse_taxonomy(tax):
+    """
+    Parse a taxonomy string or list of rank strings.
+
+    :type tax: str or list
+    :param tax: A QIIME-formatted taxonomy string (k__Foo; p__Bar; ...) or a list of
+                rank strings as stored in BIOM observation metadata.
+
+    :rtype: Taxonomy
+    :return: The parsed taxonomy.
+    """
+    return _parse(tax if isinstance(tax, basestring) else tuple(tax))
+
+
+@lru_cache()
+def split_phylogeny(p, level="s"):
+    """
+    Return either the full or truncated version of a QIIME-formatted taxonomy string.
+
+    :type p: str
+    :param p: A QIIME-formatted taxonomy string: k__Foo; p__Bar; ...
+
+    :type level: str
+    :param level: The different level of identification are kingdom (k), phylum (p),
+                  class (c),order (o), family (f), genus (g) and species (s). If level is
+                  not provided, the default level of identification is species.
+
+    :rtype: str
+    :return: A QIIME-formatted taxonomy string up to the classification given
+            by param level.
+    """
+    level = level+"__"
+    result = p.split(level)
+    return result[0]+level+result[1].split(";")[0]
+
+
+@lru_cache()
+def truncate_taxonomy(tax, level="s"):
+    """
+    Pad a taxonomy string with empty ranks down to species level, then truncate it
+    to the given level, as done when condensing OTUs.
+
+    :type tax: str
+    :param tax: A QIIME-formatted taxonomy string: k__Foo; p__Bar; ...
+
+    :type level: str
+    :param level: One of k, p, c, o, f, g, s.
+
+    :rtype: str
+    :return: The padded, truncated taxonomy string.
+    """
+    levels = tax.split("; ")
+    if len(levels) < len(BLANK_TAXONOMY):
+        tax = "; ".join(levels + list(BLANK_TAXONOMY[len(levels):]))
+    return split_phylogeny(tax, level)
+
+
+@lru_cache()
+def _otu_name(tax):
+    extract_name = lambda lvl: "_".join(lvl.split("_")[2:])
+    spname = "spp."
+    for lvl in tax[::-1]:
+        if len(lvl) <= 3:
+            continue
+        if lvl.startswith("s"):
+            spname = extract_name(lvl)
+        elif lvl.startswith("g"):
+            return "{}_{}".format(extract_name(lvl), spname)
+        else:
+            if spname != "spp.":
+                return spname
+            else:
+                return "Unclassified_{}".format(extract_name(lvl))
+
+
+def otu_name(tax):
+    """
+    Determine a simple Genus-species identifier for an OTU, if possible.
+    If OTU is not identified to the species level, name it as
+    Unclassified (familly/genus/etc...).
+
+    :type tax: list
+    :param tax: QIIME-style taxonomy identifiers, e.g.
+                 ["k__Bacteria", u"p__Firmicutes", u"c__Bacilli", ...
+
+    :rtype: str
+    :return: Returns genus-species identifier based on identified taxonomical
+             level.
+    """
+    return _otu_name(tuple(tax))
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+"""
+:Abstract: Automated tests for the vectorized alpha diversity metrics.
+"""
+from __future__ import division
+import unittest
+import numpy as np
+from scipy import sparse
+from phylotoast import alpha_diversity as ad
+from phylotoast.biom_io import BIOMFile
+
+
+def total_counts(counts):
+    return counts.sum()
+
+
+def reference(metric, counts):
+    """
+    Calculate a metric for one dense count vector, as scikit-bio does.
+    """
+    nz = counts[counts.nonzero()].astype(float)
+    n, s = nz.sum(), len(nz)
+    f1, f2 = (nz == 1).sum(), (nz == 2).sum()
+    freqs = nz / n
+    return {"observed_otus": s,
+            "shannon": -(freqs * np.log2(freqs)).sum(),
+            "simpson": 1 - (freqs ** 2).sum(),
+            "chao1": s + f1 * (f1 - 1) / (2 * (f2 + 1)),
+            "goods_coverage": 1 - f1 / n,
+            "berger_parker_d": nz.max() / n}[metric]
+
+
+class alpha_diversity_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.counts = sparse.csr_matrix([[1, 1, 2, 0],
+                                         [0, 0, 0, 0],
+                                         [5, 0, 0, 0]])
+        with BIOMFile("phylotoast/test/test.biom") as bf:
+            self.table = bf.matrix("sample")
+
+    def test_known_values(self):
+        """
+        Testing the metrics against values worked out by hand.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        expected = {"observed_otus": [3, 0, 1],
+                    "singles": [2, 0, 0],
+                    "doubles": [1, 0, 0],
+                    "shannon": [1.5, np.nan, 0],
+                    "simpson": [0.625, np.nan, 0],
+                    "chao1": [3.5, 0, 1],
+                    "goods_coverage": [0.5, np.nan, 1]}
+        for metric, values in expected.items():
+            np.testing.assert_allclose(ad.alpha_diversity(self.counts, metric), values,
+                                       err_msg=metric)
+
+    def test_table(self):
+        """
+        Testing the vectorized metrics against per-sample calculations on a BIOM
+        table.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        dense = self.table.toarray().astype(int)
+        for metric in ["observed_otus", "shannon", "simpson", "chao1",
+                       "goods_coverage", "berger_parker_d"]:
+            np.testing.assert_allclose(ad.alpha_diversity(self.table, metric),
+                                       [reference(metric, row) for row in dense],
+                                       err_msg=metric)
+
+    def test_apply_metric(self):
+        """
+        Testing that per-sample metric functions are applied to dense count vectors,
+        both serially and over a process pool.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        totals = self.table.sum(axis=1).A.ravel()
+        for processes in [1, 2]:
+            np.testing.assert_array_equal(
+                ad.alpha_diversity(self.table, total_counts, processes), totals)
+
+    def test_unknown_metric(self):
+        """
+        Testing that an unknown metric name raises a ValueError.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        self.assertRaises(ValueError, ad.alpha_diversity, self.counts, "no_such")
+
+
+if __name__ == "__main__":
+    unittest.main()
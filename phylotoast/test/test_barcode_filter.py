@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+"""
+:Abstract: Automated tests for the barcode filtering in bin/barcode_filter.py.
+"""
+import os
+import sys
+import unittest
+from StringIO import StringIO
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..",
+                             "bin"))
+import barcode_filter as bf
+
+FASTA = """\
+>S1_1 first
+ACGTTAGGCC
+TTAA
+>S1_2
+acgatagg
+>S2_3
+GGGGACGT
+>S3_4
+ACG
+TTTCC
+"""
+
+QUAL = """\
+>S1_1 first
+40 40 40 40 40 40 40 40 40 40
+40 40 40 40
+>S1_2
+30 30 30 30 30 30 30 30
+>S2_3
+20 20 20 20 20 20 20 20
+>S3_4
+10 10 10 10 10 10 10 10
+"""
+
+
+class barcode_filter_Test(unittest.TestCase):
+
+    def test_BarcodeIndex_exact(self):
+        """
+        Testing that an exact barcode match is preferred over a one-mismatch match
+        with a longer barcode, and that mismatches are only allowed on request.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        index = bf.BarcodeIndex(["ACGT", "acgttt", ""], allow_mismatch=True)
+        self.assertListEqual(index.lengths, [6, 4])
+        self.assertEqual(index.match("ACGTTAGG"), "ACGT")
+        self.assertEqual(index.match("acgtttgg"), "ACGTTT")
+        self.assertEqual(index.match("ACGATTGG"), "ACGTTT")
+        self.assertEqual(index.match("ACGAGGGG"), "ACGT")
+        self.assertIsNone(index.match("AGGAGGGG"))
+
+        index = bf.BarcodeIndex(["ACGT", "ACGTTT"])
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index.match("ACGTTTGG"), "ACGTTT")
+        self.assertIsNone(index.match("ACGATTGG"))
+
+    def test_BarcodeIndex_ambiguous(self):
+        """
+        Testing that sequences one mismatch away from more than one barcode are not
+        assigned, while the barcodes themselves still match exactly.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        index = bf.BarcodeIndex(["AAAA", "AAAC"], allow_mismatch=True)
+        self.assertIsNone(index.match("AAAG"))
+        self.assertIsNone(index.match("AAAN"))
+        self.assertEqual(index.match("AAAC"), "AAAC")
+        self.assertEqual(index.match("AACA"), "AAAA")
+        self.assertEqual(index.match("AACC"), "AAAC")
+        # each barcode has 16 neighbors, 4 of which are shared or the other barcode
+        self.assertEqual(len(index), 2 + 2 * 16 - 2 * 4)
+
+    def test_iter_records(self):
+        """
+        Testing that records are read with their lines unchanged, and that lines
+        before the first header are skipped.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        records = list(bf.iter_records(StringIO("junk\n" + FASTA + ">\nAC\n")))
+        self.assertListEqual([seqID for seqID, _ in records],
+                             ["S1_1", "S1_2", "S2_3", "S3_4", ""])
+        self.assertListEqual(records[0][1], [">S1_1 first\n", "ACGTTAGGCC\n",
+                                             "TTAA\n"])
+        self.assertEqual("".join(line for _, lines in records[:-1] for line in lines),
+                         FASTA)
+
+    def test_filter_sequences(self):
+        """
+        Testing that the sequence and quality records are filtered together, with
+        sequences and barcodes spanning lines.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        index = bf.BarcodeIndex(["ACGT", "ACGTTT"], allow_mismatch=True)
+        outF, out_qualF = StringIO(), StringIO()
+        self.assertEqual(bf.filter_sequences(StringIO(FASTA), index, outF,
+                                             StringIO(QUAL), out_qualF), (4, 3, 1))
+        self.assertListEqual([seqID for seqID, _ in
+                              bf.iter_records(StringIO(outF.getvalue()))],
+                             ["S1_1", "S1_2", "S3_4"])
+        self.assertListEqual([seqID for seqID, _ in
+                              bf.iter_records(StringIO(out_qualF.getvalue()))],
+                             ["S1_1", "S1_2", "S3_4"])
+
+    def test_filter_sequences_order(self):
+        """
+        Testing that QUAL records out of order with the FASTA records raise an
+        error.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        index = bf.BarcodeIndex(["ACGT"])
+        qual = QUAL.split(">S2_3\n")
+        qual = ">S2_3\n".join([qual[0].replace(">S1_2", ">S1_5"), qual[1]])
+        self.assertRaises(ValueError, bf.filter_sequences, StringIO(FASTA), index,
+                          StringIO(), StringIO(qual), StringIO())
+        # a QUAL file with fewer records than the FASTA file
+        self.assertRaises(ValueError, bf.filter_sequences, StringIO(FASTA), index,
+                          StringIO(), StringIO(QUAL.split(">S3_4")[0]), StringIO())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,6 +6,9 @@
 """
 import math
 import unittest
+from collections import OrderedDict
+import numpy as np
+from scipy import sparse
 from phylotoast import biom_calc as bc
 from biom import load_table
 
@@ -67,6 +70,31 @@ class biom_calc_Test(unittest.TestCase):
                         msg="Arcsine squareroot transformation was not accurate."
                     )
 
+    def test_arcsine_sqrt(self):
+        """
+        Testing arcsine_sqrt() function of biom_calc.py on sparse and dense arrays.
+
+        :return: Returns OK if testing goal is achieved, otherwise raises error.
+        """
+        dense = np.array([[0.0, 0.25], [1.0, 0.5]])
+        hand_calc = np.array([[0.0, 0.523598776], [1.570796327, 0.785398163]])
+
+        self.result = bc.arcsine_sqrt(dense)
+        np.testing.assert_allclose(self.result, hand_calc, atol=1e-9)
+        self.assertEqual(dense[0, 1], 0.25, msg="Input modified without inplace.")
+
+        sp = sparse.csc_matrix(dense)
+        self.result1 = bc.arcsine_sqrt(sp, inplace=True)
+        self.assertIs(self.result1, sp)
+        self.assertEqual(sp.nnz, 3)
+        np.testing.assert_allclose(sp.toarray(), hand_calc, atol=1e-9)
+
+        # Testing in-place transform of relative_abundance() output
+        rel_abd = bc.relative_abundance(self.biomf)
+        self.result2 = bc.arcsine_sqrt_transform(rel_abd, inplace=True)
+        self.assertIs(self.result2, rel_abd)
+        self.assertAlmostEqual(self.result2["S4"]["GG_OTU_3"], 0.830915552)
+
     def test_mean_otu_pct_abundance(self):
         """
         Testing mean_otu_pct_abundance() function of biom_calc.py.
@@ -129,6 +157,41 @@ class biom_calc_Test(unittest.TestCase):
                 msg="MRA with transformation not calculated accurately."
             )
 
+    def test_group_MRA(self):
+        """
+        Testing batched mean relative abundance calculation, group_MRA() function of
+        biom_calc.py.
+
+        :return: Returns OK, if testing goal was achieved, otherwise raises error.
+        """
+        groups = OrderedDict([("S1_S2", ["S1", "S2"]), ("S9", {"S9"}),
+                              ("all", self.biomf.ids())])
+        self.result = bc.group_MRA(self.biomf, groups)
+        self.assertEqual(self.result.shape, (5, 3))
+
+        # Obtaining lists of function calculations and manual hand calculations
+        hand_calc = {"S1_S2": [17.67990075, 16.74937965, 22.51861042, 30.21091811,
+                               12.84119107],
+                     "S9": [0.0, 11.1111111, 44.4444444, 0.0, 44.4444444],
+                     "all": [14.52348298, 15.73217761, 26.58131438, 22.91732137,
+                             20.24570366]}
+        for i, grp in enumerate(groups):
+            for j, mra in enumerate(hand_calc[grp]):
+                self.assertAlmostEqual(
+                    mra, self.result[j, i],
+                    msg="Group mean relative abundance not calculated accurately."
+                )
+
+        # Checking group MRA calc with transformation
+        self.result1 = bc.group_MRA(self.biomf, groups, transform=math.sqrt)
+        for i, grp in enumerate(groups):
+            mra = bc.MRA(self.biomf, groups[grp], transform=math.sqrt)
+            for j, oid in enumerate(self.biomf.ids(axis="observation")):
+                self.assertAlmostEqual(
+                    mra[oid], self.result1[j, i],
+                    msg="Group MRA with transformation not calculated accurately."
+                )
+
     def test_raw_abundance(self):
         """
         Testing raw_abundance() function of biom_calc.py.
@@ -215,6 +278,16 @@ class biom_calc_Test(unittest.TestCase):
                     msg="Relative abundances not calculated accurately."
                 )
 
+        # Testing the sparse matrix backing the relative abundances
+        self.assertEqual(self.result.matrix.shape, (5, 10))
+        for total in self.result.matrix.sum(axis=0).A1:
+            self.assertAlmostEqual(total, 1.0,
+                                   msg="Sample relative abundances do not sum to 1.")
+        self.result1 = bc.relative_abundance(self.biomf, sampleIDs=["S9", "S2"])
+        self.assertListEqual(list(self.result1.keys()), ["S9", "S2"])
+        self.assertAlmostEqual(self.result1["S9"]["GG_OTU_3"], 0.444444444)
+        self.assertEqual(self.result1["S9"]["GG_OTU_1"], 0)
+
         # Test for valid sample IDs passed into function
         with self.assertRaisesRegexp(ValueError, "\nError while calculating relative "
                                      "abundances: The sampleIDs provided do not match "
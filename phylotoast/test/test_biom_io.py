@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""
+:Abstract: Automated tests for reading JSON and HDF5 BIOM files.
+"""
+import os
+import unittest
+import tempfile
+import numpy as np
+from phylotoast import biom_io
+from biom import load_table
+
+
+class biom_io_Test(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Write a JSON copy of the HDF5 test table.
+        """
+        self.hdf5_fp = "phylotoast/test/test.biom"
+        self.biomf = load_table(self.hdf5_fp)
+        fd, self.json_fp = tempfile.mkstemp(suffix=".biom")
+        with os.fdopen(fd, "w") as outF:
+            outF.write(self.biomf.to_json("phylotoast tests"))
+
+    def test_BIOMFile(self):
+        """
+        Testing that both formats return the same IDs, metadata and counts as the
+        biom-format library.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        expected = self.biomf.matrix_data.toarray()
+        for fp, hdf5 in [(self.hdf5_fp, True), (self.json_fp, False)]:
+            with biom_io.BIOMFile(fp) as bf:
+                self.assertEqual(bf.hdf5, hdf5)
+                self.assertEqual(bf.shape, (5, 10))
+                self.assertListEqual(bf.ids(), list(self.biomf.ids(axis="observation")))
+                self.assertListEqual(bf.ids("sample"), list(self.biomf.ids()))
+                self.assertListEqual(bf.metadata("taxonomy")[3],
+                                     self.biomf.metadata("GG_OTU_4", "observation")
+                                     ["taxonomy"])
+                self.assertListEqual(bf.metadata("missing", "sample"), [None] * 10)
+                np.testing.assert_array_equal(bf.matrix().toarray(), expected)
+                np.testing.assert_array_equal(bf.matrix("sample").toarray(), expected.T)
+                np.testing.assert_array_equal(bf.totals(), expected.sum(axis=1))
+                np.testing.assert_array_equal(bf.totals("sample"), expected.sum(axis=0))
+
+    def test_load_biom_json(self):
+        """
+        Testing conversion of an HDF5 table to a BIOM 1.0 style document.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        from_hdf5 = biom_io.load_biom_json(self.hdf5_fp)
+        from_json = biom_io.load_biom_json(self.json_fp)
+        self.assertEqual(from_hdf5["rows"], from_json["rows"])
+        self.assertEqual(from_hdf5["columns"], from_json["columns"])
+        self.assertEqual(sorted(map(tuple, from_hdf5["data"])),
+                         sorted(map(tuple, from_json["data"])))
+
+    def tearDown(self):
+        os.remove(self.json_fp)
+
+if __name__ == "__main__":
+    unittest.main()
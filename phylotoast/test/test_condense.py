@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+"""
+:Abstract: Automated tests for the OTU condensing steps.
+"""
+import os
+import shutil
+import sys
+import unittest
+import tempfile
+from StringIO import StringIO
+from phylotoast import util as ut
+from phylotoast import condense as cd
+
+TAXONOMY = """\
+1\tk__Bacteria; p__Firmicutes; c__Bacilli; o__; f__; g__; s__\t1.0\t1
+2\tk__Bacteria; p__Firmicutes; c__Bacilli; o__Lactobacillales; f__; g__; s__\t1.0\t2
+3\tk__Bacteria; p__Proteobacteria; c__; o__; f__; g__; s__\t1.0\t3
+"""
+
+SEQS_OTUS = """\
+1\tS1_1\tS2_2
+2\tS1_3
+3\tS3_4\tS3_5
+4\tS4_6
+"""
+
+NONUNIQUE = {"1": ["2"], "3": []}
+
+
+class condense_Test(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Copy the test FASTA file to a temporary directory so the index file can be
+        written next to it.
+        """
+        self.tmp_dir = tempfile.mkdtemp()
+        self.fasta_fp = os.path.join(self.tmp_dir, "test_FASTA.fna")
+        shutil.copy("phylotoast/test/test_FASTA.fna", self.fasta_fp)
+
+    def test_prune_taxonomy(self):
+        """
+        Testing that OTUs with the same truncated taxonomy are condensed into the
+        first OTU listed.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        unique, nonunique = cd.prune_taxonomy(StringIO(TAXONOMY), "c")
+        self.assertListEqual(sorted(unique), ["1", "3"])
+        self.assertEqual(unique["1"][0],
+                         "k__Bacteria; p__Firmicutes; c__Bacilli")
+        self.assertDictEqual(nonunique, {"1": ["2"], "3": []})
+
+        # malformed lines are skipped and reported on stderr, not the output
+        stdout, stderr = sys.stdout, sys.stderr
+        sys.stdout, sys.stderr = StringIO(), StringIO()
+        try:
+            result = cd.prune_taxonomy(StringIO("bad line\n" + TAXONOMY), "c")
+            out, err = sys.stdout.getvalue(), sys.stderr.getvalue()
+        finally:
+            sys.stdout, sys.stderr = stdout, stderr
+        self.assertEqual(result, (unique, nonunique))
+        self.assertEqual(out, "")
+        self.assertIn("line 0", err)
+
+    def test_condense_otu_map(self):
+        """
+        Testing that the sequences of non-unique OTUs are moved to the unique OTUs
+        that replaced them.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        otus = cd.condense_otu_map(StringIO(SEQS_OTUS), NONUNIQUE)
+        self.assertDictEqual(dict(otus), {"1": ["S1_1", "S2_2", "S1_3"],
+                                          "3": ["S3_4", "S3_5"]})
+
+    def test_stream_condense_otus(self):
+        """
+        Testing that the bounded-memory condensing, spilling to disk after every
+        line, matches condense_otu_map().
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        otus = cd.condense_otu_map(StringIO(SEQS_OTUS), NONUNIQUE)
+        outF = StringIO()
+        self.assertEqual(cd.stream_condense_otus(StringIO(SEQS_OTUS), NONUNIQUE, outF,
+                                                 1e-6, self.tmp_dir), 2)
+        streamed = dict(line.split("\t", 1) for line in outF.getvalue().splitlines())
+        self.assertDictEqual(streamed, {otuID: "\t".join(seqIDs)
+                                        for otuID, seqIDs in otus.iteritems()})
+
+    def test_write_rep_set(self):
+        """
+        Testing that only the representative sequences of unique OTUs are written.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        records = ut.parseFASTA(self.fasta_fp)
+        keep = {records[0].id, records[2].id, "missing"}
+        out_fp = os.path.join(self.tmp_dir, "condensed_rep_set.fna")
+        with open(out_fp, "w") as outF:
+            count = cd.write_rep_set(cd.iter_rep_set(self.fasta_fp, keep), outF)
+        self.assertEqual(count, 2)
+        self.assertListEqual(ut.parseFASTA(out_fp), [records[0], records[2]])
+
+        outF = StringIO()
+        cd.write_rep_set([ut.FASTARecord("1", "", "ACGT"),
+                          ut.FASTARecord("2", "S1_3 desc", "GG")], outF)
+        self.assertEqual(outF.getvalue(), ">1\nACGT\n>2 S1_3 desc\nGG\n")
+
+    def tearDown(self):
+        """
+        Remove the temporary files.
+        """
+        shutil.rmtree(self.tmp_dir)
+
+if __name__ == "__main__":
+    unittest.main()
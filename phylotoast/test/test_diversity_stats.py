@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+"""
+:Abstract: Automated tests for the alpha diversity group comparisons.
+"""
+import unittest
+from collections import OrderedDict
+import numpy as np
+import scipy.stats as stats
+from phylotoast import diversity_stats as ds
+
+
+class diversity_stats_Test(unittest.TestCase):
+
+    def setUp(self):
+        rand = np.random.RandomState(0)
+        self.diversities = OrderedDict(
+            (metric, {grp: rand.normal(shift, 1, 8) for shift, grp in
+                      enumerate(["A", "B", "C"])}) for metric in ["shannon", "chao1"])
+
+    def test_p_adjust(self):
+        """
+        Testing the multiple testing corrections against values from R's p.adjust().
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        p = [0.01, 0.04, 0.03, 0.02, 0.05]
+        np.testing.assert_allclose(ds.p_adjust(p, "bonferroni"),
+                                   [0.05, 0.2, 0.15, 0.1, 0.25])
+        np.testing.assert_allclose(ds.p_adjust(p, "holm"),
+                                   [0.05, 0.09, 0.09, 0.08, 0.09])
+        np.testing.assert_allclose(ds.p_adjust(p, "fdr_bh"), [0.05] * 5)
+        np.testing.assert_allclose(ds.p_adjust([0.5, np.nan, 0.5], "bonferroni"),
+                                   [1, np.nan, 1])
+        self.assertRaises(ValueError, ds.p_adjust, p, "no_such")
+
+    def test_pairwise_mannwhitney(self):
+        """
+        Testing that every pair of groups is tested for every metric, serially and
+        over a process pool.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        results = ds.pairwise_mannwhitney(self.diversities, correction="none")
+        self.assertListEqual([(r.metric, r.group1, r.group2) for r in results],
+                             [(m, g1, g2) for m in ["shannon", "chao1"]
+                              for g1, g2 in [("A", "B"), ("A", "C"), ("B", "C")]])
+        x, y = self.diversities["chao1"]["A"], self.diversities["chao1"]["C"]
+        U, p = stats.mannwhitneyu(x, y, alternative="two-sided")
+        self.assertEqual((results[4].U, results[4].p, results[4].p_adj), (U, p, p))
+
+        pooled = ds.pairwise_mannwhitney(self.diversities, processes=2)
+        np.testing.assert_allclose([r.p_adj for r in pooled],
+                                   ds.p_adjust([r.p for r in results]))
+
+    def test_pairwise_mannwhitney_empty_group(self):
+        """
+        Testing that pairs with an empty group get NaN results and are left out of
+        the multiple testing correction.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        groups = self.diversities["shannon"]
+        results = ds.pairwise_mannwhitney({"shannon": dict(groups, D=[])},
+                                          correction="bonferroni")
+        self.assertEqual(len(results), 6)
+        empty = [r for r in results if r.group2 == "D"]
+        self.assertEqual([r.n2 for r in empty], [0, 0, 0])
+        self.assertTrue(np.isnan([[r.U, r.p, r.p_adj] for r in empty]).all())
+        np.testing.assert_allclose(
+            [r.p_adj for r in results if r.group2 != "D"],
+            [r.p_adj for r in ds.pairwise_mannwhitney({"shannon": groups},
+                                                      correction="bonferroni")])
+
+    def test_permutation_test(self):
+        """
+        Testing the permutation p-value against the exact p-value for two small
+        groups, and its reproducibility with a seed and any chunk size.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        groups = self.diversities["shannon"].values()
+        H, p = ds.permutation_test(groups, 999, seed=1)
+        self.assertAlmostEqual(H, stats.kruskal(*groups)[0])
+        self.assertEqual(ds.permutation_test(groups, 999, seed=1, chunk_size=100),
+                         (H, p))
+
+        # 2 of the 20 splits of 6 values into 3 + 3 are as extreme as [1, 2, 3]
+        _, p = ds.permutation_test([[1, 2, 3], [4, 5, 6]], 20000, seed=0)
+        self.assertAlmostEqual(p, 0.1, delta=0.01)
+        self.assertTrue(np.isnan(ds.permutation_test([[1, 1], [1, 1]])[1]))
+
+        results = ds.pairwise_mannwhitney(self.diversities, processes=2,
+                                          permutations=199, seed=3)
+        self.assertListEqual(results, ds.pairwise_mannwhitney(
+            self.diversities, permutations=199, seed=3))
+
+
+if __name__ == "__main__":
+    unittest.main()
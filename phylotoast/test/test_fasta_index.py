@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+"""
+:Abstract: Automated tests for the memory-mapped FASTA index.
+"""
+import os
+import shutil
+import unittest
+import tempfile
+from phylotoast import util as ut
+from phylotoast import fasta_index as fi
+
+
+class fasta_index_Test(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Copy the test FASTA file to a temporary directory so the index file can be
+        written next to it.
+        """
+        self.tmp_dir = tempfile.mkdtemp()
+        self.fasta_fp = os.path.join(self.tmp_dir, "test_FASTA.fna")
+        shutil.copy("phylotoast/test/test_FASTA.fna", self.fasta_fp)
+        self.records = ut.parseFASTA(self.fasta_fp)
+
+    def test_FASTAIndex(self):
+        """
+        Testing record lookup through FASTAIndex.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        with fi.FASTAIndex(self.fasta_fp) as idx:
+            self.assertTrue(os.path.exists(self.fasta_fp + fi.INDEX_EXT),
+                            msg="Index file was not written.")
+            self.assertListEqual(list(idx.keys()), [r.id for r in self.records])
+            for rec in self.records:
+                self.assertEqual(idx[rec.id], rec,
+                                 msg="FASTA record not retrieved as expected.")
+            self.assertEqual(idx.entries["PIDF160_3"].length,
+                             len(self.records[2].data))
+
+            # Subsets come back in file order, skipping unknown IDs
+            subset = list(idx.fetch(["PIDTA.TB140_5", "PIDF154_1", "missing"]))
+            self.assertListEqual(subset, [self.records[0], self.records[4]])
+            self.assertNotIn("missing", idx)
+
+    def test_index_reuse(self):
+        """
+        Testing that a stored index is reused and rebuilt when the FASTA file changes.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        fi.FASTAIndex(self.fasta_fp).close()
+        index_fp = self.fasta_fp + fi.INDEX_EXT
+        self.assertIsNotNone(fi.read_index(self.fasta_fp, index_fp))
+
+        with open(self.fasta_fp, "a") as fastaF:
+            fastaF.write(">new_6\nACGT\nACGT\n")
+        self.assertIsNone(fi.read_index(self.fasta_fp, index_fp),
+                          msg="Stale index was not detected.")
+        with fi.FASTAIndex(self.fasta_fp) as idx:
+            self.assertEqual(idx["new_6"], ut.FASTARecord("new_6", "", "ACGTACGT"))
+            self.assertEqual(len(idx), 6)
+
+    def tearDown(self):
+        """
+        Remove the temporary FASTA and index files.
+        """
+        shutil.rmtree(self.tmp_dir)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+"""
+:Abstract: Automated tests for the ambiguous base filtering in
+           bin/filter_ambiguity.py.
+"""
+import os
+import sys
+import unittest
+from StringIO import StringIO
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..",
+                             "bin"))
+import filter_ambiguity as fa
+
+FASTA = """\
+>S1_1 first
+ACGTACGTAC
+GTACGTACGT
+>S1_2
+ACGTNNNACGTACGTACGTN
+>S1_3
+NNNNNNNNNNACGTACGTAC
+>S2_4
+ACGTACGTACGTACGTNNNN
+>S2_5
+
+"""
+
+
+class filter_ambiguity_Test(unittest.TestCase):
+
+    def test_iter_blocks(self):
+        """
+        Testing that blocks of every size hold whole records and together give
+        back the input unchanged.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        for data in (FASTA, FASTA.rstrip("\n")):
+            for block_size in xrange(1, len(data) + 2):
+                blocks = list(fa.iter_blocks(StringIO(data), block_size))
+                self.assertEqual("".join(blocks), data)
+                for block in blocks:
+                    self.assertTrue(block.startswith(">"))
+                    self.assertTrue(block.endswith("\n") or block is blocks[-1])
+        self.assertListEqual(list(fa.iter_blocks(StringIO(""))), [])
+        self.assertListEqual(list(fa.iter_blocks(StringIO(FASTA), 1))[:2],
+                             [">S1_1 first\nACGTACGTAC\nGTACGTACGT\n",
+                              ">S1_2\nACGTNNNACGTACGTACGTN\n"])
+
+    def test_filter_ambiguity(self):
+        """
+        Testing that sequences with too many Ns are removed, that sequences are
+        truncated at the first run of repeated Ns, and that empty records are
+        dropped.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        out, count, kept = fa.filter_ambiguity(FASTA, percent=0.25)
+        self.assertEqual((count, kept), (5, 3))
+        self.assertEqual(out, ">S1_1 first\nACGTACGTACGTACGTACGT\n"
+                              ">S1_2\nACGTNNNACGTACGTACGTN\n"
+                              ">S2_4\nACGTACGTACGTACGTNNNN\n")
+
+        out, _, _ = fa.filter_ambiguity(FASTA, percent=0.25, repeats=3)
+        self.assertEqual(out, ">S1_1 first\nACGTACGTACGTACGTACGT\n"
+                              ">S1_2\nACGT\n>S2_4\nACGTACGTACGTACGT\n")
+        out, _, _ = fa.filter_ambiguity(FASTA, percent=0.25, repeats=4)
+        self.assertEqual(out.splitlines()[3], "ACGTNNNACGTACGTACGTN")
+
+        # the percentage is checked before truncation
+        out, _, kept = fa.filter_ambiguity(FASTA, percent=1, repeats=10)
+        self.assertEqual(kept, 4)
+        self.assertIn(">S1_3\n\n", out)
+
+    def test_filter_file(self):
+        """
+        Testing that filtering a file in small blocks, serially and over a process
+        pool, matches filtering it at once.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        expected = fa.filter_ambiguity(FASTA, 0.25, 3)
+        for processes in (1, 2):
+            outF = StringIO()
+            self.assertEqual(fa.filter_file(StringIO(FASTA), outF, 0.25, 3, processes,
+                                            block_size=16), expected[1:])
+            self.assertEqual(outF.getvalue(), expected[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
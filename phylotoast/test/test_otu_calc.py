@@ -101,6 +101,18 @@ class otu_calc_Test(unittest.TestCase):
                 msg="Error! OTU membership calculations are inaccurate!"
             )
 
+        # Testing that the table was not converted to presence/absence
+        self.assertEqual(self.biomf.get_value_by_ids("GG_OTU_4", "S6"), 5)
+
+        # Testing boolean array output
+        self.result = oc.assign_otu_membership(self.biomf, as_array=True)
+        otuids = self.biomf.ids("observation")
+        for sid in ["S3", "S6", "S9"]:
+            self.assertListEqual(
+                sorted(hand_calc[sid]), sorted(otuids[self.result[sid]]),
+                msg="Error! OTU membership arrays are inaccurate!"
+            )
+
     def tearDown(self):
         """
         Tearing down of this unittest framework.
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""
+:Abstract: Automated tests for splitting sequence files and merging pick OTUs
+           results.
+"""
+import os
+import shutil
+import unittest
+import tempfile
+from StringIO import StringIO
+from phylotoast import util as ut
+from phylotoast import otu_io
+
+
+class otu_io_Test(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Create a temporary directory for the partition and result files.
+        """
+        self.tmp_dir = tempfile.mkdtemp()
+        self.records = ut.parseFASTA("phylotoast/test/test_FASTA.fna")
+
+    def test_assign_partitions(self):
+        """
+        Testing round-robin and base-balanced partition assignment.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        recs = [ut.FASTARecord(str(i), "", "A" * n)
+                for i, n in enumerate([10, 1, 1, 1, 5])]
+        self.assertListEqual([i for i, _ in otu_io.assign_partitions(recs, 2)],
+                             [0, 1, 0, 1, 0])
+        self.assertListEqual(
+            [i for i, _ in otu_io.assign_partitions(recs, 2, "bases")],
+            [0, 1, 1, 1, 1])
+
+    def test_stream_split_data(self):
+        """
+        Testing that every record is written to exactly one partition file.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        stats = otu_io.stream_split_data("phylotoast/test/test_FASTA.fna", 2,
+                                         self.tmp_dir)
+        self.assertEqual(sum(s[0] for s in stats), len(self.records))
+        split = []
+        for i in range(2):
+            split.extend(ut.parseFASTA(os.path.join(self.tmp_dir, "%i.fna" % i)))
+        self.assertListEqual(sorted(r.id for r in split),
+                             sorted(r.id for r in self.records))
+
+    def test_external_merge_results(self):
+        """
+        Testing that the bounded-memory merge, in several passes, matches the
+        in-memory merge, including OTUs without sequence IDs.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        results = []
+        for i, lines in enumerate([["OTU_2\ta1\ta2", "OTU_1\ta3", "OTU_4"],
+                                   ["OTU_1\tb1", "OTU_3\tb2\tb3"],
+                                   ["OTU_2\tc1", "OTU_5"]]):
+            fn = os.path.join(self.tmp_dir, "{}_otus.txt".format(i))
+            with open(fn, "w") as outF:
+                outF.write("\n".join(lines) + "\n")
+            results.append(fn)
+
+        otus = otu_io.merge_results(results)
+        expected = "".join("{}\t{}\n".format(otuID, "\t".join(sorted(otus[otuID])))
+                           for otuID in sorted(otus))
+        outF = StringIO()
+        num_otus = otu_io.external_merge_results(results, outF, 1e-6, self.tmp_dir,
+                                                 fan_in=2)
+        self.assertEqual(num_otus, 5)
+        self.assertEqual(outF.getvalue(), expected)
+        self.assertListEqual(sorted(os.listdir(self.tmp_dir)),
+                             ["0_otus.txt", "1_otus.txt", "2_otus.txt"],
+                             msg="Temporary run files were not removed.")
+
+    def tearDown(self):
+        """
+        Remove the temporary files.
+        """
+        shutil.rmtree(self.tmp_dir)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""
+:Abstract: Automated tests for rarefaction of OTU tables.
+"""
+import unittest
+import numpy as np
+from scipy import sparse
+from phylotoast import rarefaction as rf
+from phylotoast.biom_io import BIOMFile
+
+
+class rarefaction_Test(unittest.TestCase):
+
+    def setUp(self):
+        with BIOMFile("phylotoast/test/test.biom") as bf:
+            self.ids = bf.ids("sample")
+            self.counts = bf.matrix("sample")
+        self.totals = self.counts.sum(axis=1).A.ravel()
+
+    def test_rarefy(self):
+        """
+        Testing that rarefied samples have the requested depth, never exceed the
+        original counts, and that samples below a depth are left out.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        tables = list(rf.rarefy(self.counts, self.ids, [20, 5], 3, seed=1))
+        self.assertListEqual([(t.depth, t.iteration) for t in tables],
+                             [(5, 0), (20, 0), (5, 1), (20, 1), (5, 2), (20, 2)])
+        for table in tables:
+            kept = [self.ids.index(sid) for sid in table.sample_ids]
+            self.assertListEqual(kept, list(np.flatnonzero(self.totals >= table.depth)))
+            np.testing.assert_array_equal(table.counts.sum(axis=1).A.ravel(),
+                                          table.depth)
+            self.assertTrue((table.counts <= self.counts[kept]).toarray().all())
+
+    def test_rarefy_zero_depth(self):
+        """
+        Testing that a depth of 0 keeps every sample, including samples without
+        counts, and that negative depths are rejected.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        counts = sparse.csr_matrix([[3, 0], [0, 0]])
+        tables = list(rf.rarefy(counts, ["a", "b"], [0, 2], 1, seed=0))
+        self.assertListEqual([t.sample_ids for t in tables], [["a", "b"], ["a"]])
+        self.assertEqual(tables[0].counts.nnz, 0)
+        np.testing.assert_array_equal(tables[1].counts.toarray(), [[2, 0]])
+        self.assertRaises(ValueError, list, rf.rarefy(counts, ["a", "b"], [-1, 2]))
+
+    def test_reproducible(self):
+        """
+        Testing that seeded rarefaction gives the same tables with and without a
+        process pool.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        serial = rf.rarefy(self.counts, self.ids, [5, 10], 2, seed=7)
+        pooled = rf.rarefy(self.counts, self.ids, [5, 10], 2, processes=2, seed=7)
+        for t1, t2 in zip(serial, pooled):
+            self.assertEqual((t1.counts != t2.counts).nnz, 0)
+
+    def test_subsample(self):
+        """
+        Testing that subsampling follows the hypergeometric distribution and that
+        the subsamples of one iteration are nested.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        rng = np.random.RandomState(0)
+        counts = np.array([30, 10, 60])
+        draws = np.array([rf.subsample(counts, [10, 50], rng) for _ in range(4000)])
+        self.assertTrue((draws[:, 0] <= draws[:, 1]).all())
+        np.testing.assert_allclose(draws[:, 0].mean(axis=0), [3, 1, 6], atol=0.1)
+        np.testing.assert_allclose(draws[:, 1].mean(axis=0), [15, 5, 30], atol=0.2)
+
+    def test_rarefaction_curve(self):
+        """
+        Testing the mean metric values and the NaN entries below each sample's
+        total in a rarefaction curve.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        counts = sparse.csr_matrix([[5, 5, 0], [1, 0, 0]])
+        depths, mean, std = rf.rarefaction_curve(counts, ["a", "b"], "observed_otus",
+                                                 [1, 10], 4, seed=0)
+        self.assertListEqual(depths, [1, 10])
+        np.testing.assert_array_equal(mean, [[1, 2], [1, np.nan]])
+        np.testing.assert_array_equal(std, [[0, 0], [0, np.nan]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""
+:Abstract: Automated tests for the on-disk result cache.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from phylotoast.biom_io import BIOMFile
+from phylotoast.result_cache import ResultCache, table_digest
+
+
+class result_cache_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        with BIOMFile("phylotoast/test/test.biom") as bf:
+            self.ids = bf.ids("sample")
+            self.counts = bf.matrix("sample")
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_table_digest(self):
+        """
+        Testing that the digest depends on the table content only.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        digest = table_digest(self.ids, self.counts)
+        self.assertEqual(digest, table_digest(self.ids, self.counts.tocsc()))
+        changed = self.counts.copy()
+        changed.data[0] += 1
+        self.assertNotEqual(digest, table_digest(self.ids, changed))
+        self.assertNotEqual(digest, table_digest(self.ids[::-1], self.counts))
+
+    def test_get_put(self):
+        """
+        Testing that stored arrays are read back, and that misses return None.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        cache = ResultCache(self.cache_dir)
+        values = np.arange(10, dtype=float)
+        self.assertIsNone(cache.get("abc", "shannon"))
+        cache.put("abc", "shannon", values)
+        np.testing.assert_array_equal(cache.get("abc", "shannon"), values)
+        self.assertIsNone(cache.get("abc", "chao1"))
+
+    def test_evict(self):
+        """
+        Testing that the least recently used entries are removed once the cache is
+        over its size limit.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        values = np.zeros(100)
+        cache = ResultCache(self.cache_dir)
+        cache.put("a", "m", values)
+        entry_size = cache.size()
+        cache.max_size = 2 * entry_size
+        cache.put("b", "m", values)
+        # use "a" so that "b" becomes the least recently used entry
+        os.utime(cache.path("a", "m"), (0, 0))
+        os.utime(cache.path("b", "m"), (0, 0))
+        cache.get("a", "m")
+        cache.put("c", "m", values)
+        self.assertEqual(cache.size(), 2 * entry_size)
+        self.assertIsNone(cache.get("b", "m"))
+        self.assertIsNotNone(cache.get("a", "m"))
+        self.assertIsNotNone(cache.get("c", "m"))
+
+
+if __name__ == "__main__":
+    unittest.main()
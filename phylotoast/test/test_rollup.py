@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+"""
+:Abstract: Automated tests for the taxonomy rollup index.
+"""
+import unittest
+import numpy as np
+from phylotoast.rollup import TaxonomyRollup
+from biom import load_table
+
+
+class rollup_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.biomf = load_table("phylotoast/test/test.biom")
+        self.rollup = TaxonomyRollup.from_table(self.biomf)
+
+    def test_group_ids(self):
+        """
+        Testing the assignment of OTU rows to groups at each level.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        self.assertListEqual(list(self.rollup.labels["k"]),
+                             ["k__Archaea", "k__Bacteria"])
+        self.assertListEqual(list(self.rollup.group_ids["k"]), [1, 1, 0, 1, 1])
+        # GG_OTU_1 and GG_OTU_5 share a taxonomy
+        gids = self.rollup.group_ids["s"]
+        self.assertEqual(len(self.rollup.labels["s"]), 4)
+        self.assertEqual(gids[0], gids[4])
+
+    def test_aggregate(self):
+        """
+        Testing that aggregated counts match summing the table rows by hand.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        data = self.biomf.matrix_data
+        labels, agg = self.rollup.aggregate(data, "p")
+        self.assertEqual(agg.shape, (4, 10))
+        proteo = list(labels).index("k__Bacteria; p__Proteobacteria")
+        np.testing.assert_allclose(agg.toarray()[proteo],
+                                   data[0].toarray()[0] + data[4].toarray()[0])
+        self.assertEqual(agg.sum(), data.sum())
+
+        totals = np.asarray(data.sum(axis=1)).ravel()
+        labels, agg = self.rollup.aggregate(totals, "g")
+        np.testing.assert_allclose(agg[list(labels).index(
+            "k__Bacteria; p__Proteobacteria; c__Gammaproteobacteria; "
+            "o__Enterobacteriales; f__Enterobacteriaceae; g__Escherichia")],
+            totals[0] + totals[4])
+
+    def test_unpadded(self):
+        """
+        Testing that, without padding, OTUs labelled None are left out of a level
+        instead of being counted under an empty rank.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        rank = lambda taxa, level: taxa[level] if level < len(taxa) else None
+        taxonomies = ["k__Bacteria; p__Firmicutes; c__Bacilli",
+                      "k__Bacteria; p__Firmicutes; c__Bacilli; o__; f__; g__Bacillus",
+                      "k__Bacteria"]
+        rollup = TaxonomyRollup(taxonomies, label=rank, pad=False)
+        self.assertListEqual(list(rollup.group_ids["c"]), [0, 0, -1])
+        labels, agg = rollup.aggregate(np.array([1.0, 2.0, 4.0]), "f")
+        self.assertListEqual(list(labels), ["f__"])
+        np.testing.assert_allclose(agg, [2.0])
+        labels, agg = rollup.aggregate(np.array([1.0, 2.0, 4.0]), "s")
+        self.assertEqual(len(labels), 0)
+        self.assertEqual(agg.shape, (0,))
+
+        padded = TaxonomyRollup(taxonomies, label=rank)
+        labels, agg = padded.aggregate(np.array([1.0, 2.0, 4.0]), "f")
+        np.testing.assert_allclose(agg, [7.0])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+"""
+:Abstract: Automated tests for the partition job schedulers.
+"""
+import os
+import sys
+import shutil
+import unittest
+import tempfile
+from phylotoast import scheduler as sch
+
+# Writes the result file for a partition, failing the first time for partition 1.
+FAKE_PICK = """\
+import os, sys
+fasta_fp, output_dir, num = sys.argv[1:]
+flag = fasta_fp + '.tried'
+if num == '1' and not os.path.exists(flag):
+    open(flag, 'w').close()
+    sys.exit(3)
+os.mkdir(output_dir)
+open(os.path.join(output_dir, num + '_otus.txt'), 'w').write('OTU_' + num + '\\tS1\\n')
+"""
+
+QSTAT = """\
+Job id                    Name             User            Time Use S Queue
+------------------------- ---------------- --------------- -------- - -----
+123.server                 pick_otus_0      user            00:12:34 R batch
+124.server                 pick_otus_1      user            00:12:00 C batch
+"""
+
+
+class scheduler_Test(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Create partition files and a stand-in pick OTUs script in a temporary
+        directory.
+        """
+        self.tmp_dir = tempfile.mkdtemp()
+        self.jobs = []
+        for i in range(3):
+            fasta_fp = os.path.join(self.tmp_dir, "{}.fna".format(i))
+            with open(fasta_fp, "w") as outF:
+                outF.write(">S1_{}\nACGT\n".format(i))
+            self.jobs.append(sch.PartitionJob(fasta_fp))
+        script_fp = os.path.join(self.tmp_dir, "fake_pick.py")
+        with open(script_fp, "w") as outF:
+            outF.write(FAKE_PICK)
+        self.command = "{} {} {{fasta_fp}} {{output_dir}} {{job_num}}".format(
+            sys.executable, script_fp)
+
+    def test_PartitionJob(self):
+        """
+        Testing the output layout of a partition job.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        job = self.jobs[2]
+        self.assertEqual(job.num, "2")
+        self.assertEqual(job.result_fp,
+                         os.path.join(self.tmp_dir, "bpo.2", "2_otus.txt"))
+        self.assertFalse(job.done)
+
+    def test_LocalScheduler(self):
+        """
+        Testing that the local scheduler runs every partition and retries failures.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        scheduler = sch.LocalScheduler({}, self.command, processes=2, retries=1)
+        self.assertListEqual(scheduler.run(self.jobs), [])
+        self.assertListEqual([job.attempts for job in self.jobs], [1, 2, 1])
+        for job in self.jobs:
+            with open(job.result_fp) as inF:
+                self.assertEqual(inF.read(), "OTU_{}\tS1\n".format(job.num))
+
+        # completed partitions are not run again
+        self.assertListEqual(scheduler.run(self.jobs), [])
+        self.assertListEqual([job.attempts for job in self.jobs], [1, 2, 1])
+
+    def test_LocalScheduler_failure(self):
+        """
+        Testing that jobs still failing after all retries are reported.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        scheduler = sch.LocalScheduler({}, self.command, processes=2, retries=0)
+        failed = scheduler.run(self.jobs)
+        self.assertListEqual(failed, [self.jobs[1]])
+        self.assertEqual(self.jobs[1].returncode, 3)
+
+    def test_Scheduler_abstract(self):
+        """
+        Testing that the base scheduler cannot be used without a backend.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        self.assertRaises(TypeError, sch.Scheduler, {})
+
+    def test_TemplateScheduler_queued(self):
+        """
+        Testing that queued jobs are matched by their exact job number and that
+        completed jobs still listed by the queuing system count as finished.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        pbs = sch.PBSScheduler({}, "")
+        pbs.status_cmd = [sys.executable, "-c",
+                          "import sys; sys.stdout.write({!r})".format(QSTAT)]
+        self.assertTrue(pbs.queued("123.server"))
+        self.assertFalse(pbs.queued("124.server"))
+        self.assertFalse(pbs.queued("12"))
+        self.assertFalse(pbs.queued("34"))
+
+        slurm = sch.SLURMScheduler({}, "")
+        self.assertDictEqual(slurm.parse_status("77 R\n78 CD\n"),
+                             {"77": "R", "78": "CD"})
+
+    def tearDown(self):
+        """
+        Remove the temporary files.
+        """
+        shutil.rmtree(self.tmp_dir)
+
+if __name__ == "__main__":
+    unittest.main()
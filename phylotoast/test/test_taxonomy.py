@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""
+:Abstract: Automated tests for the cached taxonomy helpers.
+"""
+import unittest
+from phylotoast import taxonomy as tx
+
+
+class taxonomy_Test(unittest.TestCase):
+
+    def setUp(self):
+        tx.cache_clear()
+        self.tax = ("k__Bacteria; p__Firmicutes; c__Bacilli; o__Lactobacillales; "
+                    "f__Streptococcaceae; g__Streptococcus; s__mutans")
+
+    def test_parse_taxonomy(self):
+        """
+        Testing parsing of taxonomy strings and lists into Taxonomy values.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        taxa = tx.parse_taxonomy(self.tax)
+        self.assertIsInstance(taxa, tx.Taxonomy)
+        self.assertEqual(len(taxa), 7)
+        self.assertEqual(taxa.rank("g"), "g__Streptococcus")
+        self.assertEqual(str(taxa), self.tax)
+        self.assertEqual(tx.parse_taxonomy(self.tax.split("; ")), taxa)
+        self.assertEqual(tx.parse_taxonomy("k__Archaea; p__").padded(),
+                         tx.Taxonomy(("k__Archaea", "p__", "c__", "o__", "f__", "g__",
+                                      "s__")))
+        self.assertFalse(hasattr(taxa, "__dict__"))
+
+    def test_truncate_taxonomy(self):
+        """
+        Testing truncation of padded and unpadded taxonomy strings.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        self.assertEqual(tx.truncate_taxonomy(self.tax, "p"),
+                         "k__Bacteria; p__Firmicutes")
+        self.assertEqual(tx.truncate_taxonomy("k__Bacteria; p__Firmicutes", "g"),
+                         "k__Bacteria; p__Firmicutes; c__; o__; f__; g__")
+
+    def test_cache_info(self):
+        """
+        Testing that repeated lookups are served from the cache.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        for _ in range(3):
+            self.assertEqual(tx.otu_name(self.tax.split("; ")), "Streptococcus_mutans")
+            tx.split_phylogeny(self.tax, "f")
+        info = tx.cache_info()
+        self.assertEqual(info["_otu_name"], tx.CacheInfo(2, 1, 8192, 1))
+        self.assertEqual(info["split_phylogeny"].hits, 2)
+
+        @tx.lru_cache(maxsize=2)
+        def square(x):
+            return x * x
+        for x in [1, 2, 1, 3, 2]:
+            square(x)
+        # 2 was evicted when 3 was added, as 1 had been used more recently
+        self.assertEqual(square.cache_info(), tx.CacheInfo(1, 4, 2, 2))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,6 +4,9 @@
 :Abstract: Automated tests for util.py functions.
 """
 import os
+import bz2
+import gzip
+import types
 import unittest
 import tempfile
 from collections import namedtuple
@@ -38,6 +41,40 @@ class util_Test(unittest.TestCase):
                 msg="FASTA records not parsed as expected."
             )
 
+    def test_iterFASTA(self):
+        """
+        Testing iterFASTA function on plain, gzip and bzip2 compressed input.
+
+        :return: Returns OK if test goals were achieved, otherwise raises
+                 error.
+        """
+        parsed = ut.parseFASTA("phylotoast/test/test_FASTA.fna")
+        result = ut.iterFASTA("phylotoast/test/test_FASTA.fna")
+        self.assertIsInstance(result, types.GeneratorType)
+        self.assertListEqual(list(result), parsed,
+                             msg="FASTA records not parsed as expected.")
+
+        with open("phylotoast/test/test_FASTA.fna") as inF:
+            data = inF.read()
+        for opener, ext in [(gzip.open, ".gz"), (bz2.BZ2File, ".bz2")]:
+            fd, fp = tempfile.mkstemp(suffix=ext)
+            os.close(fd)
+            outF = opener(fp, "wb")
+            outF.write(data)
+            outF.close()
+            self.assertListEqual(list(ut.iterFASTA(fp)), parsed,
+                                 msg="Compressed FASTA records not parsed as expected.")
+            os.remove(fp)
+
+        # Records without a description
+        fasta = tempfile.NamedTemporaryFile(suffix=".fna", delete=False)
+        fasta.write(">seq1\nACGT\nAC\n\n>seq2 some descr\nGGT\n")
+        fasta.close()
+        self.assertListEqual(list(ut.iterFASTA(fasta.name)),
+                             [ut.FASTARecord("seq1", "", "ACGTAC"),
+                              ut.FASTARecord("seq2", "some descr", "GGT")])
+        os.remove(fasta.name)
+
     def test_storeFASTA(self):
         """
         Testing storeFASTA function.
@@ -2,12 +2,15 @@
 :Date: Created on Feb 2, 2013
 :Author: Shareef Dabdoub
 """
+import bz2
 import errno
+import gzip
 import itertools
 import os
 import sys
 from textwrap import dedent as twdd
 from collections import namedtuple, OrderedDict, defaultdict
+from phylotoast import taxonomy
 try:
     from palettable.colorbrewer.qualitative import Set3_12
 except ImportError as ie:
@@ -30,47 +33,70 @@ def storeFASTA(fastaFNH):
     :return: FASTA records containing entries for id, description and data.
     """
     fasta = file_handle(fastaFNH).read()
-    return [FASTARecord(rec[0].split()[0], rec[0].split(None, 1)[1], "".join(rec[1:]))
+    return [FASTARecord(rec[0].split()[0], "".join(rec[0].split(None, 1)[1:]),
+                        "".join(rec[1:]))
             for rec in (x.strip().split("\n") for x in fasta.split(">")[1:])]
 
 
-def parseFASTA(fastaFNH):
+def iterFASTA(fastaFNH):
     """
-    Parse the records in a FASTA-format file keeping the file open, and reading through
-    one line at a time.
+    Lazily parse the records in a FASTA-format file, yielding each record as soon as it
+    has been read so that only one record is held in memory at a time. Files ending in
+    .gz or .bz2 are decompressed transparently. Records without a description are given
+    an empty descr.
 
     :type source: path to FAST file or open file handle
     :param source: The data source from which to parse the FASTA records.
                    Expects the input to resolve to a collection that can be iterated
                    through, such as an open file handle.
 
-    :rtype: tuple
+    :rtype: generator
     :return: FASTA records containing entries for id, description and data.
     """
-    recs = []
     seq = []
-    seqID = ""
+    seqID = None
     descr = ""
 
-    for line in file_handle(fastaFNH):
-        line = line.strip()
-        if line[0] == ";":
-            continue
-        if line[0] == ">":
-            # conclude previous record
-            if seq:
-                recs.append(FASTARecord(seqID, descr, "".join(seq)))
-                seq = []
-            # start new record
-            line = line[1:].split(None, 1)
-            seqID, descr = line[0], line[1]
-        else:
-            seq.append(line)
+    fastaF = file_handle(fastaFNH)
+    try:
+        for line in fastaF:
+            line = line.strip()
+            if not line or line[0] == ";":
+                continue
+            if line[0] == ">":
+                # conclude previous record
+                if seqID is not None:
+                    yield FASTARecord(seqID, descr, "".join(seq))
+                    seq = []
+                # start new record
+                line = line[1:].split(None, 1)
+                seqID, descr = line[0], "".join(line[1:])
+            else:
+                seq.append(line)
 
-    # catch last seq in file
-    if seq:
-        recs.append(FASTARecord(seqID, descr, "".join(seq)))
-    return recs
+        # catch last seq in file
+        if seqID is not None:
+            yield FASTARecord(seqID, descr, "".join(seq))
+    finally:
+        # only close handles opened here from a file path
+        if fastaF is not fastaFNH:
+            fastaF.close()
+
+
+def parseFASTA(fastaFNH):
+    """
+    Parse the records in a FASTA-format file keeping the file open, and reading through
+    one line at a time.
+
+    :type source: path to FAST file or open file handle
+    :param source: The data source from which to parse the FASTA records.
+                   Expects the input to resolve to a collection that can be iterated
+                   through, such as an open file handle.
+
+    :rtype: list
+    :return: FASTA records containing entries for id, description and data.
+    """
+    return list(iterFASTA(fastaFNH))
 
 
 def parse_map_file(mapFNH):
@@ -159,6 +185,7 @@ def parse_taxonomy_table(idtaxFNH):
 def split_phylogeny(p, level="s"):
     """
     Return either the full or truncated version of a QIIME-formatted taxonomy string.
+    Results are cached; see phylotoast.taxonomy.
 
     :type p: str
     :param p: A QIIME-formatted taxonomy string: k__Foo; p__Bar; ...
@@ -172,9 +199,7 @@ def split_phylogeny(p, level="s"):
     :return: A QIIME-formatted taxonomy string up to the classification given
             by param level.
     """
-    level = level+"__"
-    result = p.split(level)
-    return result[0]+level+result[1].split(";")[0]
+    return taxonomy.split_phylogeny(p, level)
 
 
 def ensure_dir(d):
@@ -216,17 +241,23 @@ def file_handle(fnh, mode="rU"):
 
     :type mode: str
     :param mode: The way in which this file will be used, for example to read or write or
-                 both. By default, file will be opened in rU mode.
+                 both. By default, file will be opened in rU mode. Paths ending in .gz or
+                 .bz2 are opened with the matching decompressor.
 
     :return: Returns an opened file for appropriate usage.
     """
     handle = None
-    if isinstance(fnh, file):
+    if isinstance(fnh, (file, gzip.GzipFile, bz2.BZ2File)):
         if fnh.closed:
             raise ValueError("Input file is closed.")
         handle = fnh
     elif isinstance(fnh, str):
-        handle = open(fnh, mode)
+        if fnh.endswith(".gz"):
+            handle = gzip.open(fnh, mode.replace("U", ""))
+        elif fnh.endswith(".bz2"):
+            handle = bz2.BZ2File(fnh, mode.replace("U", ""))
+        else:
+            handle = open(fnh, mode)
 
     return handle
 